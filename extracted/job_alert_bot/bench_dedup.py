@@ -0,0 +1,110 @@
+"""
+bench_dedup.py - 对比 JSON / SQLite / Bloom 去重存储的内存和加载时间
+
+用法：
+    python bench_dedup.py                 # 默认 100 万条
+    python bench_dedup.py --keys 200000
+
+生成 N 条记录（平均分布在 SEEN_DAYS 天内），分别写成 seen_jobs.json、seen_jobs.db
+和 Bloom 文件，测量文件大小、加载时间（SQLite 为打开 + 查询一批 500 个 key）、
+内存，以及 Bloom 的实测误判率。
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import config
+import seen_bloom
+from seen_sqlite import SeenStore
+
+
+def _measure(fn):
+    """返回 (结果, 秒, 峰值内存 MB)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--keys", type=int, default=1_000_000)
+    parser.add_argument("--probes", type=int, default=100_000)
+    args = parser.parse_args()
+
+    days = config.SEEN_DAYS
+    today = date.today()
+    per_day = -(-args.keys // days)
+    keys = [f"adzuna_{i}" for i in range(args.keys)]
+    tmp = tempfile.mkdtemp()
+
+    # JSON（现有格式）
+    json_path = os.path.join(tmp, "seen_jobs.json")
+    data = {"jobs": {k: {"title": f"Data Analyst {i % 997}", "company": f"Company {i % 5003}",
+                         "date": (today - timedelta(days=i // per_day)).isoformat()}
+                     for i, k in enumerate(keys)},
+            "last_cleanup": today.isoformat()}
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+    # SQLite
+    db_path = os.path.join(tmp, "seen_jobs.db")
+    with SeenStore(db_path) as store:
+        store.add_many((k, v["title"], v["company"], v["date"]) for k, v in data["jobs"].items())
+        store.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    del data
+
+    def lookup_sqlite():
+        with SeenStore(db_path) as store:
+            return store.seen_keys(keys[::len(keys) // 500][:500])
+    _, sqlite_load, sqlite_mem = _measure(lookup_sqlite)
+
+    def load_json():
+        with open(json_path, "r", encoding="utf-8") as f:
+            loaded = json.load(f)
+        return loaded, set(loaded["jobs"])
+    _, json_load, json_mem = _measure(load_json)
+
+    # Bloom
+    bloom_path = os.path.join(tmp, "seen_jobs.bloom")
+    store = seen_bloom.BloomBuckets.create(days, per_day, config.BLOOM_FP_RATE)
+    start = time.perf_counter()
+    for i, k in enumerate(keys):
+        store.add(k, today.toordinal() - i // per_day)
+    build = time.perf_counter() - start
+    store.save(bloom_path)
+    del store
+
+    store, bloom_load, bloom_mem = _measure(lambda: seen_bloom.BloomBuckets.load(bloom_path))
+
+    start = time.perf_counter()
+    misses = sum(1 for k in keys[:args.probes] if not store.contains(k))
+    false_pos = sum(1 for i in range(args.probes) if store.contains(f"unseen_{i}"))
+    lookup = (time.perf_counter() - start) / (2 * args.probes)
+
+    print(f"记录数:           {args.keys:,}（{days} 天，每天 {per_day:,}）")
+    print(f"JSON  文件:       {os.path.getsize(json_path) / 1e6:8.1f} MB  "
+          f"加载 {json_load:6.2f}s  内存 {json_mem:8.1f} MB")
+    print(f"SQLite 文件:      {os.path.getsize(db_path) / 1e6:8.1f} MB  "
+          f"查询 {sqlite_load:6.2f}s  内存 {sqlite_mem:8.1f} MB")
+    print(f"Bloom 文件:       {os.path.getsize(bloom_path) / 1e6:8.1f} MB  "
+          f"加载 {bloom_load:6.2f}s  内存 {bloom_mem:8.1f} MB")
+    print(f"Bloom 参数:       m={store.m_bits:,} bits/桶, k={store.k}, 写入 {build:.1f}s")
+    print(f"Bloom 查询:       {lookup * 1e6:.1f} µs/次")
+    print(f"误判率:           {false_pos / args.probes:.5f}（目标 {config.BLOOM_FP_RATE}），"
+          f"漏判 {misses}")
+
+
+if __name__ == "__main__":
+    main()
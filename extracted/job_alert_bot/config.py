@@ -125,8 +125,21 @@ DESCRIPTION_BOOST_KEYWORDS = [
 MIN_SALARY = 45000
 MAX_SALARY = 0
 
+# ============================================================
+# Dedup
+# ============================================================
+# "sqlite" - seen_jobs.db, keeps title/company per key; imports seen_jobs.json on first run
+# "json"   - seen_jobs.json, keeps title/company per key (rewritten every run)
+# "bloom"  - one Bloom filter per day in a compact binary file (key membership only)
+DEDUP_BACKEND = "sqlite"
+SEEN_DAYS = 30                  # how long a pushed job is remembered
+BLOOM_FP_RATE = 0.001           # overall false-positive rate (a false positive = one job not pushed)
+BLOOM_KEYS_PER_DAY = 5000       # capacity of each daily bucket
+
 # ============================================================
 # Files
 # ============================================================
 SEEN_JOBS_FILE = "seen_jobs.json"
+SEEN_DB_FILE = "seen_jobs.db"
+BLOOM_FILE = "seen_jobs.bloom"
 LOG_FILE = "job_alert.log"
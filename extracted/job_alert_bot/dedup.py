@@ -1,12 +1,17 @@
 """
-dedup.py - 去重模块（JSON记录，30天自动清理）
+dedup.py - 去重模块（30天自动清理）
+
+后端由 config.DEDUP_BACKEND 选择：
+- sqlite: seen_jobs.db（见 seen_sqlite.py），记录标题/公司，首次使用自动导入旧 JSON
+- json:   seen_jobs.json，记录标题/公司
+- bloom:  按天分桶的 Bloom filter（见 seen_bloom.py），只记录 key
 """
 
 import json
 import os
 import logging
-from datetime import datetime, timedelta
-from typing import List, Set
+from datetime import date, datetime, timedelta
+from typing import Callable, List, Set
 
 import config
 from scrapers import Job
@@ -20,20 +25,24 @@ def _load_seen() -> dict:
     try:
         with open(config.SEEN_JOBS_FILE, "r", encoding="utf-8") as f:
             return json.load(f)
-    except Exception:
+    except Exception as e:
+        logger.error(f"❌ 读取 {config.SEEN_JOBS_FILE} 失败，按空记录处理: {e}")
         return {"jobs": {}, "last_cleanup": ""}
 
 
 def _save_seen(data: dict):
-    with open(config.SEEN_JOBS_FILE, "w", encoding="utf-8") as f:
+    # 先写临时文件再替换，中途崩溃不会留下半个 JSON
+    tmp = f"{config.SEEN_JOBS_FILE}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, config.SEEN_JOBS_FILE)
 
 
 def _cleanup(data: dict) -> dict:
     today = datetime.now().strftime("%Y-%m-%d")
     if data.get("last_cleanup") == today:
         return data
-    cutoff = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
+    cutoff = (datetime.now() - timedelta(days=config.SEEN_DAYS)).strftime("%Y-%m-%d")
     old = len(data["jobs"])
     data["jobs"] = {k: v for k, v in data["jobs"].items() if v.get("date", "") >= cutoff}
     removed = old - len(data["jobs"])
@@ -43,20 +52,24 @@ def _cleanup(data: dict) -> dict:
     return data
 
 
-def deduplicate(jobs: List[Job]) -> List[Job]:
-    data = _load_seen()
-    data = _cleanup(data)
-
-    seen: Set[str] = set(data["jobs"].keys())
+def _filter_new(jobs: List[Job], is_seen: Callable[[str], bool]) -> List[Job]:
     batch: Set[str] = set()
     new_jobs: List[Job] = []
-
     for job in jobs:
         key = job.unique_key
-        if key in seen or key in batch:
+        if key in batch or is_seen(key):
             continue
         batch.add(key)
         new_jobs.append(job)
+    return new_jobs
+
+
+def _deduplicate_json(jobs: List[Job]) -> List[Job]:
+    data = _load_seen()
+    data = _cleanup(data)
+
+    seen: Set[str] = set(data["jobs"].keys())
+    new_jobs = _filter_new(jobs, seen.__contains__)
 
     today = datetime.now().strftime("%Y-%m-%d")
     for job in new_jobs:
@@ -64,6 +77,52 @@ def deduplicate(jobs: List[Job]) -> List[Job]:
             "title": job.title, "company": job.company, "date": today,
         }
     _save_seen(data)
+    return new_jobs
+
+
+def _deduplicate_sqlite(jobs: List[Job]) -> List[Job]:
+    from seen_sqlite import SeenStore
+
+    with SeenStore(config.SEEN_DB_FILE) as store:
+        imported = store.import_json(config.SEEN_JOBS_FILE)
+        if imported:
+            logger.info(f"📦 从 {config.SEEN_JOBS_FILE} 导入 {imported} 条记录到 {config.SEEN_DB_FILE}")
+
+        cutoff = (datetime.now() - timedelta(days=config.SEEN_DAYS)).strftime("%Y-%m-%d")
+        removed = store.expire(cutoff)
+        if removed > 0:
+            logger.info(f"🧹 清理 {removed} 条旧记录")
+
+        seen = store.seen_keys(job.unique_key for job in jobs)
+        new_jobs = _filter_new(jobs, seen.__contains__)
+
+        today = datetime.now().strftime("%Y-%m-%d")
+        store.add_many((job.unique_key, job.title, job.company, today) for job in new_jobs)
+    return new_jobs
+
+
+def _deduplicate_bloom(jobs: List[Job]) -> List[Job]:
+    import seen_bloom
+
+    today = date.today().toordinal()
+    store = seen_bloom.open_store(
+        config.BLOOM_FILE, config.SEEN_JOBS_FILE, config.SEEN_DAYS,
+        config.BLOOM_KEYS_PER_DAY, config.BLOOM_FP_RATE, today)
+
+    new_jobs = _filter_new(jobs, store.contains)
+    for job in new_jobs:
+        store.add(job.unique_key, today)
+    store.save(config.BLOOM_FILE)
+    return new_jobs
+
+
+def deduplicate(jobs: List[Job]) -> List[Job]:
+    if config.DEDUP_BACKEND == "bloom":
+        new_jobs = _deduplicate_bloom(jobs)
+    elif config.DEDUP_BACKEND == "json":
+        new_jobs = _deduplicate_json(jobs)
+    else:
+        new_jobs = _deduplicate_sqlite(jobs)
 
     logger.info(f"📊 去重: {len(jobs)} → {len(new_jobs)} 新职位")
     return new_jobs
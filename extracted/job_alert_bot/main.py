@@ -15,7 +15,7 @@ from datetime import datetime
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 import config
-from scrapers import fetch_all_jobs
+from scrapers import fetch_all_jobs, top_jobs
 from dedup import deduplicate
 from emailer import send_email
 
@@ -58,9 +58,8 @@ def main():
     else:
         new_jobs = deduplicate(all_jobs)
 
-    # 3. 截取
-    if len(new_jobs) > config.MAX_DAILY_JOBS:
-        new_jobs = new_jobs[:config.MAX_DAILY_JOBS]
+    # 3. 截取（按匹配分数取前 N 个）
+    new_jobs = top_jobs(new_jobs, config.MAX_DAILY_JOBS)
 
     stats = {
         "sources": len(set(j.source for j in all_jobs)),
@@ -13,6 +13,7 @@ import requests
 import logging
 import time
 import re
+import heapq
 import json
 import xml.etree.ElementTree as ET
 from datetime import datetime
@@ -661,8 +662,10 @@ def fetch_all_jobs() -> List[Job]:
     if filtered_count > 0:
         logger.info(f"\n🚫 硬性过滤掉: {filtered_count} 个（无AI提及或经验>5年）")
 
-    # 按匹配分数排序
-    all_jobs.sort(key=lambda j: j.match_score, reverse=True)
-
     logger.info(f"\n🎯 5个来源总计: {len(all_jobs)} 个（未去重）")
     return all_jobs
+
+
+def top_jobs(jobs: List[Job], k: int) -> List[Job]:
+    """按匹配分数取前 k 个（有界堆 O(n log k)，同分保持原顺序），代替全量排序后切片"""
+    return heapq.nlargest(k, jobs, key=lambda j: j.match_score)
@@ -0,0 +1,165 @@
+"""
+seen_bloom.py - 按天分桶的 Bloom filter 去重存储
+
+每天一个 Bloom filter，SEEN_DAYS 个桶组成环形数组（槽位 = 日期序号 % 天数）。
+写入新的一天时直接清空该槽位里最旧的那天，过期是 O(1)，不需要重写历史。
+只回答"这个 key 是否见过"，不保存标题/公司；误判只会导致少推送，不会重复推送。
+
+查询要检查所有桶，总误判率 ≈ 桶数 × 单桶误判率，所以单桶按 fp_rate / days 配置。
+
+文件格式（小端）：
+    头部:   magic "JABF" | version u8 | days u16 | capacity u32 | m_bits u32 | k u8
+    每个桶: 日期序号 u32 | 写入数 u32 | m_bits/8 字节位图
+"""
+
+import os
+import math
+import json
+import struct
+import hashlib
+import logging
+from datetime import date, datetime
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"JABF"
+VERSION = 1
+_HEADER = struct.Struct("<4sBHIIB")
+_BUCKET = struct.Struct("<II")
+
+
+def bloom_params(capacity: int, fp_rate: float) -> tuple:
+    """容量 + 误判率 → (位数 m, 哈希个数 k)"""
+    m = math.ceil(-capacity * math.log(fp_rate) / (math.log(2) ** 2))
+    m = (m + 7) // 8 * 8
+    k = max(1, round(m / capacity * math.log(2)))
+    return m, k
+
+
+class BloomBuckets:
+    def __init__(self, days: int, capacity: int, m_bits: int, k: int):
+        self.days = days
+        self.capacity = capacity
+        self.m_bits = m_bits
+        self.k = k
+        self.ordinals = [0] * days          # 每个槽位当前存的是哪一天（0 = 空）
+        self.counts = [0] * days
+        self.bits = [bytearray(m_bits // 8) for _ in range(days)]
+
+    @classmethod
+    def create(cls, days: int, capacity: int, fp_rate: float) -> "BloomBuckets":
+        m, k = bloom_params(capacity, fp_rate / days)
+        return cls(days, capacity, m, k)
+
+    # ---------- 查询 / 写入 ----------
+
+    def _positions(self, key: str) -> list:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.m_bits for i in range(self.k)]
+
+    def contains(self, key: str) -> bool:
+        positions = self._positions(key)
+        for ordinal, bits in zip(self.ordinals, self.bits):
+            if ordinal and all(bits[p >> 3] & (1 << (p & 7)) for p in positions):
+                return True
+        return False
+
+    def add(self, key: str, day: int):
+        slot = day % self.days
+        if self.ordinals[slot] != day:
+            self._reset(slot)
+            self.ordinals[slot] = day
+        bits = self.bits[slot]
+        for p in self._positions(key):
+            bits[p >> 3] |= 1 << (p & 7)
+        self.counts[slot] += 1
+        if self.counts[slot] == self.capacity + 1:
+            logger.warning(f"⚠️ Bloom 桶 {date.fromordinal(day)} 超出容量 {self.capacity}，误判率会升高")
+
+    # ---------- 过期 ----------
+
+    def _reset(self, slot: int):
+        self.ordinals[slot] = 0
+        self.counts[slot] = 0
+        self.bits[slot] = bytearray(self.m_bits // 8)
+
+    def drop_expired(self, today: int) -> int:
+        """清空窗口外的桶（很久没运行时才会有），返回清掉的桶数"""
+        dropped = 0
+        for slot, ordinal in enumerate(self.ordinals):
+            if ordinal and ordinal <= today - self.days:
+                self._reset(slot)
+                dropped += 1
+        return dropped
+
+    def __len__(self):
+        return sum(self.counts)
+
+    # ---------- 读写文件 ----------
+
+    def save(self, path: str):
+        """先写临时文件再替换，中途崩溃不会留下半个文件"""
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, VERSION, self.days, self.capacity, self.m_bits, self.k))
+            for ordinal, count, bits in zip(self.ordinals, self.counts, self.bits):
+                f.write(_BUCKET.pack(ordinal, count))
+                f.write(bits)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BloomBuckets":
+        with open(path, "rb") as f:
+            magic, version, days, capacity, m_bits, k = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} 不是 Bloom 去重文件")
+            store = cls(days, capacity, m_bits, k)
+            nbytes = m_bits // 8
+            for slot in range(days):
+                store.ordinals[slot], store.counts[slot] = _BUCKET.unpack(f.read(_BUCKET.size))
+                bits = f.read(nbytes)
+                if len(bits) != nbytes:
+                    raise ValueError(f"{path} 文件不完整")
+                store.bits[slot] = bytearray(bits)
+        return store
+
+
+def import_json(store: BloomBuckets, json_path: str, today: int) -> int:
+    """把旧的 seen_jobs.json 导入 Bloom 桶（按原记录日期），返回导入条数"""
+    with open(json_path, "r", encoding="utf-8") as f:
+        jobs = json.load(f).get("jobs", {})
+    imported = 0
+    for key, info in jobs.items():
+        try:
+            day = datetime.strptime(info.get("date", ""), "%Y-%m-%d").date().toordinal()
+        except ValueError:
+            day = today
+        if today - store.days < day <= today:
+            store.add(key, day)
+            imported += 1
+    return imported
+
+
+def open_store(path: str, json_path: str, days: int, capacity: int, fp_rate: float,
+               today: int) -> BloomBuckets:
+    """读取 Bloom 文件；首次使用时从旧 JSON 迁移"""
+    if os.path.exists(path):
+        store = BloomBuckets.load(path)
+        if (store.days, store.capacity) != (days, capacity):
+            logger.warning(f"⚠️ {path} 参数与 config 不同，沿用文件参数 "
+                           f"(days={store.days}, capacity={store.capacity})")
+        dropped = store.drop_expired(today)
+        if dropped:
+            logger.info(f"🧹 清理 {dropped} 个过期 Bloom 桶")
+        return store
+
+    store = BloomBuckets.create(days, capacity, fp_rate)
+    if os.path.exists(json_path):
+        try:
+            imported = import_json(store, json_path, today)
+            logger.info(f"📦 从 {json_path} 导入 {imported} 条记录到 {path}")
+        except Exception as e:
+            logger.error(f"❌ 导入 {json_path} 失败: {e}")
+    return store
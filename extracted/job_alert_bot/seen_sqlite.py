@@ -0,0 +1,97 @@
+"""
+seen_sqlite.py - SQLite 去重存储
+
+表结构：seen(key PRIMARY KEY, title, company, date) + date 索引
+- 查询：按批 IN 查询，只读本次抓到的 key
+- 写入：一个事务内 executemany（INSERT OR IGNORE）
+- 过期：DELETE WHERE date < ?，走 date 索引，不重写历史
+- WAL 模式：写到一半崩溃不会损坏已有记录
+首次打开时自动导入旧的 seen_jobs.json。
+"""
+
+import os
+import json
+import sqlite3
+import logging
+from typing import Iterable, Set
+
+logger = logging.getLogger(__name__)
+
+LOOKUP_CHUNK = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS seen (
+    key TEXT PRIMARY KEY,
+    title TEXT,
+    company TEXT,
+    date TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_seen_date ON seen(date);
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class SeenStore:
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def seen_keys(self, keys: Iterable[str]) -> Set[str]:
+        """本批 key 中已经见过的"""
+        keys = list(set(keys))
+        found = set()
+        for i in range(0, len(keys), LOOKUP_CHUNK):
+            chunk = keys[i:i + LOOKUP_CHUNK]
+            marks = ",".join("?" * len(chunk))
+            found.update(r[0] for r in self.conn.execute(
+                f"SELECT key FROM seen WHERE key IN ({marks})", chunk))
+        return found
+
+    def add_many(self, rows: Iterable[tuple]):
+        """rows: (key, title, company, date)"""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO seen (key, title, company, date) VALUES (?, ?, ?, ?)", rows)
+
+    def expire(self, cutoff: str) -> int:
+        """删除 date < cutoff 的记录，返回删除条数"""
+        with self.conn:
+            return self.conn.execute("DELETE FROM seen WHERE date < ?", (cutoff,)).rowcount
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+
+    def import_json(self, json_path: str) -> int:
+        """导入旧的 seen_jobs.json（只导入一次），返回导入条数"""
+        if self.conn.execute("SELECT 1 FROM meta WHERE name = 'json_imported'").fetchone():
+            return 0
+        if not os.path.exists(json_path):
+            return 0
+        try:
+            with open(json_path, "r", encoding="utf-8") as f:
+                jobs = json.load(f).get("jobs", {})
+            rows = [(k, v.get("title", ""), v.get("company", ""), v.get("date", "")) for k, v in jobs.items()]
+        except (OSError, ValueError, AttributeError) as e:
+            # 旧文件损坏：记日志并标记已导入，否则每次运行都会在这里崩溃
+            logger.error(f"❌ 导入 {json_path} 失败: {e}")
+            rows = []
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO seen (key, title, company, date) VALUES (?, ?, ?, ?)", rows)
+            self.conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('json_imported', ?)",
+                              (json_path,))
+        return len(rows)
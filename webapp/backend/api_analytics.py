@@ -1,5 +1,6 @@
 from flask import Blueprint, jsonify
 from service_learning import analyze_and_retrain, get_insights
+from service_score_cache import cache_stats
 
 analytics_bp = Blueprint("analytics", __name__)
 
@@ -16,3 +17,9 @@ def insights():
     """Get keyword performance insights."""
     result = get_insights()
     return jsonify(result)
+
+
+@analytics_bp.route("/api/analytics/score-cache", methods=["GET"])
+def score_cache():
+    """Score cache hit/miss counters for this worker."""
+    return jsonify(cache_stats())
@@ -3,33 +3,27 @@ from flask import Blueprint, request, jsonify
 from models import db, JobApplication, ApplicationFeedback, JobRecord
 from datetime import datetime, timezone
 from service_feedback_learning import suggest_from_dismissal, suggest_from_application, save_learned_keywords
+import service_top_candidates as top_candidates
+import service_processed_keys as processed_keys
+import service_archive as archive
+import db_writer
+import service_list_filters as list_filters
+from service_serializers import application_load_options, application_dicts
 
 applications_bp = Blueprint("applications", __name__)
 
 
 @applications_bp.route("/api/applications", methods=["GET"])
 def list_applications():
-    status = request.args.get("status")
-    exclude_status = request.args.get("exclude_status")
-    query = JobApplication.query
-    if status:
-        query = query.filter_by(status=status)
-    if exclude_status:
-        query = query.filter(JobApplication.status != exclude_status)
-
-    apps = query.order_by(JobApplication.updated_at.desc()).all()
-    result = []
-    for app in apps:
-        app_dict = app.to_dict()
-        job = JobRecord.query.get(app.job_id)
-        if job:
-            app_dict["job"] = job.to_dict()
-        result.append(app_dict)
+    query = list_filters.applications_query(request.args)
 
-    return jsonify(result)
+    # Jobs, their applications and feedbacks load in batches, not per row
+    apps = query.options(*application_load_options()).order_by(JobApplication.updated_at.desc()).all()
+    return jsonify(application_dicts(apps))
 
 
 @applications_bp.route("/api/applications", methods=["POST"])
+@db_writer.short_write
 def create_application():
     data = request.get_json()
     job_id = data.get("job_id")
@@ -50,7 +44,11 @@ def create_application():
     if data.get("status") == "applied":
         app.applied_date = datetime.now(timezone.utc)
 
+    # A job acted on belongs in the hot tables again
+    archive.restore(job_id)
     db.session.add(app)
+    top_candidates.set_application_status(job_id, app.status)
+    processed_keys.refresh_job(job_id)
     db.session.commit()
 
     # Suggest keywords from feedback
@@ -69,6 +67,7 @@ def create_application():
 
 
 @applications_bp.route("/api/applications/<int:app_id>", methods=["PUT"])
+@db_writer.short_write
 def update_application(app_id):
     app = JobApplication.query.get_or_404(app_id)
     data = request.get_json()
@@ -81,6 +80,7 @@ def update_application(app_id):
         app.notes = data["notes"]
 
     app.updated_at = datetime.now(timezone.utc)
+    top_candidates.set_application_status(app.job_id, app.status)
     db.session.commit()
 
     # Suggest keywords from feedback
@@ -103,6 +103,7 @@ def update_application(app_id):
 
 
 @applications_bp.route("/api/applications/save-keywords", methods=["POST"])
+@db_writer.short_write
 def save_keywords_from_feedback():
     """Save user-confirmed keywords from feedback learning."""
     data = request.get_json()
@@ -115,15 +116,19 @@ def save_keywords_from_feedback():
 
 
 @applications_bp.route("/api/applications/<int:app_id>", methods=["DELETE"])
+@db_writer.short_write
 def delete_application(app_id):
     app = JobApplication.query.get_or_404(app_id)
     ApplicationFeedback.query.filter_by(application_id=app_id).delete()
+    top_candidates.set_application_status(app.job_id, None)
     db.session.delete(app)
+    processed_keys.refresh_job(app.job_id)
     db.session.commit()
     return jsonify({"message": "Deleted"})
 
 
 @applications_bp.route("/api/applications/<int:app_id>/feedback", methods=["POST"])
+@db_writer.short_write
 def add_feedback(app_id):
     app = JobApplication.query.get_or_404(app_id)
     data = request.get_json()
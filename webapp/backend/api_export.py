@@ -0,0 +1,144 @@
+"""Streaming exports of jobs and applications.
+
+    GET /api/export/jobs?min_score=5&format=csv
+    GET /api/export/applications?status=applied&gzip=true
+
+Rows are read EXPORT_BATCH at a time (yield_per: a server-side cursor on
+PostgreSQL) and written by a generator response as they are read, so memory
+stays flat for any table size and there is no paging or count. The filters
+are those of GET /api/jobs and GET /api/applications (service_list_filters).
+format= is ndjson (default) or csv; gzip=true compresses on the fly into a
+.gz download.
+
+A job row is the projection of service_job_fields (every EXPORT_FIELDS
+field, or those in ?fields=). An application row is as GET /api/applications
+returns it; in CSV, its feedbacks are a JSON cell and its job is
+reduced to job_* columns.
+"""
+
+import io
+import csv
+import json
+import zlib
+from itertools import islice
+from datetime import datetime, timezone
+
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+
+from models import JobRecord, JobApplication
+import service_job_fields as job_fields
+import service_list_filters as list_filters
+from service_serializers import application_load_options, application_dicts
+
+export_bp = Blueprint("export", __name__)
+
+EXPORT_BATCH = 1000  # rows per fetch and per written chunk
+MIMETYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+APPLICATION_FIELDS = ("id", "job_id", "status", "applied_date", "notes", "created_at", "updated_at",
+                      "feedbacks")
+APPLICATION_JOB_FIELDS = ("title", "company", "source", "url", "match_score")
+
+
+def _batches(rows):
+    rows = iter(rows)
+    while batch := list(islice(rows, EXPORT_BATCH)):
+        yield batch
+
+
+def _cell(value):
+    # csv writes None as an empty cell
+    return json.dumps(value) if isinstance(value, (list, dict)) else value
+
+
+def _encode(batches, fmt: str, header):
+    """Byte chunks of NDJSON lines, or of CSV rows under `header`."""
+    if fmt == "ndjson":
+        for batch in batches:
+            yield "".join(json.dumps(row, separators=(",", ":")) + "\n" for row in batch).encode("utf-8")
+        return
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=header, extrasaction="ignore")
+    writer.writeheader()
+    for batch in batches:
+        writer.writerows({name: _cell(value) for name, value in row.items()} for row in batch)
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():  # no rows: the header alone
+        yield buf.getvalue().encode("utf-8")
+
+
+def _gzip(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # 31: gzip framing
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _export_format():
+    fmt = request.args.get("format", "ndjson").lower()
+    if fmt not in MIMETYPES:
+        raise ValueError(f"Unknown format: {fmt} (available: {', '.join(MIMETYPES)})")
+    return fmt
+
+
+def _stream(batches, fmt: str, header, name: str) -> Response:
+    chunks = _encode(batches, fmt, header)
+    filename = f"{name}-{datetime.now(timezone.utc):%Y%m%d}.{fmt}"
+    mimetype = MIMETYPES[fmt]
+    gzip_arg = request.args.get("gzip")
+    if gzip_arg and gzip_arg.lower() == "true":
+        chunks = _gzip(chunks)
+        filename += ".gz"
+        mimetype = "application/gzip"
+    # stream_with_context keeps the request (and its db session) open while
+    # the generator runs
+    return Response(stream_with_context(chunks), mimetype=mimetype,
+                    headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+
+@export_bp.route("/api/export/jobs", methods=["GET"])
+def export_jobs():
+    """Every job matching the GET /api/jobs filters, in id order."""
+    try:
+        fmt = _export_format()
+        fields = job_fields.parse(request.args.get("fields"), default=job_fields.EXPORT_FIELDS,
+                                  available=job_fields.EXPORT_FIELDS)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    query = list_filters.jobs_query(request.args).with_entities(
+        *job_fields.columns(fields, job_fields.EXPORT_FIELDS)).order_by(JobRecord.id)
+
+    def rows():
+        for batch in _batches(query.yield_per(EXPORT_BATCH)):
+            yield [job_fields.to_dict(row, fields, job_fields.EXPORT_FIELDS) for row in batch]
+
+    return _stream(rows(), fmt, fields, "jobs")
+
+
+@export_bp.route("/api/export/applications", methods=["GET"])
+def export_applications():
+    """Every application matching the GET /api/applications filters, with
+    its job, in id order."""
+    try:
+        fmt = _export_format()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    query = list_filters.applications_query(request.args).options(
+        *application_load_options()).order_by(JobApplication.id)
+    header = APPLICATION_FIELDS + tuple(f"job_{name}" for name in APPLICATION_JOB_FIELDS)
+
+    def flat(app):
+        job = app.pop("job", None) or {}
+        app.update((f"job_{name}", job.get(name)) for name in APPLICATION_JOB_FIELDS)
+        return app
+
+    def rows():
+        # Feedbacks and jobs are loaded per batch (selectinload works with yield_per)
+        for batch in _batches(query.yield_per(EXPORT_BATCH)):
+            apps = application_dicts(batch)
+            yield apps if fmt == "ndjson" else [flat(app) for app in apps]
+
+    return _stream(rows(), fmt, header, "applications")
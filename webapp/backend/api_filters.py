@@ -3,6 +3,8 @@
 import json
 from flask import Blueprint, request, jsonify
 from models import db, FilterSettings
+from db_helpers import upsert
+import db_writer
 from datetime import datetime, timezone
 
 filters_bp = Blueprint("filters", __name__)
@@ -39,6 +41,7 @@ DEFAULTS = {
     "title_exclude_other": [
         "IT ", "IT analyst", "summer",
         "job guarantee", "bootcamp", "training programme", "course",
+        "temp ", "mandarin speaker", "cantonese speaker",
     ],
     "contract_keywords": [
         "contract", "contractor", "freelance", "freelancer",
@@ -46,6 +49,7 @@ DEFAULTS = {
         "FTC", "ftc", "month ftc", "month contract",
         "6 month", "12 month", "3 month", "9 month",
         "maternity cover", "paternity cover",
+        "interim", "inside ir35", "outside ir35", "day rate", "ir35",
     ],
     "language_exclude": [
         "french", "german", "spanish", "italian", "portuguese",
@@ -70,22 +74,25 @@ def _get_setting(key: str):
 
 def _set_setting(key: str, value):
     """Set a filter setting value."""
-    record = FilterSettings.query.filter_by(key=key).first()
-    json_val = json.dumps(value)
-    if record:
-        record.value = json_val
-        record.updated_at = datetime.now(timezone.utc)
-    else:
-        record = FilterSettings(key=key, value=json_val)
-        db.session.add(record)
+    upsert(FilterSettings.__table__,
+           [{"key": key, "value": json.dumps(value), "updated_at": datetime.now(timezone.utc)}],
+           ["key"], ["value", "updated_at"])
     db.session.commit()
 
 
 def get_all_filters() -> dict:
     """Get all filter settings (used by scraper/scorer)."""
+    stored = {r.key: r for r in FilterSettings.query.all()}
     result = {}
-    for key in DEFAULTS:
-        result[key] = _get_setting(key)
+    for key, default in DEFAULTS.items():
+        record = stored.get(key)
+        if record is None:
+            result[key] = default
+            continue
+        try:
+            result[key] = json.loads(record.value)
+        except (json.JSONDecodeError, TypeError):
+            result[key] = record.value
     return result
 
 
@@ -96,6 +103,7 @@ def list_filters():
 
 
 @filters_bp.route("/api/filters", methods=["PUT"])
+@db_writer.short_write
 def update_filters():
     """Update one or more filter settings."""
     data = request.get_json()
@@ -108,6 +116,7 @@ def update_filters():
 
 
 @filters_bp.route("/api/filters/reset", methods=["POST"])
+@db_writer.short_write
 def reset_filters():
     """Reset all filters to defaults."""
     FilterSettings.query.delete()
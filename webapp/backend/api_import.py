@@ -0,0 +1,38 @@
+"""Bulk import endpoint (see service_import)."""
+
+import sys
+
+from flask import Blueprint, current_app, request, jsonify
+
+import service_import as importer
+
+import_bp = Blueprint("import", __name__)
+
+
+def _flag(name: str) -> bool:
+    return (request.args.get(name) or "").lower() == "true"
+
+
+def _optional_flag(name: str) -> bool | None:
+    value = (request.args.get(name) or "").lower()
+    return None if value not in ("true", "false") else value == "true"
+
+
+@import_bp.route("/api/import/jobs", methods=["POST"])
+def import_jobs():
+    """Import the request body, NDJSON (default) or CSV per ?format=, gzipped
+    with ?gzip=true (as GET /api/export/jobs writes them). ?defer_index=true
+    skips the index phase, =false runs it whatever the size; by default it is
+    skipped for large imports (see import_records). The body is read in
+    batches, so it is capped by IMPORT_MAX_BYTES, not MAX_CONTENT_LENGTH."""
+    fmt = request.args.get("format", "ndjson").lower()
+    if fmt not in importer.FORMATS:
+        return jsonify({"error": f"Unknown format: {fmt} (available: {', '.join(importer.FORMATS)})"}), 400
+    # None here would fall back to MAX_CONTENT_LENGTH
+    request.max_content_length = current_app.config.get("IMPORT_MAX_BYTES") or sys.maxsize
+    records = importer.read_stream(request.stream, fmt, compressed=_flag("gzip"))
+    try:
+        result = importer.import_records(records, f"import:{fmt}", defer_index=_optional_flag("defer_index"))
+    except (ValueError, UnicodeDecodeError, OSError) as e:
+        return jsonify({"error": f"Unreadable {fmt} body: {e}"}), 400
+    return jsonify(result)
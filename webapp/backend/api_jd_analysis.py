@@ -3,6 +3,7 @@
 from flask import Blueprint, request, jsonify
 from models import db, UserKeyword
 from service_jd_analysis import analyze_job_description
+import db_writer
 
 jd_bp = Blueprint("jd", __name__)
 
@@ -22,6 +23,7 @@ def analyze():
 
 
 @jd_bp.route("/api/jd/apply", methods=["POST"])
+@db_writer.short_write
 def apply_suggestions():
     data = request.get_json()
     add_boost = data.get("add_boost", [])
@@ -1,12 +1,23 @@
-from flask import Blueprint, request, jsonify
-from models import db, JobRecord, JobApplication, UserKeyword
+from flask import Blueprint, request, jsonify, abort
+from sqlalchemy import bindparam
+from models import db, JobRecord, JobSource, UserKeyword, SearchSession
 from service_scraper import fetch_and_store_jobs
-from service_scoring import score_job
-from sqlalchemy import func, and_, or_
+from service_score_cache import ScoreCache
+import service_top_candidates as top_candidates
+import service_pagination as pagination
+import service_job_fields as job_fields
+import service_list_filters as list_filters
+import service_archive as archive
+import db_writer
+from service_similarity import ResumeMatcher, term_counts, job_text, index_jobs, job_vectors
+import service_similar_jobs as similar_index
 import json
 
 jobs_bp = Blueprint("jobs", __name__)
 
+# Request args that page through a result rather than filter it
+PAGING_ARGS = {"sort", "cursor", "page", "per_page", "total", "fields"}
+
 
 @jobs_bp.route("/api/jobs/search", methods=["POST"])
 def search_jobs():
@@ -21,83 +32,126 @@ def search_jobs():
         return jsonify({"error": str(e)}), 500
 
 
+@jobs_bp.route("/api/jobs/search/<int:session_id>", methods=["GET"])
+def get_search_session(session_id):
+    """A search's progress: total_results grows as each chunk is stored,
+    status goes from "storing" to "complete" (or "partial" if a chunk failed)."""
+    session = SearchSession.query.get_or_404(session_id)
+    return jsonify(session.to_dict())
+
+
 @jobs_bp.route("/api/jobs", methods=["GET"])
 def list_jobs():
-    """List jobs with optional filters."""
-    # Always exclude hard-filtered jobs (score = -99: contract, wrong title, excluded keyword in title, etc.)
-    query = JobRecord.query.filter(JobRecord.match_score > -99)
-
+    """List jobs with optional filters.
+
+    Paged by ?page=, or by ?cursor= (keyset pages that stay stable and cost
+    the same however deep; see service_pagination). Rows are summaries,
+    or the columns named in ?fields= (service_job_fields); GET /api/jobs/<id>
+    has the full record.
+    """
+    query = list_filters.jobs_query(request.args)
     min_score = request.args.get("min_score", type=float)
-    if min_score is not None:
-        query = query.filter(JobRecord.match_score >= min_score)
-
     source = request.args.get("source")
-    if source:
-        query = query.filter(JobRecord.source == source)
-
     experience_ok = request.args.get("experience_ok")
-    if experience_ok is not None:
-        query = query.filter(JobRecord.experience_ok == (experience_ok.lower() == "true"))
-
     session_id = request.args.get("session_id", type=int)
-    if session_id:
-        query = query.filter(JobRecord.search_session_id == session_id)
-
-    # Hide jobs marked as "not_interested"
+    company = request.args.get("company")
     hide_dismissed = request.args.get("hide_dismissed")
-    if hide_dismissed and hide_dismissed.lower() == "true":
-        dismissed_job_ids = db.session.query(JobApplication.job_id).filter(
-            JobApplication.status == "not_interested"
-        ).subquery()
-        query = query.filter(~JobRecord.id.in_(dismissed_job_ids))
-
-    # Hide ALL jobs that have been processed (any application status),
-    # including cross-source duplicates of processed jobs already in the DB
     hide_processed = request.args.get("hide_processed")
-    if hide_processed and hide_processed.lower() == "true":
-        # Step 1: exclude jobs with a direct application record
-        processed_job_ids_sq = db.session.query(JobApplication.job_id)
-        query = query.filter(~JobRecord.id.in_(processed_job_ids_sq))
-
-        # Step 2: also exclude same-title+company duplicates from other sources
-        # (handles pre-existing duplicates before the insert-level dedup was added)
-        processed_tc = db.session.query(
-            func.lower(JobRecord.title),
-            func.lower(JobRecord.company)
-        ).join(JobApplication, JobRecord.id == JobApplication.job_id).all()
-
-        if processed_tc:
-            conditions = [
-                and_(
-                    func.lower(JobRecord.title) == tc[0],
-                    func.lower(JobRecord.company) == tc[1]
-                )
-                for tc in processed_tc
-            ]
-            query = query.filter(~or_(*conditions))
-
-    sort = request.args.get("sort", "score")
-    if sort == "date":
-        query = query.order_by(JobRecord.first_seen_at.desc())
-    else:
-        query = query.order_by(JobRecord.match_score.desc())
 
+    sort = "date" if request.args.get("sort") == "date" else "score"
+    cursor = request.args.get("cursor")
     page = request.args.get("page", 1, type=int)
     per_page = request.args.get("per_page", 50, type=int)
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+    hide_processed_on = bool(hide_processed and hide_processed.lower() == "true")
+    hide_dismissed_on = bool(hide_dismissed and hide_dismissed.lower() == "true")
 
+    # Rows carry only the requested columns (service_job_fields); the count
+    # runs on the unprojected query
+    try:
+        fields = job_fields.parse(request.args.get("fields"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    columns = job_fields.columns(fields)
+    count_query = query
+    query = query.with_entities(*columns)
+
+    # Totals are cached per filter combination (service_pagination); total=exact
+    # recounts, total=none skips the count
+    signature = json.dumps(sorted((k, v) for k, v in request.args.items() if k not in PAGING_ARGS))
+    total_mode = request.args.get("total")
+
+    def total():
+        if total_mode == "none":
+            return None
+        return pagination.cached_total(signature, count_query, exact=total_mode == "exact")
+
+    # Default view (score order, first page): serve from the precomputed top set
+    top_set_ok = sort == "score" and not session_id and not company \
+        and experience_ok is None and not hide_processed_on
+
+    # Keyset pages: ?cursor= for the first page, then each response's next_cursor
+    if cursor is not None:
+        per_page = per_page if per_page > 0 else 50
+        jobs = None
+        if not cursor and top_set_ok:
+            jobs = top_candidates.first_page(per_page + 1, min_score=min_score, source=source,
+                                             hide_dismissed=hide_dismissed_on, columns=columns)
+        if jobs is None:
+            try:
+                jobs = pagination.fetch_page(query, sort, cursor or None, per_page + 1)
+            except pagination.InvalidCursor as e:
+                return jsonify({"error": str(e)}), 400
+        more = len(jobs) > per_page
+        jobs = jobs[:per_page]
+        return jsonify({
+            "jobs": [job_fields.to_dict(row, fields) for row in jobs],
+            "next_cursor": pagination.encode_cursor(sort, jobs[-1]) if more else None,
+            "total": total(),
+        })
+
+    if page == 1 and per_page > 0 and top_set_ok:
+        top = top_candidates.first_page(per_page, min_score=min_score, source=source,
+                                        hide_dismissed=hide_dismissed_on, columns=columns)
+        if top is not None:
+            count = total()
+            return jsonify({
+                "jobs": [job_fields.to_dict(row, fields) for row in top],
+                "total": count,
+                "page": 1,
+                "pages": -(-count // per_page) if count is not None else None,
+            })
+
+    paged = pagination.order_by(query, sort).paginate(page=page, per_page=per_page, error_out=False, count=False)
+    count = total()
     return jsonify({
-        "jobs": [job.to_dict() for job in pagination.items],
-        "total": pagination.total,
-        "page": pagination.page,
-        "pages": pagination.pages,
+        "jobs": [job_fields.to_dict(row, fields) for row in paged.items],
+        "total": count,
+        "page": paged.page,
+        "pages": -(-count // paged.per_page) if count is not None else None,
     })
 
 
 @jobs_bp.route("/api/jobs/<int:job_id>", methods=["GET"])
 def get_job(job_id):
+    job = db.session.get(JobRecord, job_id)
+    archived = job is None
+    if archived:
+        # Moved to cold storage by the retention policy (service_archive)
+        job = archive.archived_record(job_id)
+        if job is None:
+            abort(404)
+    sources = JobSource.query.filter_by(job_record_id=job.merged_into_id or job.id).order_by(JobSource.id).all()
+    return jsonify({**job.to_dict(), "sources": [s.to_dict() for s in sources], "archived": archived})
+
+
+@jobs_bp.route("/api/jobs/<int:job_id>/similar", methods=["GET"])
+def get_similar_jobs(job_id):
+    """Jobs with similar title/description ("more like this"), via the LSH index."""
     job = JobRecord.query.get_or_404(job_id)
-    return jsonify(job.to_dict())
+    limit = min(request.args.get("limit", 10, type=int), 50)
+    tokens = term_counts(job_text({"title": job.title, "description": job.description})).keys()
+    matches = similar_index.similar_job_records(job, tokens, limit)
+    return jsonify([{**other.to_dict(), "similarity": sim} for other, sim in matches])
 
 
 @jobs_bp.route("/api/jobs/rescore", methods=["POST"])
@@ -109,15 +163,55 @@ def rescore_jobs():
     exclude_kws = [{"keyword": kw.keyword, "weight": kw.weight}
                    for kw in keywords if kw.category == "exclude"]
 
-    jobs = JobRecord.query.all()
-    updated = 0
-    for job in jobs:
-        job_data = {"title": job.title, "description": job.description or ""}
-        scored = score_job(job_data, boost_kws, exclude_kws)
-        job.match_score = scored["match_score"]
-        job.match_tags = scored["match_tags"]
-        job.experience_ok = scored["experience_ok"]
-        updated += 1
-
-    db.session.commit()
-    return jsonify({"updated": updated})
+    cache = ScoreCache(boost_kws, exclude_kws)
+    jobs = db.session.query(
+        JobRecord.id, JobRecord.title, JobRecord.description, JobRecord.salary,
+        JobRecord.match_score, JobRecord.match_tags, JobRecord.experience_ok,
+    ).all()
+    job_dicts = [{"title": job.title or "", "description": job.description or "",
+                  "salary": job.salary or ""} for job in jobs]
+    cache.preload(job_dicts)
+
+    # Resume similarity: backfill vectors for jobs stored before they were cached
+    matcher = ResumeMatcher.load()
+    vectors = job_vectors()
+    missing = [(job.id, term_counts(job_text(jd))) for job, jd in zip(jobs, job_dicts)
+               if job.id not in vectors]
+    vectors.update(missing)
+    indexed = similar_index.indexed_job_ids()
+    unindexed = [(job.id, vectors[job.id].keys()) for job in jobs if job.id not in indexed]
+
+    # Score outside any write transaction; db_writer applies the changes
+    updates = []
+    for job, job_data in zip(jobs, job_dicts):
+        scored = cache.score(job_data, matcher.similarity(vectors[job.id]))
+        if (job.match_score, job.match_tags, job.experience_ok) != \
+           (scored["match_score"], scored["match_tags"], scored["experience_ok"]):
+            updates.append({"_id": job.id, "_match_score": scored["match_score"],
+                            "_match_tags": scored["match_tags"], "_experience_ok": scored["experience_ok"]})
+
+    def store():
+        index_jobs(missing)
+        similar_index.add_to_index(unindexed)
+        if updates:
+            table = JobRecord.__table__
+            db.session.execute(table.update().where(table.c.id == bindparam("_id")).values(
+                match_score=bindparam("_match_score"), match_tags=bindparam("_match_tags"),
+                experience_ok=bindparam("_experience_ok")), updates)
+        cache.flush()
+        cache.prune_stale()
+        top_candidates.rebuild()
+
+    db_writer.run(store)
+    return jsonify({"updated": len(updates), "total": len(jobs), **cache.stats()})
+
+
+@jobs_bp.route("/api/jobs/archive", methods=["POST"])
+def archive_old_jobs():
+    """Move jobs older than the retention period with no application to cold
+    storage (body: {"days": N}, default JOB_RETENTION_DAYS)."""
+    data = request.get_json(silent=True) or {}
+    days = data.get("days", archive.RETENTION_DAYS)
+    if not isinstance(days, int) or days < 1:
+        return jsonify({"error": "days must be a positive integer"}), 400
+    return jsonify(archive.archive_jobs(days))
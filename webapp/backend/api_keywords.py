@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify
 from models import db, UserKeyword
+import db_writer
 from datetime import datetime, timezone
 
 keywords_bp = Blueprint("keywords", __name__)
@@ -12,6 +13,7 @@ def get_keywords():
 
 
 @keywords_bp.route("/api/keywords", methods=["POST"])
+@db_writer.short_write
 def add_keyword():
     data = request.get_json()
     if not data or not data.get("keyword"):
@@ -30,6 +32,7 @@ def add_keyword():
 
 
 @keywords_bp.route("/api/keywords/<int:keyword_id>", methods=["PUT"])
+@db_writer.short_write
 def update_keyword(keyword_id):
     kw = UserKeyword.query.get_or_404(keyword_id)
     data = request.get_json()
@@ -46,6 +49,7 @@ def update_keyword(keyword_id):
 
 
 @keywords_bp.route("/api/keywords/<int:keyword_id>", methods=["DELETE"])
+@db_writer.short_write
 def delete_keyword(keyword_id):
     kw = UserKeyword.query.get_or_404(keyword_id)
     db.session.delete(kw)
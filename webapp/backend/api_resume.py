@@ -3,6 +3,8 @@ from flask import Blueprint, request, jsonify, current_app
 from werkzeug.utils import secure_filename
 from models import db, UserKeyword, ResumeRecord
 from service_resume import extract_text_from_pdf, extract_keywords
+from service_similarity import save_resume_vector
+from db_helpers import begin_write
 from datetime import datetime, timezone
 
 resume_bp = Blueprint("resume", __name__)
@@ -43,6 +45,10 @@ def upload_resume():
         text = extract_text_from_pdf(filepath)
         keywords = extract_keywords(text)
 
+        # Parsed without touching the database; hold the write lock for the
+        # writes below only
+        begin_write()
+
         # Store extracted keywords in DB (clear previous resume keywords first)
         UserKeyword.query.filter_by(source="resume").delete()
 
@@ -66,6 +72,7 @@ def upload_resume():
             uploaded_at=datetime.now(timezone.utc),
         )
         db.session.add(record)
+        save_resume_vector(text)
         db.session.commit()
 
         return jsonify({
@@ -28,10 +28,17 @@ def create_app():
         app = Flask(__name__)
     CORS(app)
 
-    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(basedir, 'database.db')}"
+    # DATABASE_URL selects the store (PostgreSQL for several instances); SQLite file by default
+    from db_helpers import database_config
+    app.config.update(database_config(basedir))
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
     app.config["UPLOAD_FOLDER"] = os.path.join(basedir, "uploads")
     app.config["MAX_CONTENT_LENGTH"] = 16 * 1024 * 1024  # 16MB
+    # POST /api/import/jobs streams its body in batches, so it is not held to
+    # MAX_CONTENT_LENGTH; IMPORT_MAX_BYTES caps it (unset: no limit)
+    app.config["IMPORT_MAX_BYTES"] = int(os.environ.get("IMPORT_MAX_BYTES", "0")) or None
+    # service_archive segments; shared storage when several instances run
+    app.config["ARCHIVE_FOLDER"] = os.environ.get("ARCHIVE_FOLDER") or os.path.join(basedir, "archive")
 
     os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
 
@@ -44,6 +51,8 @@ def create_app():
     from api_analytics import analytics_bp
     from api_filters import filters_bp
     from api_jd_analysis import jd_bp
+    from api_export import export_bp
+    from api_import import import_bp
 
     app.register_blueprint(resume_bp)
     app.register_blueprint(keywords_bp)
@@ -52,9 +61,28 @@ def create_app():
     app.register_blueprint(analytics_bp)
     app.register_blueprint(filters_bp)
     app.register_blueprint(jd_bp)
+    app.register_blueprint(export_bp)
+    app.register_blueprint(import_bp)
+
+    import db_writer
+    db_writer.init_app(app)
 
     with app.app_context():
-        db.create_all()
+        from db_helpers import apply_sqlite_profile, startup_lock
+        apply_sqlite_profile(db.engine)
+        from migrations import ensure_current
+        from service_top_candidates import ensure_built
+        from service_dedup import ensure_indexed
+        from service_job_sources import ensure_sources
+        import service_processed_keys as processed_keys
+        # One worker at a time: the others then find the schema current
+        with startup_lock():
+            db.create_all()
+            ensure_current()
+            ensure_indexed()
+            ensure_sources()
+            ensure_built()
+            processed_keys.ensure_built()
 
     # Serve React frontend for non-API routes
     @app.route("/", defaults={"path": ""})
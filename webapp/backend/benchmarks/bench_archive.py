@@ -0,0 +1,215 @@
+"""Benchmark and check hot/cold archival (service_archive).
+
+    python -m benchmarks.bench_archive --jobs 10000
+
+Ingests --jobs synthetic jobs through fetch_and_store_jobs, backdates
+--old of them to 31-59 days ago and applies to a few of those, then
+archives with the default retention. It reports the hot row count, list
+query and dedup lookup times before and after, and the segment size
+against the rows as plain NDJSON. It then checks that:
+- every archived job is served by GET /api/jobs/<id> exactly as before;
+- re-ingesting the same postings stores nothing new;
+- the same postings under new source ids are reposts of the archived jobs;
+- an application on an archived job moves it back to the hot tables;
+- after archiving the newest jobs, new jobs get new ids (not theirs), and
+  restoring them works; the migration to such ids keeps an old table's
+  rows and starts past its archived ids.
+Exits 1 if a check fails.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import MetaData, bindparam, inspect, text
+
+from models import db, JobRecord, JobApplication, ArchivedJob, SearchSession
+import migrations
+import service_scraper as scraper
+import service_archive as archive
+from service_dedup import find_stored_keys
+import service_top_candidates as top_candidates
+from api_jobs import jobs_bp
+from api_applications import applications_bp
+from benchmarks.common import make_app, synthetic_jobs
+
+KEYWORDS = [{"keyword": "analyst", "category": "boost", "weight": 1.0}]
+
+
+def ingest(batch: list[dict]) -> dict:
+    scraper.fetch_adzuna = lambda queries, rules: [dict(j) for j in batch]
+    for name in ("fetch_linkedin", "fetch_google_jobs"):
+        setattr(scraper, name, lambda queries, rules: [])
+    scraper.fetch_x_twitter = lambda: []
+    scraper.fetch_jungle = lambda rules: []
+    return scraper.fetch_and_store_jobs(KEYWORDS)
+
+
+def _time(fn, repeat: int = 5) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def check_newest_archived(client) -> list[str]:
+    """Archive the newest hot jobs, then store new ones and restore one."""
+    failures = []
+    newest = [i for (i,) in db.session.query(JobRecord.id).filter(~JobRecord.application.has()).order_by(
+        JobRecord.id.desc()).limit(5).all()]
+    JobRecord.query.filter(JobRecord.id.in_(newest)).update(
+        {JobRecord.first_seen_at: datetime.now(timezone.utc) - timedelta(days=40)}, synchronize_session=False)
+    db.session.commit()
+    archive.archive_jobs()
+    ingest([{**j, "unique_key": f"{j['unique_key']}_new", "company": f"{j['company']} new", "salary": "",
+             "url": "", "location": "", "posted_date": ""} for j in synthetic_jobs(3, family_size=1, seed=99)])
+    fresh = [i for (i,) in db.session.query(JobRecord.id).filter(JobRecord.unique_key.like("%_new")).all()]
+    if len(fresh) != 3 or min(fresh) <= max(newest):
+        failures.append(f"new jobs got ids {sorted(fresh)} after archiving ids {sorted(newest)}")
+    resp = client.post("/api/applications", json={"job_id": max(newest), "status": "interested"})
+    if resp.status_code != 201 or db.session.get(ArchivedJob, max(newest)):
+        failures.append(f"restoring job #{max(newest)} after new inserts failed: {resp.status_code}")
+    return failures
+
+
+def check_migration() -> list[str]:
+    """Migrate a jobs table created before AUTOINCREMENT whose newest ids
+    (4-6) were archived."""
+    failures = []
+    app = make_app(sqlite_only=True)
+    with app.app_context():
+        JobRecord.__table__.drop(db.engine)
+        metadata = MetaData()
+        SearchSession.__table__.to_metadata(metadata)
+        old = JobRecord.__table__.to_metadata(metadata)
+        old.dialect_kwargs["sqlite_autoincrement"] = False
+        old.create(db.engine)
+        db.session.execute(JobRecord.__table__.insert(), [
+            {"title": f"Analyst {i}", "company": "c", "unique_key": f"old_{i}"} for i in range(3)])
+        db.session.execute(ArchivedJob.__table__.insert(), [
+            {"id": i, "segment": "s", "block_offset": 0, "block_length": 0} for i in (4, 5, 6)])
+        db.session.commit()
+        migrations.migrate()
+        db.session.add(JobRecord(title="Analyst", company="c", unique_key="after"))
+        db.session.commit()
+        ids = [i for (i,) in db.session.query(JobRecord.id).order_by(JobRecord.id).all()]
+        indexes = {i["name"] for i in inspect(db.engine).get_indexes("jobs")}
+        ddl = db.session.execute(text("SELECT sql FROM sqlite_master WHERE name = 'jobs'")).scalar()
+    if ids != [1, 2, 3, 7] or "AUTOINCREMENT" not in ddl or "ix_jobs_rank" not in indexes:
+        failures.append(f"migrated jobs: ids {ids}, indexes {sorted(indexes)}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=10000)
+    parser.add_argument("--old", type=float, default=0.8, help="fraction backdated past the retention")
+    args = parser.parse_args()
+
+    app = make_app()
+    app.config["ARCHIVE_FOLDER"] = tempfile.mkdtemp(prefix="archive-")
+    app.register_blueprint(jobs_bp)
+    app.register_blueprint(applications_bp)
+    client = app.test_client()
+    rng = random.Random(5)
+
+    # One company per posting, so each dedup_key belongs to one job
+    batch = [{
+        "title": j["title"], "company": f"{j['company']} {i}", "description": j["description"],
+        "salary": "", "url": f"https://example.com/{i}", "location": "London", "posted_date": "",
+        "source": "bench", "job_id": j["job_id"], "unique_key": j["unique_key"],
+    } for i, j in enumerate(synthetic_jobs(args.jobs, family_size=1))]
+    failures = []
+
+    with app.app_context():
+        ingest(batch)
+        ids = [i for (i,) in db.session.query(JobRecord.id).order_by(JobRecord.id).all()]
+        now = datetime.now(timezone.utc)
+        old = rng.sample(ids, int(len(ids) * args.old))
+        table = JobRecord.__table__
+        db.session.execute(table.update().where(table.c.id == bindparam("_id")).values(
+            first_seen_at=bindparam("_at")),
+            [{"_id": i, "_at": now - timedelta(days=rng.uniform(31, 59))} for i in old])
+        applied = old[:len(old) // 50]
+        db.session.execute(JobApplication.__table__.insert(), [
+            {"job_id": i, "status": "applied"} for i in applied])
+        top_candidates.rebuild()
+        db.session.commit()
+        keys = [k for (k,) in db.session.query(JobRecord.dedup_key).all()]
+
+        expected = set(old) - set(applied)
+        before = {i: client.get(f"/api/jobs/{i}").get_json() for i in sorted(expected)}
+        list_url = "/api/jobs?sort=date&per_page=50&page=20&total=exact"
+        timings = {"list": [_time(lambda: client.get(list_url))],
+                   "dedup": [_time(lambda: find_stored_keys(keys))]}
+        rows = [db.session.query(JobRecord).count()]
+
+        start = time.perf_counter()
+        result = archive.archive_jobs()
+        elapsed = time.perf_counter() - start
+        timings["list"].append(_time(lambda: client.get(list_url)))
+        timings["dedup"].append(_time(lambda: find_stored_keys(keys)))
+        rows.append(db.session.query(JobRecord).count())
+        archived = {i for (i,) in db.session.query(ArchivedJob.id).all()}
+
+    folder = app.config["ARCHIVE_FOLDER"]
+    segment_bytes = sum(os.path.getsize(os.path.join(folder, f)) for f in os.listdir(folder))
+    plain_bytes = sum(len(json.dumps({k: v for k, v in job.items() if k not in ("sources", "archived")},
+                                     separators=(",", ":"))) + 1 for job in before.values())
+    print(f"jobs: {args.jobs}, archived {result['archived']} in {result['segments']} segments "
+          f"({elapsed:.2f}s, {result['archived'] / elapsed:,.0f} jobs/s)")
+    print(f"hot rows: {rows[0]} -> {rows[1]}")
+    print(f"segments: {segment_bytes / 1024:.0f} KiB vs ~{plain_bytes / 1024:.0f} KiB as NDJSON")
+    print(f"list page 20 (date, exact total): {timings['list'][0] * 1000:.1f}ms -> "
+          f"{timings['list'][1] * 1000:.1f}ms")
+    print(f"find_stored_keys ({len(keys)} keys): {timings['dedup'][0] * 1000:.1f}ms -> "
+          f"{timings['dedup'][1] * 1000:.1f}ms")
+
+    if archived != expected:
+        failures.append(f"archived {len(archived)} jobs, expected {len(expected)}")
+    changed = [i for i, job in before.items()
+               if {**client.get(f"/api/jobs/{i}").get_json(), "archived": False} != job]
+    if changed:
+        failures.append(f"{len(changed)} archived jobs read back differently (e.g. #{changed[0]})")
+
+    with app.app_context():
+        again = ingest(batch)
+        if again["new_count"]:
+            failures.append(f"re-ingest stored {again['new_count']} archived postings again")
+        reposted = [{**j, "unique_key": f"{j['unique_key']}_repost", "job_id": f"{j['job_id']}_r"}
+                    for j in batch]
+        ingest(reposted)
+        links = dict(db.session.query(JobRecord.unique_key, JobRecord.repost_of_id).filter(
+            JobRecord.unique_key.like("%_repost")).all())
+        of_archived = sum(1 for v in links.values() if v in archived)
+        if of_archived != len(archived):
+            failures.append(f"{of_archived} reposts linked to archived jobs, expected {len(archived)}")
+
+        job_id = min(archived)
+        resp = client.post("/api/applications", json={"job_id": job_id, "status": "interested"})
+        restored = db.session.get(JobRecord, job_id)
+        if resp.status_code != 201 or restored is None or db.session.get(ArchivedJob, job_id):
+            failures.append(f"application on archived job #{job_id} did not restore it")
+        elif client.get(f"/api/jobs/{job_id}").get_json()["title"] != before[job_id]["title"]:
+            failures.append(f"restored job #{job_id} differs")
+
+        failures.extend(check_newest_archived(client))
+    failures.extend(check_migration())
+    print(f"reposts of archived jobs: {of_archived}, re-ingest new: {again['new_count']}")
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if not failures:
+        print("ok")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""Run readers and writers in parallel against one SQLite file, as gunicorn
+workers do.
+
+    python -m benchmarks.bench_concurrency --seconds 10 --processes 2
+    python -m benchmarks.bench_concurrency --no-profile     # pysqlite defaults
+
+The profile is the SQLite engine profile plus db_writer's request hook.
+
+Each role runs in its own processes, each with its own app and engine:
+- search: fetch_and_store_jobs with a synthetic source of --search-jobs
+  new jobs per run (scoring, then the db_writer store);
+- writer: PUT /api/applications/<id> status changes;
+- reader: GET /api/jobs pages.
+For each role it prints the requests served, the failures ("database is
+locked" and others) and the latency percentiles. Exits 1 if any request
+failed.
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy.exc import OperationalError
+
+from benchmarks.common import make_app, synthetic_jobs
+
+ROLES = ("search", "writer", "reader")
+
+
+def _app(db_path: str, profile: bool):
+    from api_jobs import jobs_bp
+    from api_applications import applications_bp
+    import db_writer
+    app = make_app(db_path, sqlite_profile=profile)
+    app.testing = True  # let errors propagate to the client call
+    if profile:
+        db_writer.init_app(app)
+    app.register_blueprint(jobs_bp)
+    app.register_blueprint(applications_bp)
+    return app
+
+
+def seed(db_path: str, n_jobs: int, n_applications: int):
+    from models import db, JobRecord, JobApplication
+    from service_dedup import dedup_key, company_key
+    import service_top_candidates as top_candidates
+    app = make_app(db_path)
+    rng = random.Random(5)
+    with app.app_context():
+        db.session.execute(JobRecord.__table__.insert(), [{
+            "title": j["title"], "company": j["company"], "description": j["description"],
+            "source": "seed", "unique_key": f"seed_{j['unique_key']}", "job_id": j["job_id"],
+            "dedup_key": dedup_key(j["title"], j["company"]), "company_key": company_key(j["company"]),
+            "match_score": rng.uniform(0, 20),
+        } for j in synthetic_jobs(n_jobs, family_size=1)])
+        db.session.execute(JobApplication.__table__.insert(), [
+            {"job_id": i, "status": "interested"} for i in range(1, n_applications + 1)])
+        top_candidates.rebuild()
+        db.session.commit()
+
+
+def _search(app, rng, worker: int, run: int, size: int):
+    import service_scraper as scraper
+    jobs = synthetic_jobs(size, family_size=1, seed=worker * 1000 + run)
+    batch = [{
+        "title": j["title"], "company": f"{j['company']} {worker}-{run}", "description": j["description"],
+        "salary": "", "url": "", "location": "London", "posted_date": "",
+        "source": "bench", "job_id": f"{worker}-{run}-{j['job_id']}",
+        "unique_key": f"bench_{worker}-{run}-{j['job_id']}",
+    } for j in jobs]
+    scraper.fetch_adzuna = lambda queries, rules: batch
+    for name in ("fetch_linkedin", "fetch_google_jobs"):
+        setattr(scraper, name, lambda queries, rules: [])
+    scraper.fetch_x_twitter = lambda: []
+    scraper.fetch_jungle = lambda rules: []
+    with app.app_context():
+        scraper.fetch_and_store_jobs([{"keyword": "analyst", "category": "boost", "weight": 1.0}])
+
+
+def worker(role: str, index: int, db_path: str, profile: bool, deadline: float, args, results):
+    app = _app(db_path, profile)
+    client = app.test_client()
+    rng = random.Random(index)
+    latencies, locked, failed, run = [], 0, 0, 0
+    while time.time() < deadline:
+        start = time.perf_counter()
+        try:
+            if role == "search":
+                _search(app, rng, index, run, args.search_jobs)
+                ok = True
+            elif role == "writer":
+                app_id = rng.randint(1, args.applications)
+                resp = client.put(f"/api/applications/{app_id}",
+                                  json={"status": rng.choice(["interested", "interview"])})
+                ok = resp.status_code == 200
+            else:
+                resp = client.get(f"/api/jobs?page={rng.randint(2, 20)}&per_page=50")
+                ok = resp.status_code == 200
+        except OperationalError as e:
+            ok = False
+            locked += "locked" in str(e.orig) or "busy" in str(e.orig)
+        except Exception:
+            ok = False
+        run += 1
+        if ok:
+            latencies.append(time.perf_counter() - start)
+        else:
+            failed += 1
+    results.put((role, latencies, locked, failed))
+
+
+def _ms(values, q):
+    if not values:
+        return "-"
+    values = sorted(values)
+    return f"{values[min(len(values) - 1, int(q * len(values)))] * 1000:.0f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--processes", type=int, default=2, help="writer and reader processes each")
+    parser.add_argument("--jobs", type=int, default=5000, help="jobs stored up front")
+    parser.add_argument("--applications", type=int, default=200)
+    parser.add_argument("--search-jobs", type=int, default=2000, help="new jobs per synthetic search")
+    parser.add_argument("--no-profile", action="store_true", help="skip the SQLite engine profile")
+    args = parser.parse_args()
+
+    fd, db_path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    seed(db_path, args.jobs, args.applications)
+    profile = not args.no_profile
+
+    ctx = mp.get_context("fork")
+    results = ctx.Queue()
+    deadline = time.time() + args.seconds
+    procs = [ctx.Process(target=worker, args=("search", 0, db_path, profile, deadline, args, results))]
+    for role in ("writer", "reader"):
+        procs += [ctx.Process(target=worker, args=(role, i + 1, db_path, profile, deadline, args, results))
+                  for i in range(args.processes)]
+    for p in procs:
+        p.start()
+    collected = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+
+    print(f"profile: {'on' if profile else 'off'}, {args.seconds:.0f}s, "
+          f"{args.processes} writer + {args.processes} reader processes, 1 search process")
+    print(f"{'role':<8} {'ok':>6} {'locked':>7} {'failed':>7} {'p50 ms':>7} {'p95 ms':>7} {'max ms':>7}")
+    failures = 0
+    for role in ROLES:
+        rows = [r for r in collected if r[0] == role]
+        lat = [x for r in rows for x in r[1]]
+        locked = sum(r[2] for r in rows)
+        failed = sum(r[3] for r in rows)
+        failures += failed
+        print(f"{role:<8} {len(lat):>6} {locked:>7} {failed:>7} {_ms(lat, .5):>7} {_ms(lat, .95):>7} "
+              f"{(max(lat) * 1000 if lat else 0):>7.0f}")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    raise SystemExit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
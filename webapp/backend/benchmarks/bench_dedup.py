@@ -0,0 +1,134 @@
+"""Benchmark near-duplicate description detection against labelled pairs.
+
+    python -m benchmarks.bench_dedup --background 20000
+
+Reads benchmarks/fixtures/duplicate_pairs.json and reports precision/recall
+of the SimHash rule next to the previous first-200-characters fingerprint,
+per pair kind, and through the in-batch SimHashIndex. It then stores half of
+--background synthetic jobs plus the fixture descriptions, looks the other
+half up through the stored index (find_stored), checks the result against
+an exhaustive scan, and reports fingerprinting / lookup throughput.
+"""
+
+import argparse
+import json
+import os
+import re
+from collections import defaultdict
+
+from models import db, JobRecord
+import service_dedup as dedup
+from benchmarks.common import make_app, synthetic_jobs, timed
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "duplicate_pairs.json")
+
+
+def legacy_fingerprint(description: str) -> str | None:
+    """The fingerprint fetch_and_store_jobs used before SimHash."""
+    fp = re.sub(r'\s+', ' ', (description or "").lower().strip())[:200]
+    return fp if len(fp) >= 50 else None
+
+
+def legacy_match(a: dict, b: dict) -> bool:
+    fa, fb = legacy_fingerprint(a["description"]), legacy_fingerprint(b["description"])
+    return fa is not None and fa == fb
+
+
+def simhash_match(a: dict, b: dict) -> bool:
+    fa, fb = dedup.simhash(a["description"]), dedup.simhash(b["description"])
+    if fa is None or fb is None:
+        return False
+    return dedup.is_near_duplicate(fa, dedup.company_key(a["company"]),
+                                   fb, dedup.company_key(b["company"]))
+
+
+def report(name: str, pairs: list[dict], predictions: list[bool]):
+    tp = sum(1 for p, pred in zip(pairs, predictions) if pred and p["duplicate"])
+    fp = sum(1 for p, pred in zip(pairs, predictions) if pred and not p["duplicate"])
+    fn = sum(1 for p, pred in zip(pairs, predictions) if not pred and p["duplicate"])
+    precision = tp / (tp + fp) if tp + fp else 1.0
+    recall = tp / (tp + fn) if tp + fn else 1.0
+    print(f"{name:<18} precision {precision:.3f}  recall {recall:.3f}  (tp {tp}, fp {fp}, fn {fn})")
+
+    by_kind = defaultdict(lambda: [0, 0])
+    for p, pred in zip(pairs, predictions):
+        by_kind[p["kind"]][0] += pred
+        by_kind[p["kind"]][1] += 1
+    print("    " + ", ".join(f"{kind} {hit}/{n}" for kind, (hit, n) in sorted(by_kind.items())))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--background", type=int, default=20000)
+    args = parser.parse_args()
+
+    with open(FIXTURE) as f:
+        pairs = json.load(f)["pairs"]
+    print(f"pairs: {len(pairs)} ({sum(p['duplicate'] for p in pairs)} duplicates)\n")
+
+    report("legacy prefix", pairs, [legacy_match(p["a"], p["b"]) for p in pairs])
+    report("simhash", pairs, [simhash_match(p["a"], p["b"]) for p in pairs])
+
+    distances = defaultdict(list)
+    for p in pairs:
+        fa, fb = dedup.simhash(p["a"]["description"]), dedup.simhash(p["b"]["description"])
+        if fa is not None and fb is not None:
+            distances[p["duplicate"]].append(dedup.hamming(fa, fb))
+    print(f"\nhamming distance: duplicates max {max(distances[True])}, "
+          f"non-duplicates min {min(distances[False])}")
+
+    # Batch (in-memory) index: store a, look b up
+    predictions = []
+    for p in pairs:
+        index = dedup.SimHashIndex()
+        fa, fb = dedup.simhash(p["a"]["description"]), dedup.simhash(p["b"]["description"])
+        if fa is not None:
+            index.add(fa, dedup.company_key(p["a"]["company"]), p["id"])
+        predictions.append(fb is not None and index.find(fb, dedup.company_key(p["b"]["company"])) is not None)
+    print()
+    report("simhash (batch)", pairs, predictions)
+
+    # Stored index against background jobs: every lookup must agree with an
+    # exhaustive scan under the same rule
+    app = make_app()
+    jobs = synthetic_jobs(args.background)
+    jobs += [{"title": p[side]["title"], "company": p[side]["company"],
+              "description": p[side]["description"], "source": "fixture",
+              "unique_key": f"fixture_{p['id']}_{side}", "job_id": p["id"]}
+             for p in pairs for side in ("a", "b")]
+    stored_jobs, query_jobs = jobs[::2], jobs[1::2]
+    results = {}
+    with app.app_context():
+        records = [JobRecord(**{k: v for k, v in j.items() if k != "family"}) for j in stored_jobs]
+        db.session.add_all(records)
+        db.session.commit()
+
+        with timed("fingerprint", results):
+            stored = [(r.id, dedup.simhash(r.description), dedup.company_key(r.company)) for r in records]
+        with timed("index", results):
+            for i in range(0, len(stored), 1000):
+                dedup.add_to_index(stored[i:i + 1000])
+            db.session.commit()
+
+        queries = {(fp, ck) for fp, ck in ((dedup.simhash(j["description"]), dedup.company_key(j["company"]))
+                                           for j in query_jobs) if fp is not None}
+        with timed("lookup", results):
+            matches = dedup.find_stored(queries)
+
+    with timed("scan", results):
+        exhaustive = {q for q in queries
+                      if any(fp is not None and dedup.is_near_duplicate(q[0], q[1], fp, ck)
+                             for _, fp, ck in stored)}
+    agree = len(exhaustive & set(matches))
+    extra = len(set(matches) - exhaustive)
+
+    print(f"\nstored jobs:        {len(stored)}")
+    print(f"fingerprinting:     {len(stored) / results['fingerprint']:.0f} descriptions/s")
+    print(f"index build:        {results['index']:.2f}s")
+    print(f"batch lookup:       {len(queries)} descriptions in {results['lookup'] * 1000:.1f}ms "
+          f"(exhaustive scan {results['scan'] * 1000:.0f}ms)")
+    print(f"index vs scan:      {agree}/{len(exhaustive)} near-duplicates found, {extra} extra")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""Benchmark and check the streaming exports (api_export).
+
+    python -m benchmarks.bench_export --jobs 50000
+
+Grows the database to --jobs / 5 and then --jobs jobs, one in ten with an
+application and a feedback. At each size it streams GET /api/export/jobs
+(NDJSON) and reports rows/s and the peak Python memory held while streaming
+(tracemalloc). It compares that with paging GET /api/jobs 50 at a time. It
+then checks that:
+- peak memory does not grow with the table (within 1.5x);
+- for several filters, the export has exactly the ids GET /api/jobs lists;
+- CSV has the same rows as NDJSON, and gzip=true decompresses to the
+  plain body;
+- GET /api/export/applications has the rows GET /api/applications returns.
+Exits 1 if a check fails.
+"""
+
+import io
+import csv
+import sys
+import gzip
+import json
+import time
+import random
+import argparse
+import tracemalloc
+
+from models import db, JobRecord, JobApplication, ApplicationFeedback
+from service_dedup import dedup_key, company_key
+import service_top_candidates as top_candidates
+import service_processed_keys as processed_keys
+from api_jobs import jobs_bp
+from api_applications import applications_bp
+from api_export import export_bp
+from benchmarks.common import make_app, synthetic_jobs
+
+FILTERS = ["", "min_score=10", "source=s1&hide_dismissed=true", "experience_ok=false",
+           "company=company 7", "hide_processed=true"]
+
+
+def add_jobs(jobs: list[dict], offset: int, rng: random.Random):
+    db.session.execute(JobRecord.__table__.insert(), [{
+        "title": j["title"], "company": j["company"], "description": j["description"],
+        "source": f"s{i % 3}", "unique_key": f"{offset}_{j['unique_key']}", "job_id": j["job_id"],
+        "dedup_key": dedup_key(j["title"], j["company"]), "company_key": company_key(j["company"]),
+        "match_score": rng.uniform(0, 20), "experience_ok": rng.random() > 0.2,
+        "match_tags": json.dumps(["python", "sql"]),
+    } for i, j in enumerate(jobs)])
+    ids = [i for (i,) in db.session.query(JobRecord.id).filter(
+        JobRecord.unique_key.like(f"{offset}\\_%", escape="\\")).all()]
+    applied = ids[::10]
+    db.session.execute(JobApplication.__table__.insert(), [
+        {"job_id": i, "status": rng.choice(["interested", "applied", "not_interested"]),
+         "notes": "a note, with a comma"} for i in applied])
+    app_ids = [i for (i,) in db.session.query(JobApplication.id).filter(
+        JobApplication.job_id.in_(applied)).all()]
+    db.session.execute(ApplicationFeedback.__table__.insert(), [
+        {"application_id": i, "feedback_type": "note", "feedback_text": "feedback"} for i in app_ids])
+    top_candidates.rebuild()
+    processed_keys.rebuild()
+    db.session.commit()
+
+
+def stream(client, url: str, traced: bool = False) -> tuple[int, int, int]:
+    """Consume a streamed response chunk by chunk, keeping nothing. Returns
+    its lines, its bytes and, if traced, the peak Python memory allocated
+    meanwhile (tracemalloc)."""
+    if traced:
+        tracemalloc.start()
+    resp = client.get(url)
+    assert resp.status_code == 200, (url, resp.status_code)
+    lines = size = 0
+    for chunk in resp.response:
+        lines += chunk.count(b"\n")
+        size += len(chunk)
+    resp.close()
+    peak = 0
+    if traced:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return lines, size, peak
+
+
+def listed_ids(client, args: str) -> list[int]:
+    ids, cursor = [], ""
+    while cursor is not None:
+        page = client.get(f"/api/jobs?{args}&fields=id&per_page=500&total=none&cursor={cursor}").get_json()
+        ids.extend(job["id"] for job in page["jobs"])
+        cursor = page["next_cursor"]
+    return ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=50000)
+    args = parser.parse_args()
+
+    app = make_app()
+    for bp in (jobs_bp, applications_bp, export_bp):
+        app.register_blueprint(bp)
+    client = app.test_client()
+    rng = random.Random(5)
+    jobs = synthetic_jobs(args.jobs, family_size=1)
+    failures = []
+
+    peaks = []
+    stored = 0
+    for n in (args.jobs // 5, args.jobs):
+        with app.app_context():
+            add_jobs(jobs[stored:n], stored, rng)
+        stored = n
+        start = time.perf_counter()
+        rows, size, _ = stream(client, "/api/export/jobs")
+        elapsed = time.perf_counter() - start
+        peak = stream(client, "/api/export/jobs", traced=True)[2]
+        peaks.append(peak)
+
+        start = time.perf_counter()
+        page, pages = 1, 1
+        while page <= pages:
+            pages = client.get(f"/api/jobs?page={page}&per_page=50").get_json()["pages"]
+            page += 1
+        paged = time.perf_counter() - start
+        print(f"N={n}: export {rows} rows in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/s, "
+              f"{size / 1024 / 1024:.1f} MiB), peak memory {peak / 1024:.0f} KiB; "
+              f"paging /api/jobs 50 at a time: {paged:.2f}s")
+        if rows != n:
+            failures.append(f"N={n}: exported {rows} rows")
+    if peaks[1] > peaks[0] * 1.5:
+        failures.append(f"peak memory grew with the table: {peaks[0] / 1024:.0f} -> {peaks[1] / 1024:.0f} KiB")
+
+    for filters in FILTERS:
+        exported = [json.loads(line)["id"] for line in
+                    client.get(f"/api/export/jobs?{filters}&fields=id").get_data().splitlines()]
+        listed = sorted(listed_ids(client, filters))
+        print(f"{filters or '(no filter)':<32} {len(exported)} rows")
+        if exported != listed:
+            failures.append(f"export ?{filters} has {len(exported)} rows, GET /api/jobs lists {len(listed)}")
+
+    url = "/api/export/jobs?min_score=15"
+    plain = client.get(url).get_data()
+    ndjson = [json.loads(line) for line in plain.splitlines()]
+    table = list(csv.DictReader(io.StringIO(client.get(url + "&format=csv").get_data(as_text=True))))
+    if [int(r["id"]) for r in table] != [r["id"] for r in ndjson] or \
+            [json.loads(r["match_tags"]) for r in table] != [r["match_tags"] for r in ndjson]:
+        failures.append("CSV rows differ from NDJSON rows")
+    resp = client.get(url + "&gzip=true")
+    if gzip.decompress(resp.get_data()) != plain or resp.mimetype != "application/gzip":
+        failures.append("gzip=true does not decompress to the plain export")
+
+    for status in ("", "applied"):
+        listed = client.get(f"/api/applications?status={status}").get_json()
+        exported = [json.loads(line) for line in
+                    client.get(f"/api/export/applications?status={status}").get_data().splitlines()]
+        table = list(csv.DictReader(io.StringIO(client.get(
+            f"/api/export/applications?status={status}&format=csv").get_data(as_text=True))))
+        print(f"applications ?status={status:<8} {len(exported)} rows")
+        if sorted(exported, key=lambda a: a["id"]) != sorted(listed, key=lambda a: a["id"]):
+            failures.append(f"applications export ?status={status} differs from GET /api/applications")
+        if [int(r["id"]) for r in table] != [a["id"] for a in exported] or \
+                any(r["job_title"] != a["job"]["title"] for r, a in zip(table, exported)):
+            failures.append(f"applications CSV ?status={status} differs from NDJSON")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if not failures:
+        print("ok")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
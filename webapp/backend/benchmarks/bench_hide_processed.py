@@ -0,0 +1,108 @@
+"""Benchmark GET /api/jobs?hide_processed=true as applications grow.
+
+    python -m benchmarks.bench_hide_processed --jobs 50000 --applications 10000
+
+Stores --jobs synthetic jobs and adds applications in steps up to
+--applications. At each step it times the first page of the list endpoint
+with the processed_keys anti-join, and the query the endpoint used before
+(one OR clause per processed title/company pair), checking both hide the
+same jobs. The old query stops working once its expression tree passes
+SQLite's depth limit.
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from sqlalchemy import func, and_, or_
+from sqlalchemy.exc import OperationalError
+
+from models import db, JobRecord, JobApplication
+from service_dedup import dedup_key, company_key
+import service_processed_keys as processed_keys
+from api_jobs import jobs_bp
+from benchmarks.common import make_app, synthetic_jobs
+
+
+def legacy_query():
+    """hide_processed as list_jobs built it before processed_keys."""
+    query = JobRecord.query.filter(JobRecord.match_score > -99)
+    query = query.filter(~JobRecord.id.in_(db.session.query(JobApplication.job_id)))
+    processed_tc = db.session.query(
+        func.lower(JobRecord.title), func.lower(JobRecord.company)
+    ).join(JobApplication, JobRecord.id == JobApplication.job_id).all()
+    if processed_tc:
+        query = query.filter(~or_(*[and_(func.lower(JobRecord.title) == t, func.lower(JobRecord.company) == c)
+                                    for t, c in processed_tc]))
+    return query
+
+
+def _time(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=50000)
+    parser.add_argument("--applications", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    app = make_app()
+    app.register_blueprint(jobs_bp)
+    client = app.test_client()
+    rng = random.Random(3)
+    jobs = synthetic_jobs(args.jobs, family_size=1)
+
+    with app.app_context():
+        db.session.execute(JobRecord.__table__.insert(), [{
+            "title": j["title"], "company": j["company"], "description": j["description"],
+            "source": j["source"], "unique_key": j["unique_key"], "job_id": j["job_id"],
+            "dedup_key": dedup_key(j["title"], j["company"]), "company_key": company_key(j["company"]),
+            "match_score": rng.uniform(0, 20),
+        } for j in jobs])
+        db.session.commit()
+        job_ids = [i for (i,) in db.session.query(JobRecord.id).all()]
+        rng.shuffle(job_ids)
+
+        steps = sorted({n for n in (100, 1000, 5000, args.applications) if n <= args.applications})
+        applied = 0
+        print(f"jobs: {args.jobs}")
+        print(f"{'applications':>12}  {'anti-join':>10}  {'legacy':>10}  same result")
+        for target in steps:
+            db.session.execute(JobApplication.__table__.insert(), [
+                {"job_id": jid, "status": "applied"} for jid in job_ids[applied:target]])
+            applied = target
+            processed_keys.rebuild()
+            db.session.commit()
+
+            def endpoint():
+                resp = client.get("/api/jobs?hide_processed=true&per_page=50")
+                assert resp.status_code == 200, resp.status_code
+                return resp.get_json()
+            new_time = _time(endpoint, args.repeat)
+            new_total = endpoint()["total"]
+
+            try:
+                def legacy():
+                    q = legacy_query()
+                    return q.count(), q.order_by(JobRecord.match_score.desc(), JobRecord.id).limit(50).all()
+                legacy_time = _time(legacy, args.repeat)
+                legacy_total = legacy()[0]
+                old = f"{legacy_time * 1000:8.1f}ms"
+                same = "yes" if legacy_total == new_total else f"no ({legacy_total} vs {new_total})"
+            except OperationalError as e:
+                db.session.rollback()
+                old = "   failed"
+                same = str(e.orig)
+            print(f"{applied:>12}  {new_time * 1000:8.1f}ms  {old:>10}  {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""Benchmark and check the bulk import (service_import).
+
+    python -m benchmarks.bench_import --jobs 50000 --workers 4
+
+Writes --jobs synthetic jobs as a gzipped NDJSON dump, in the format of
+GET /api/export/jobs, and a CLI seen_jobs.db history that overlaps it. It
+imports the dump and reports the load rate (records/s: read, dedup, score,
+insert) and the index phase rate, then imports the history. It then checks
+that:
+- every record is accounted for (inserted, existing, duplicate, filtered,
+  invalid);
+- re-importing the dump stores nothing new;
+- history keys already imported count as existing, and the others are
+  stored with the history date as first_seen_at;
+- exporting the store and importing that into an empty database gives
+  the same jobs with the same scores;
+- every imported job is indexed (text vector, "more like this");
+- POST /api/import/jobs takes a gzipped CSV body.
+Exits 1 if a check fails.
+"""
+
+import io
+import os
+import csv
+import sys
+import gzip
+import json
+import random
+import sqlite3
+import argparse
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+from models import db, JobRecord, TextVector, UserKeyword
+import service_import as importer
+from api_jobs import jobs_bp
+from api_export import export_bp
+from api_import import import_bp
+from benchmarks.common import make_app, synthetic_jobs
+
+KEYWORDS = [("analyst", "boost", 1.0), ("product", "boost", 2.0), ("w17", "exclude", 2.0)]
+COMPARED = ("unique_key", "title", "company", "description", "url", "match_score", "match_tags",
+            "experience_ok", "first_seen_at")
+
+
+def dump_records(n: int, rng: random.Random) -> list[dict]:
+    """Export-format records: one company per posting, a few exact repeats
+    and title+company duplicates under another source, and some without a title."""
+    now = datetime.now(timezone.utc)
+    records = []
+    for i, j in enumerate(synthetic_jobs(n, family_size=1, seed=11)):
+        records.append({
+            "id": i + 1, "job_id": j["job_id"], "source": "adzuna", "unique_key": f"adzuna_{j['job_id']}",
+            "title": j["title"], "company": f"{j['company']} {i}", "location": "London",
+            "salary": rng.choice(["", "£50,000", "£60k"]), "url": f"https://example.com/{i}",
+            "description": j["description"], "posted_date": "",
+            "match_score": 0, "match_tags": [], "experience_ok": True, "search_session_id": 1,
+            "first_seen_at": (now - timedelta(days=rng.randint(0, 20))).isoformat(), "repost_of_id": None,
+        })
+    for r in rng.sample(records, n // 100):
+        records.append(dict(r))
+        records.append({**r, "source": "reed", "job_id": f"r{r['job_id']}", "unique_key": f"reed_r{r['job_id']}"})
+    records.extend({"title": "", "company": "nobody"} for _ in range(n // 500))
+    rng.shuffle(records)
+    return records
+
+
+def write_dump(path: str, records: list[dict]):
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for r in records:
+            f.write(json.dumps(r, separators=(",", ":")) + "\n")
+
+
+def write_history(path: str, dump: list[dict], n: int, rng: random.Random) -> dict:
+    """A seen_jobs.db as the CLI bot keeps it: half the keys from the dump,
+    half its own. Returns {new key: date}."""
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE seen (key TEXT PRIMARY KEY, title TEXT, company TEXT, date TEXT NOT NULL)")
+    titled = [r for r in dump if r["title"]]
+    rows = [(r["unique_key"], r["title"], r["company"], "2026-01-01") for r in rng.sample(titled, n // 2)]
+    fresh = {f"linkedin_{i}": (datetime.now(timezone.utc) - timedelta(days=i % 30)).strftime("%Y-%m-%d")
+             for i in range(n - len(rows))}
+    rows += [(key, "Data Analyst", f"history company {i}", date) for i, (key, date) in enumerate(fresh.items())]
+    with conn:
+        conn.executemany("INSERT OR IGNORE INTO seen VALUES (?, ?, ?, ?)", rows)
+    conn.close()
+    return fresh
+
+
+def app_with_keywords():
+    app = make_app()
+    for bp in (jobs_bp, export_bp, import_bp):
+        app.register_blueprint(bp)
+    with app.app_context():
+        db.session.add_all([UserKeyword(keyword=k, category=c, weight=w) for k, c, w in KEYWORDS])
+        db.session.commit()
+    return app
+
+
+def stored(app) -> dict:
+    client = app.test_client()
+    rows = [json.loads(line) for line in client.get(
+        "/api/export/jobs?fields=" + ",".join(COMPARED)).get_data().splitlines()]
+    return {r["unique_key"]: r for r in rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=50000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    folder = tempfile.mkdtemp(prefix="import-")
+    dump = dump_records(args.jobs, rng)
+    dump_path = os.path.join(folder, "jobs.ndjson.gz")
+    write_dump(dump_path, dump)
+    history_path = os.path.join(folder, "seen_jobs.db")
+    history = write_history(history_path, dump, args.jobs // 5, rng)
+    failures = []
+
+    app = app_with_keywords()
+    with app.app_context():
+        result = importer.import_records(importer.read_file(dump_path), "import:dump", workers=args.workers,
+                                         defer_index=False)
+    print(f"dump: {result['read']} records, load {result['seconds']:.2f}s "
+          f"({result['jobs_per_sec']:,} records/s, {args.workers} workers), index phase "
+          f"{result['index_seconds']:.2f}s ({result['indexed_per_sec']:,} jobs/s)")
+    print("      " + ", ".join(f"{k} {result[k]}" for k in (
+        "inserted", "existing", "duplicate", "filtered", "invalid", "sightings", "failed")))
+    accounted = sum(result[k] for k in ("inserted", "existing", "duplicate", "filtered", "invalid", "failed"))
+    if accounted != result["read"] or result["failed"]:
+        failures.append(f"dump: {accounted} of {result['read']} records accounted for")
+
+    with app.app_context():
+        again = importer.import_records(importer.read_file(dump_path), "import:again", workers=args.workers,
+                                        defer_index=True)
+        vectors = TextVector.query.filter_by(kind="job").count()
+        jobs = JobRecord.query.count()
+        job_id = db.session.query(JobRecord.id).filter(JobRecord.unique_key.like("adzuna_%")).first()[0]
+    print(f"re-import: {again['read']} records in {again['seconds']:.2f}s ({again['jobs_per_sec']:,} records/s), "
+          f"{again['inserted']} inserted")
+    if again["inserted"]:
+        failures.append(f"re-import stored {again['inserted']} jobs again")
+    if vectors != jobs:
+        failures.append(f"{vectors} text vectors for {jobs} jobs")
+    if app.test_client().get(f"/api/jobs/{job_id}/similar").status_code != 200:
+        failures.append("more like this failed on an imported job")
+
+    with app.app_context():
+        seen = importer.import_records(importer.read_file(history_path), "import:seen_jobs.db",
+                                       workers=args.workers)
+        dates = dict(db.session.query(JobRecord.unique_key, JobRecord.first_seen_at).filter(
+            JobRecord.unique_key.in_(list(history)[:500])).all())
+    print(f"seen_jobs.db: {seen['read']} records in {seen['seconds']:.2f}s "
+          f"({seen['jobs_per_sec']:,} records/s), {seen['inserted']} inserted, {seen['existing']} existing")
+    known = seen["existing"] + seen["duplicate"]
+    if known != seen["read"] - len(history) or seen["inserted"] + seen["filtered"] != len(history):
+        failures.append(f"history: {known} existing or duplicate, {seen['inserted']} inserted "
+                        f"for {len(history)} new keys")
+    if any(dates[k].strftime("%Y-%m-%d") != history[k] for k in dates):
+        failures.append("history dates not kept as first_seen_at")
+
+    # Round trip: this store's export into an empty database
+    before = stored(app)
+    export_path = os.path.join(folder, "export.ndjson")
+    with open(export_path, "wb") as f:
+        f.write(app.test_client().get("/api/export/jobs").get_data())
+    other = app_with_keywords()
+    with other.app_context():
+        trip = importer.import_records(importer.read_file(export_path), "import:export", workers=args.workers,
+                                       defer_index=True)
+    after = stored(other)
+    print(f"round trip: {trip['read']} records in {trip['seconds']:.2f}s, {trip['inserted']} inserted")
+    if after != before:
+        changed = [k for k in before if after.get(k) != before[k]]
+        failures.append(f"round trip: {len(changed) + len(set(after) - set(before))} jobs differ "
+                        f"(e.g. {(changed or list(after))[0]})")
+
+    body = io.StringIO()
+    writer = csv.DictWriter(body, fieldnames=["title", "company", "source", "job_id", "description"])
+    writer.writeheader()
+    writer.writerows({"title": "Product Analyst", "company": f"csv company {i}", "source": "csv",
+                      "job_id": str(i), "description": "product analytics"} for i in range(50))
+    resp = other.test_client().post("/api/import/jobs?format=csv&gzip=true",
+                                    data=gzip.compress(body.getvalue().encode("utf-8")))
+    if resp.status_code != 200 or resp.get_json()["inserted"] != 50:
+        failures.append(f"POST /api/import/jobs: {resp.status_code} {resp.get_data(as_text=True)[:200]}")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if not failures:
+        print("ok")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
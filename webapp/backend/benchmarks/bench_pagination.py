@@ -0,0 +1,91 @@
+"""Benchmark deep pages of GET /api/jobs: OFFSET pages vs keyset cursors.
+
+    python -m benchmarks.bench_pagination --jobs 100000
+
+Stores --jobs synthetic jobs, then times page 1, 100, 1000 of 50 jobs:
+- ?page=N&total=none (OFFSET, count skipped);
+- ?cursor=<cursor of page N> (keyset), with the cursors collected by walking
+  the pages first.
+Both sort orders are checked to return the same jobs. It also times the
+total as an exact COUNT(*) and from the per-filter count cache.
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from models import db, JobRecord
+from service_dedup import dedup_key, company_key
+import service_top_candidates as top_candidates
+from api_jobs import jobs_bp
+from benchmarks.common import make_app, synthetic_jobs
+
+PER_PAGE = 50
+
+
+def _time(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    app = make_app()
+    app.register_blueprint(jobs_bp)
+    client = app.test_client()
+    rng = random.Random(9)
+    start = datetime(2026, 1, 1)
+
+    with app.app_context():
+        db.session.execute(JobRecord.__table__.insert(), [{
+            "title": j["title"], "company": j["company"], "description": j["description"],
+            "source": "bench", "unique_key": j["unique_key"], "job_id": j["job_id"],
+            "dedup_key": dedup_key(j["title"], j["company"]), "company_key": company_key(j["company"]),
+            "match_score": round(rng.uniform(0, 20), 1),  # many ties
+            "first_seen_at": start + timedelta(minutes=rng.randint(0, 60 * 24 * 60)),
+        } for j in synthetic_jobs(args.jobs, family_size=1)])
+        top_candidates.rebuild()
+        db.session.commit()
+
+    def get(url):
+        resp = client.get(url)
+        assert resp.status_code == 200, (url, resp.status_code)
+        return resp.get_json()
+
+    pages = [p for p in (1, 100, 1000) if (p - 1) * PER_PAGE < args.jobs]
+    print(f"jobs: {args.jobs}, {PER_PAGE} per page")
+    print(f"{'sort':<6} {'page':>5}  {'offset':>9}  {'cursor':>9}  same jobs")
+    for sort in ("score", "date"):
+        cursors, cursor = {1: ""}, ""
+        for page in range(1, max(pages)):
+            cursor = get(f"/api/jobs?sort={sort}&per_page={PER_PAGE}&total=none&cursor={cursor}")["next_cursor"]
+            cursors[page + 1] = cursor
+        for page in pages:
+            offset_url = f"/api/jobs?sort={sort}&per_page={PER_PAGE}&total=none&page={page}"
+            cursor_url = f"/api/jobs?sort={sort}&per_page={PER_PAGE}&total=none&cursor={cursors[page]}"
+            offset_time = _time(lambda: get(offset_url), args.repeat)
+            cursor_time = _time(lambda: get(cursor_url), args.repeat)
+            same = [j["id"] for j in get(offset_url)["jobs"]] == [j["id"] for j in get(cursor_url)["jobs"]]
+            print(f"{sort:<6} {page:>5}  {offset_time * 1000:7.1f}ms  {cursor_time * 1000:7.1f}ms  "
+                  f"{'yes' if same else 'NO'}")
+
+    url = f"/api/jobs?per_page={PER_PAGE}&cursor=&min_score=5"
+    exact = _time(lambda: get(url + "&total=exact"), args.repeat)
+    cached = _time(lambda: get(url), args.repeat)
+    skipped = _time(lambda: get(url + "&total=none"), args.repeat)
+    print(f"first page with total: exact {exact * 1000:.1f}ms, cached {cached * 1000:.1f}ms, "
+          f"none {skipped * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
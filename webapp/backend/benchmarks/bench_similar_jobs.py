@@ -0,0 +1,94 @@
+"""Benchmark the similar-jobs LSH index: build time, query latency, recall.
+
+    python -m benchmarks.bench_similar_jobs --jobs 20000 --queries 200
+
+Recall is measured against brute-force exact Jaccard over all token sets:
+for each query, the true neighbours are jobs with Jaccard >= --threshold
+(capped at the top 10), and recall is the share of them the index returns.
+It also checks that a lookup for a job missing from the index finds the
+same matches without writing it to the index. Exits 1 if it does not.
+"""
+
+import sys
+import argparse
+import random
+import statistics
+import time
+
+from models import db, JobRecord, MinHashSignature
+from service_similarity import term_counts, job_text
+import service_similar_jobs as similar_index
+from benchmarks.common import make_app, synthetic_jobs, timed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--threshold", type=float, default=0.5)
+    args = parser.parse_args()
+
+    app = make_app()
+    jobs = synthetic_jobs(args.jobs)
+    results = {}
+
+    with app.app_context():
+        records = [JobRecord(**{k: v for k, v in j.items() if k != "family"}) for j in jobs]
+        db.session.add_all(records)
+        db.session.commit()
+        tokens = {r.id: set(term_counts(job_text(j)).keys()) for r, j in zip(records, jobs)}
+
+        with timed("build", results):
+            ids = list(tokens)
+            for i in range(0, len(ids), 1000):
+                similar_index.add_to_index([(jid, tokens[jid]) for jid in ids[i:i + 1000]])
+            db.session.commit()
+
+        rng = random.Random(1)
+        queries = rng.sample(ids, min(args.queries, len(ids)))
+        latencies, found, expected = [], 0, 0
+        brute_times = []
+        for qid in queries:
+            start = time.perf_counter()
+            hits = {jid for jid, _ in similar_index.similar_jobs(qid, limit=10)}
+            latencies.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            q = tokens[qid]
+            exact = sorted(((len(q & t) / len(q | t), jid) for jid, t in tokens.items() if jid != qid),
+                           reverse=True)
+            brute_times.append(time.perf_counter() - start)
+            truth = {jid for sim, jid in exact[:10] if sim >= args.threshold}
+            expected += len(truth)
+            found += len(truth & hits)
+
+        # A job missing from the index (stored before it, or imported with
+        # defer_index): the lookup computes its signature, read-only
+        qid = queries[0]
+        indexed = similar_index.similar_jobs(qid, limit=10)
+        similar_index.remove_from_index([qid])
+        db.session.commit()
+        unindexed = similar_index.similar_jobs(qid, tokens[qid], limit=10)
+        written = MinHashSignature.query.filter_by(job_id=qid).count()
+        failures = []
+        if unindexed != indexed:
+            failures.append(f"unindexed job {qid}: {unindexed[:3]}... instead of {indexed[:3]}...")
+        if written or db.session.new:
+            failures.append(f"lookup of unindexed job {qid} wrote to the index")
+
+    latencies.sort()
+    print(f"jobs:               {args.jobs}")
+    print(f"index build:        {results['build']:.2f}s ({args.jobs / results['build']:.0f} jobs/s)")
+    print(f"query p50 / p95:    {latencies[len(latencies) // 2] * 1000:.2f}ms / "
+          f"{latencies[int(len(latencies) * 0.95)] * 1000:.2f}ms")
+    print(f"brute force mean:   {statistics.mean(brute_times) * 1000:.2f}ms")
+    print(f"recall@10 (J>={args.threshold}): {found / expected:.3f}" if expected else "recall: no true neighbours")
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if not failures:
+        print("ok")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Benchmark and check chunked storing of search results.
+
+    python -m benchmarks.bench_store_chunks --jobs 5000 --chunk 500
+
+Ingests --jobs synthetic jobs through fetch_and_store_jobs twice: once as a
+single chunk (one write transaction, as before chunked storing) and once in
+chunks of --chunk. For each it prints the run time and the longest
+db_writer transaction, i.e. how long other writers wait at most. It then
+checks that:
+- a chunk failing part-way (a bad row) is rolled back alone: no jobs row or
+  index entry of it is left, every other chunk is stored, and the session
+  ends "partial" with total_results counting the stored jobs;
+- a reader polling GET /api/jobs/search/<id> while storing sees
+  total_results grow chunk by chunk.
+Exits 1 if a check fails.
+"""
+
+import sys
+import time
+import argparse
+import threading
+
+import db_writer
+import service_scraper as scraper
+from models import db, JobRecord, TextVector, SearchSession
+from api_jobs import jobs_bp
+from benchmarks.common import make_app, synthetic_jobs
+
+KEYWORDS = [{"keyword": "analyst", "category": "boost", "weight": 1.0}]
+
+
+def ingest(batch: list[dict]) -> dict:
+    scraper.fetch_adzuna = lambda queries, rules: [dict(j) for j in batch]
+    for name in ("fetch_linkedin", "fetch_google_jobs"):
+        setattr(scraper, name, lambda queries, rules: [])
+    scraper.fetch_x_twitter = lambda: []
+    scraper.fetch_jungle = lambda rules: []
+    return scraper.fetch_and_store_jobs(KEYWORDS)
+
+
+def postings(n: int, prefix: str) -> list[dict]:
+    # One company per posting and a seed per run, so none is a duplicate of another
+    return [{
+        "title": j["title"], "company": f"{j['company']} {prefix}{i}", "description": j["description"],
+        "salary": "", "url": f"https://example.com/{prefix}{i}", "location": "London", "posted_date": "",
+        "source": "bench", "job_id": f"{prefix}{i}", "unique_key": f"{prefix}_{j['unique_key']}",
+    } for i, j in enumerate(synthetic_jobs(n, family_size=1, seed=ord(prefix)))]
+
+
+def timed_transactions() -> list:
+    """Wrap the writer's batches to record how long each one holds the lock."""
+    durations = []
+    run_batch = db_writer._run_batch
+
+    def timed_batch(app, batch):
+        start = time.perf_counter()
+        run_batch(app, batch)
+        durations.append(time.perf_counter() - start)
+
+    db_writer._run_batch = timed_batch
+    return durations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=5000)
+    parser.add_argument("--chunk", type=int, default=scraper.STORE_CHUNK)
+    args = parser.parse_args()
+
+    app = make_app()
+    app.register_blueprint(jobs_bp)
+    client = app.test_client()
+    durations = timed_transactions()
+    failures = []
+
+    for label, chunk, prefix in (("single transaction", args.jobs, "a"),
+                                 (f"chunks of {args.chunk}", args.chunk, "b")):
+        scraper.STORE_CHUNK = chunk
+        durations.clear()
+        with app.app_context():
+            start = time.perf_counter()
+            result = ingest(postings(args.jobs, prefix))
+            elapsed = time.perf_counter() - start
+        print(f"{label:<22} {result['new_count']} stored in {elapsed:.2f}s, "
+              f"{len(durations)} write transactions, longest {max(durations) * 1000:.0f}ms")
+        if result["new_count"] != args.jobs or result["status"] != "complete":
+            failures.append(f"{label}: stored {result['new_count']} of {args.jobs} ({result['status']})")
+
+    # A bad row: the third chunk fails after its jobs rows were inserted
+    scraper.STORE_CHUNK = args.chunk
+    batch = postings(args.jobs, "c")
+    bad = batch[2 * args.chunk]["unique_key"]
+    index_jobs = scraper.index_jobs
+
+    def failing_index(entries):
+        index_jobs(entries)
+        if db.session.query(JobRecord.id).filter_by(unique_key=bad).first():
+            raise ValueError(f"bad row {bad}")
+
+    seen = []
+    stop = threading.Event()
+
+    def poll():
+        while not stop.is_set():
+            last = db.session.query(SearchSession.id).order_by(SearchSession.id.desc()).first()
+            db.session.rollback()  # a fresh snapshot next time
+            if last is not None and last[0] > 2:
+                seen.append(client.get(f"/api/jobs/search/{last[0]}").get_json()["total_results"])
+            time.sleep(0.005)
+
+    def poller():
+        with app.app_context():
+            poll()
+
+    scraper.index_jobs = failing_index
+    reader = threading.Thread(target=poller)
+    reader.start()
+    with app.app_context():
+        result = ingest(batch)
+    stop.set()
+    reader.join()
+    scraper.index_jobs = index_jobs
+
+    with app.app_context():
+        keys = [j["unique_key"] for j in batch]
+        failed_keys = set(keys[2 * args.chunk:3 * args.chunk])
+        stored = {k for (k,) in db.session.query(JobRecord.unique_key).filter(
+            JobRecord.unique_key.like("c\\_%", escape="\\")).all()}
+        session = db.session.get(SearchSession, result["session_id"])
+        vectors = db.session.query(TextVector).join(JobRecord, JobRecord.id == TextVector.ref_id).filter(
+            TextVector.kind == "job", JobRecord.search_session_id == session.id).count()
+        orphans = db.session.query(TextVector).filter(
+            TextVector.kind == "job", ~TextVector.ref_id.in_(db.session.query(JobRecord.id))).count()
+    expected = set(keys) - failed_keys
+    print(f"failing chunk: stored {len(stored)} of {len(keys)}, failed {result['failed']}, "
+          f"session {session.status} with total_results {session.total_results}")
+    print(f"progress seen while storing: {sorted(set(seen))}")
+    if stored != expected:
+        failures.append(f"stored {len(stored)} jobs, expected the {len(expected)} outside the bad chunk")
+    if result["failed"] != len(failed_keys) or session.status != "partial":
+        failures.append(f"failed={result['failed']}, status={session.status}")
+    if session.total_results != len(expected) or vectors != len(expected) or orphans:
+        failures.append(f"total_results {session.total_results}, {vectors} text vectors, "
+                        f"{orphans} orphan vectors for {len(expected)} stored jobs")
+    if len({v for v in seen if 0 < v < len(expected)}) < 2:
+        failures.append("no intermediate progress seen while storing")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if not failures:
+        print("ok")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
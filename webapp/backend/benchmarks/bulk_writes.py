@@ -0,0 +1,110 @@
+"""Check the dialect-specific write helpers in db_helpers.
+
+    python -m benchmarks.bulk_writes
+
+insert_ignore_returning, upsert and insert_ignore build their SQL per dialect
+(ON CONFLICT where the database has it). For a small and a large batch of
+jobs, half of them already stored, it checks that:
+- only the new rows are inserted, and exactly those are returned;
+- their values (text with tabs, newlines and backslashes, NULLs, booleans,
+  floats, timestamps) read back as written;
+- upsert inserts new keys and updates existing ones;
+- insert_ignore skips rows already stored.
+Prints the time per batch. Exits 1 if a check fails.
+"""
+
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from models import db, JobRecord, AppMeta, ProcessedKey
+from db_helpers import insert_ignore, insert_ignore_returning, upsert
+from benchmarks.common import make_app
+
+COMPARED = ("unique_key", "job_id", "source", "title", "company", "description", "match_score",
+            "experience_ok", "first_seen_at")
+
+
+def job_rows(prefix: str, n: int) -> list[dict]:
+    """Rows sharing their keys, as the importer and the scraper pass them."""
+    start = datetime(2026, 1, 1, 12, 30, 15)
+    return [{
+        "unique_key": f"{prefix}_{i}", "job_id": str(i), "source": "bench", "title": f"Analyst {i}",
+        "company": "Tab\there, new\nline, back\\slash" if i % 2 else "Plain Ltd",
+        "description": None if i % 3 == 0 else f"row {i}\r\nend",
+        "match_score": i / 4, "experience_ok": i % 2 == 0, "first_seen_at": start + timedelta(minutes=i),
+    } for i in range(n)]
+
+
+def check_insert_returning(n: int) -> list[str]:
+    table = JobRecord.__table__
+    rows = job_rows(f"bulk{n}", n)
+    db.session.execute(table.insert(), rows[:n // 2])
+    db.session.commit()
+
+    start = time.perf_counter()
+    returned = insert_ignore_returning(table, rows, "unique_key", table.c.id, table.c.unique_key)
+    db.session.commit()
+    elapsed = time.perf_counter() - start
+    print(f"insert_ignore_returning {n:>6} rows: {elapsed * 1000:.1f}ms")
+
+    failures = []
+    expected = {r["unique_key"] for r in rows[n // 2:]}
+    keys = [key for _, key in returned]
+    if set(keys) != expected or len(keys) != len(expected):
+        failures.append(f"{n} rows: returned {len(keys)} keys, expected the {len(expected)} new ones")
+    columns = [table.c[c] for c in COMPARED]
+    stored = {r.unique_key: dict(r._mapping) for r in db.session.execute(
+        select(*columns).where(table.c.unique_key.like(f"bulk{n}\\_%", escape="\\")))}
+    differ = [r["unique_key"] for r in rows if stored.get(r["unique_key"]) != {c: r[c] for c in COMPARED}]
+    if differ:
+        key = differ[0]
+        failures.append(f"{n} rows: {len(differ)} read back differently, e.g. {stored.get(key)} "
+                        f"for {next(r for r in rows if r['unique_key'] == key)}")
+    ids = dict(db.session.query(JobRecord.unique_key, JobRecord.id).filter(JobRecord.unique_key.in_(keys)).all())
+    if any(ids.get(key) != job_id for job_id, key in returned):
+        failures.append(f"{n} rows: returned ids do not match the stored rows")
+    return failures
+
+
+def check_upsert(n: int) -> list[str]:
+    db.session.execute(AppMeta.__table__.insert(), [{"name": f"meta_{i}", "value": "old"} for i in range(n // 2)])
+    db.session.commit()
+    upsert(AppMeta.__table__, [{"name": f"meta_{i}", "value": f"new {i}"} for i in range(n)], ["name"], ["value"])
+    db.session.commit()
+    values = dict(db.session.query(AppMeta.name, AppMeta.value).filter(AppMeta.name.like("meta\\_%", escape="\\")))
+    if values != {f"meta_{i}": f"new {i}" for i in range(n)}:
+        return [f"upsert: {sum(v.startswith('new') for v in values.values())} of {n} keys written"]
+    return []
+
+
+def check_insert_ignore(n: int) -> list[str]:
+    insert_ignore(ProcessedKey.__table__, [{"dedup_key": f"key {i}"} for i in range(n // 2)])
+    db.session.commit()
+    insert_ignore(ProcessedKey.__table__, [{"dedup_key": f"key {i}"} for i in range(n)])
+    db.session.commit()
+    stored = ProcessedKey.query.count()
+    return [] if stored == n else [f"insert_ignore: {stored} keys stored for {n}"]
+
+
+def main():
+    app = make_app()
+    failures = []
+    with app.app_context():
+        print(f"dialect: {db.engine.dialect.name}")
+        for n in (20, 1000):
+            failures.extend(check_insert_returning(n))
+        failures.extend(check_upsert(500))
+        failures.extend(check_insert_ignore(500))
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if not failures:
+        print("ok")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Shared helpers for the benchmark scripts (run from webapp/backend, e.g.
+`python -m benchmarks.bench_similar_jobs`). They use a throwaway database,
+never database.db: a temporary SQLite file, or the PostgreSQL database in
+BENCH_DATABASE_URL (e.g. postgresql://localhost/jobs_bench), which is
+emptied first. The checks (query_counts, bench_archive, ...) then run
+against PostgreSQL too."""
+
+import os
+import random
+import tempfile
+import time
+from contextlib import contextmanager
+
+from flask import Flask
+
+from models import db
+from db_helpers import apply_sqlite_profile, POSTGRES_ENGINE_OPTIONS
+
+BENCH_DATABASE_URL = os.environ.get("BENCH_DATABASE_URL")
+
+WORDS = [f"w{i}" for i in range(3000)]
+TITLES = ["data analyst", "product analyst", "business analyst", "insight analyst",
+          "product manager", "senior analyst", "associate product manager"]
+COMPANIES = [f"company {i}" for i in range(2000)]
+
+
+def make_app(db_path: str | None = None, sqlite_profile: bool = True, sqlite_only: bool = False) -> Flask:
+    """Minimal app bound to a temporary SQLite file (or BENCH_DATABASE_URL,
+    unless a db_path is given or sqlite_only), with the app's engine profile
+    unless sqlite_profile is False."""
+    app = Flask(__name__)
+    postgres = BENCH_DATABASE_URL is not None and db_path is None and not sqlite_only
+    if postgres:
+        app.config["SQLALCHEMY_DATABASE_URI"] = BENCH_DATABASE_URL
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = POSTGRES_ENGINE_OPTIONS
+    else:
+        if db_path is None:
+            fd, db_path = tempfile.mkstemp(suffix=".db")
+            os.close(fd)
+        app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    with app.app_context():
+        if sqlite_profile:
+            apply_sqlite_profile(db.engine)
+        if postgres:
+            db.drop_all()
+        db.create_all()
+    return app
+
+
+def synthetic_jobs(n: int, family_size: int = 5, mutate: float = 0.2, seed: int = 7) -> list[dict]:
+    """Jobs in families of near-duplicates: each family shares a base description
+    with `mutate` of its words replaced per member."""
+    rng = random.Random(seed)
+    jobs = []
+    while len(jobs) < n:
+        base = [rng.choice(WORDS) for _ in range(60)]
+        title = rng.choice(TITLES)
+        company = rng.choice(COMPANIES)
+        for _ in range(family_size):
+            words = [rng.choice(WORDS) if rng.random() < mutate else w for w in base]
+            i = len(jobs)
+            jobs.append({
+                "title": title.title(),
+                "company": company,
+                "description": " ".join(words),
+                "source": "bench",
+                "unique_key": f"bench_{i}",
+                "job_id": str(i),
+                "family": len(jobs) // family_size,
+            })
+            if len(jobs) >= n:
+                break
+    return jobs
+
+
+@contextmanager
+def timed(label: str, results: dict):
+    start = time.perf_counter()
+    yield
+    results[label] = time.perf_counter() - start
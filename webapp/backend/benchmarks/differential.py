@@ -0,0 +1,336 @@
+"""Differential harness: live scorer / title filter / dedup vs the frozen reference.
+
+    python -m benchmarks.differential --jobs 20000
+    python -m benchmarks.differential --ndjson jobs.ndjson --db ../database.db
+
+Runs benchmarks/reference.py (the code as of 70ded9d) and the live
+implementation over a generated corpus, the labelled fixture pairs and any
+recorded corpora given (NDJSON job dumps, or the jobs table of a database).
+It reports:
+- score_job: mismatches in hard-filter reason, score, tags or experience_ok;
+- hard filters on long descriptions: the same jobs' texts, each after
+  ~2 KB of text that passes every filter, rejected by one implementation
+  and kept by the other;
+- title filter: titles kept by one implementation and rejected by the other;
+- dedup key: jobs sharing a reference key that the live key splits apart
+  (the live key may merge more: company canonicalization);
+- dedup decision: jobs the reference dropped as in-batch duplicates that
+  the live code keeps. Not counted as mismatches, only reported: extra
+  duplicates caught by the live code (SimHash), reference drops where only
+  the first 200 characters of two different descriptions matched, and
+  reference drops on descriptions too short for a SimHash (MIN_FEATURES).
+It also times each pair. Both scorers get their filter settings loaded once
+(the reference loaded them per job, which would dominate its timing), so
+the timings compare the checks themselves. The cheap checks are timed as
+the best of three runs. Exits 1 if any mismatch is found.
+"""
+
+import argparse
+import copy
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import benchmarks.reference as ref
+from service_scoring import score_job, load_filters
+from service_rules import build_score_rules, build_title_rules
+from service_dedup import dedup_key, simhash
+import service_scraper
+from benchmarks.common import make_app
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "duplicate_pairs.json")
+
+BOOST = [{"keyword": "sql", "weight": 2.0}, {"keyword": "python", "weight": 1.5},
+         {"keyword": "tableau", "weight": 1.0}, {"keyword": "product", "weight": 1.0},
+         {"keyword": "stakeholder", "weight": 0.5}, {"keyword": "A/B testing", "weight": 1.0}]
+EXCLUDE = [{"keyword": "senior", "weight": 2.0}, {"keyword": "lead", "weight": 2.0},
+           {"keyword": "sales", "weight": 3.0}]
+
+PREFIXES = ["", "", "", "Senior ", "Junior ", "Associate ", "Lead ", "Principal ", "Intern ",
+            "Graduate ", "Head of ", "Staff "]
+ROLES = ["Data Analyst", "Product Analyst", "Business Analyst", "Insight Analyst", "Product Manager",
+         "Analyst", "Data Scientist", "Software Engineer", "IT Analyst", "Analytics Engineer",
+         "Marketing Executive", "Sales Analyst", "Financial Analyst"]
+SUFFIXES = ["", "", "", " (Contract)", " - 6 month FTC", " - French speaker", " - Fintech", " II",
+            " - Remote", " (Maternity Cover)", " 12 month", " - Temp ", " - Mandarin Speaker",
+            " (7+ years)", " - Summer"]
+COMPANIES = ["Monzo", "Monzo Bank Ltd", "The Acme Group plc", "Acme", "Revolut", "Revolut Ltd",
+             "Deliveroo", "Wise", "Wise plc", "Ocado Group", "Société Générale", "Marks & Spencer"]
+SENTENCES = [
+    "You will own dashboards in SQL and Tableau.", "Experience with Python and A/B testing.",
+    "3+ years of experience in analytics.", "7 years experience in a similar role.",
+    "2-4 years in product analytics.", "We use generative AI and LLM tooling daily.",
+    "AI is core to our product.", "This is a 6 month contract.", "Duration: 12 months.",
+    "Fluent German required.", "Inside IR35, day rate negotiable.", "This is a temporary role.",
+    "Salary £35,000 - £40,000.", "Up to £55k plus bonus.", "Paying £60,000.", "Competitive salary.",
+    "Work with stakeholders across product and engineering.", "Senior stakeholders rely on you.",
+    "You will support the sales team.", "Hybrid working from our London office.",
+    "Lead analyst on a squad of five.", "Artificial intelligence experience is a plus.",
+    "10+ years managing teams.", "Agentic workflows are on the roadmap.",
+    "We value curiosity and ownership.", "Remote-first with quarterly offsites.",
+    "Strong communication skills.", "Knowledge of dbt and BigQuery.", "12 month fixed term.",
+]
+SALARIES = ["", "", "£30,000", "£45,000 - £55,000", "£60k", "Competitive", "£400 per day",
+            "£24,000 - £35,000", "£70,000"]
+
+
+def generate_corpus(n: int, seed: int = 11) -> list[dict]:
+    """Synthetic jobs exercising every hard filter, with cross-source
+    duplicates (reformatted, suffixed company, prefixed description)."""
+    rng = random.Random(seed)
+    jobs = []
+    while len(jobs) < n:
+        i = len(jobs)
+        if jobs and rng.random() < 0.3:
+            base = rng.choice(jobs[-200:])
+            job = dict(base, source=rng.choice(["linkedin", "google", "jungle"]), job_id=str(i),
+                       unique_key=f"gen_{i}")
+            variant = rng.randrange(4)
+            if variant == 0:
+                job["description"] = "  ".join(job["description"].upper().split(" "))
+            elif variant == 1:
+                job["company"] = job["company"] + rng.choice([" Ltd", " plc", " Limited", " Group"])
+            elif variant == 2:
+                job["description"] = "Job via aggregator. Apply now! " + job["description"]
+            else:
+                job["salary"] = rng.choice(SALARIES)
+            jobs.append(job)
+            continue
+        jobs.append({
+            "title": rng.choice(PREFIXES) + rng.choice(ROLES) + rng.choice(SUFFIXES),
+            "company": rng.choice(COMPANIES) if rng.random() < 0.5 else f"Company {rng.randrange(3000)}",
+            "description": " ".join(rng.choice(SENTENCES) for _ in range(rng.randint(2, 14))),
+            "salary": rng.choice(SALARIES),
+            "source": "adzuna",
+            "job_id": str(i),
+            "unique_key": f"gen_{i}",
+        })
+    return jobs
+
+
+def fixture_corpus() -> list[dict]:
+    with open(FIXTURE, encoding="utf-8") as f:
+        pairs = json.load(f)["pairs"]
+    jobs = []
+    for p in pairs:
+        for side in ("a", "b"):
+            jobs.append({**p[side], "salary": "", "source": f"fixture_{side}", "job_id": p["id"],
+                         "unique_key": f"fixture_{p['id']}_{side}"})
+    return jobs
+
+
+def ndjson_corpus(path: str) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [_as_job(json.loads(line), i) for i, line in enumerate(f) if line.strip()]
+
+
+def db_corpus(path: str) -> list[dict]:
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute("SELECT title, company, description, salary, source, job_id, unique_key "
+                        "FROM jobs ORDER BY id").fetchall()
+    conn.close()
+    return [_as_job(dict(r), i) for i, r in enumerate(rows)]
+
+
+def _as_job(row: dict, i: int) -> dict:
+    return {
+        "title": row.get("title") or "",
+        "company": row.get("company") or "",
+        "description": row.get("description") or "",
+        "salary": row.get("salary") or "",
+        "source": row.get("source") or "recorded",
+        "job_id": str(row.get("job_id") or i),
+        "unique_key": row.get("unique_key") or f"recorded_{i}",
+    }
+
+
+# ---------- comparisons ----------
+
+def _timed(fn, repeat: int = 1):
+    """fn()'s result and its best time over `repeat` runs."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def compare_scores(jobs: list[dict], filters: dict, report: dict):
+    ref_filters = ref._get_filters()
+    load = ref._get_filters
+    ref._get_filters = lambda: ref_filters
+    try:
+        ref_out, ref_t = _timed(lambda: [ref.score_job(dict(j), BOOST, EXCLUDE) for j in jobs], repeat=3)
+    finally:
+        ref._get_filters = load
+    new_out, new_t = _timed(lambda: [score_job(dict(j), BOOST, EXCLUDE, filters) for j in jobs], repeat=3)
+    for job, a, b in zip(jobs, ref_out, new_out):
+        tags_a, tags_b = json.loads(a["match_tags"]), json.loads(b["match_tags"])
+        reason_a = tags_a[0] if a["match_score"] == -99 else None
+        reason_b = tags_b[0] if b["match_score"] == -99 else None
+        if reason_a != reason_b:
+            kind = "hard-filter reason"
+        elif a["match_score"] != b["match_score"]:
+            kind = "score"
+        elif tags_a != tags_b:
+            kind = "tags"
+        elif a["experience_ok"] != b["experience_ok"]:
+            kind = "experience_ok"
+        else:
+            continue
+        report["mismatches"][f"score_job: {kind}"].append(
+            (job["title"], (a["match_score"], tags_a), (b["match_score"], tags_b)))
+    report["timings"]["score_job"] = (len(jobs), ref_t, new_t)
+
+
+def _ref_hard_filtered(text: str, min_salary: int) -> bool:
+    return (ref._salary_below_minimum(text, min_salary) or ref._is_contract_job(text)
+            or ref._requires_other_language(text) or ref._exceeds_max_experience(text))
+
+
+def long_texts(jobs: list[dict], n: int = 2000, length: int = 2000) -> list[str]:
+    """Description-sized texts: sentences of jobs passing every filter up to
+    `length` characters, then one job's own text, which decides the outcome
+    (so a check scans the whole text before it fails)."""
+    rng = random.Random(5)
+    texts = [(j["title"] + " " + j["description"] + " " + j["salary"]).lower() for j in jobs]
+    benign = [t for t in texts if not _ref_hard_filtered(t, 45000)]
+    out = []
+    for text in rng.sample(texts, min(n, len(texts))):
+        parts = []
+        while sum(map(len, parts)) < length:
+            parts.append(rng.choice(benign))
+        out.append(" ".join(parts) + " " + text)
+    return out
+
+
+def compare_hard_filters(texts: list[str], filters: dict, report: dict):
+    min_salary = int(ref._get_filters().get("min_salary", 45000))
+    rules = build_score_rules(filters)
+    ref_out, ref_t = _timed(lambda: [_ref_hard_filtered(t, min_salary) for t in texts], repeat=3)
+    new_out, new_t = _timed(lambda: [rules.first_failure(t) is not None for t in texts], repeat=3)
+    for text, a, b in zip(texts, ref_out, new_out):
+        if a != b:
+            report["mismatches"]["hard filters (long text)"].append((text[-120:], a, b))
+    report["timings"]["hard filters (long text)"] = (len(texts), ref_t, new_t)
+
+
+def compare_title_filter(jobs: list[dict], filters: dict, report: dict):
+    titles = [j["title"] for j in jobs]
+    rules = build_title_rules(filters)
+    ref_out, ref_t = _timed(lambda: [ref._passes_title_filter(t) for t in titles], repeat=3)
+    new_out, new_t = _timed(lambda: [service_scraper._passes_title_filter(t, rules) for t in titles], repeat=3)
+    for title, a, b in zip(titles, ref_out, new_out):
+        if a != b:
+            report["mismatches"]["title filter"].append((title, a, b))
+    report["timings"]["title filter"] = (len(titles), ref_t, new_t)
+
+
+def compare_dedup_keys(jobs: list[dict], report: dict):
+    pairs = [(j["title"], j["company"]) for j in jobs]
+    ref_keys, ref_t = _timed(lambda: [ref._dedup_key(t, c) for t, c in pairs], repeat=3)
+    new_keys, new_t = _timed(lambda: [dedup_key(t, c) for t, c in pairs], repeat=3)
+    by_ref = defaultdict(set)
+    by_new = defaultdict(set)
+    for a, b in zip(ref_keys, new_keys):
+        by_ref[a].add(b)
+        by_new[b].add(a)
+    for a, live in by_ref.items():
+        if len(live) > 1:
+            report["mismatches"]["dedup key split"].append((a, sorted(live), None))
+    report["info"]["dedup keys merged by canonicalization"] = sum(1 for v in by_new.values() if len(v) > 1)
+    report["timings"]["dedup key"] = (len(pairs), ref_t, new_t)
+
+
+def _same_description(a: dict, b: dict) -> bool:
+    return " ".join((a.get("description") or "").lower().split()) == \
+        " ".join((b.get("description") or "").lower().split())
+
+
+def compare_dedup_decisions(name: str, jobs: list[dict], report: dict):
+    ref_batch, batch = copy.deepcopy(jobs), copy.deepcopy(jobs)
+    ref_out, ref_t = _timed(lambda: ref.dedup_batch(ref_batch))
+    kept, new_t = _timed(lambda: service_scraper.dedup_batch(batch, datetime.now(timezone.utc)))
+    kept_ids = {id(j) for j in kept}
+    extra = collisions = short = 0
+    for job, copied, decision in zip(jobs, batch, ref_out):
+        live_kept = id(copied) in kept_ids
+        if decision is None:
+            extra += not live_kept
+            continue
+        if not live_kept:
+            continue
+        partner, reason = decision
+        other = jobs[partner]
+        if reason == "description" and not _same_description(job, other):
+            # Only the first 200 characters matched: a reference false positive
+            collisions += 1
+            continue
+        if reason == "description" and simhash(job["description"]) is None:
+            # Too short to fingerprint: the live rule deliberately leaves these alone
+            short += 1
+            continue
+        report["mismatches"][f"dedup decision: reference duplicate ({reason}) kept"].append(
+            (f"{name}: {job['title']} @ {job['company']}",
+             f"duplicate of {other['title']} @ {other['company']}", "kept"))
+    report["info"][f"{name}: extra duplicates caught"] = extra
+    report["info"][f"{name}: reference prefix-fingerprint collisions kept"] = collisions
+    report["info"][f"{name}: reference drops on descriptions too short to fingerprint"] = short
+    report["timings"][f"dedup batch ({name})"] = (len(jobs), ref_t, new_t)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=20000, help="generated corpus size")
+    parser.add_argument("--ndjson", action="append", default=[], help="recorded NDJSON job dump")
+    parser.add_argument("--db", action="append", default=[], help="SQLite database with a jobs table")
+    parser.add_argument("--examples", type=int, default=5)
+    args = parser.parse_args()
+
+    corpora = {"generated": generate_corpus(args.jobs), "fixture": fixture_corpus()}
+    for path in args.ndjson:
+        corpora[os.path.basename(path)] = ndjson_corpus(path)
+    for path in args.db:
+        corpora[os.path.basename(path)] = db_corpus(path)
+    everything = [j for jobs in corpora.values() for j in jobs]
+
+    report = {"mismatches": defaultdict(list), "info": {}, "timings": {}}
+    app = make_app()
+    with app.app_context():
+        filters = load_filters()
+        compare_scores(everything, filters, report)
+        compare_hard_filters(long_texts(everything), filters, report)
+        compare_title_filter(everything, filters, report)
+        compare_dedup_keys(everything, report)
+        for name, jobs in corpora.items():
+            compare_dedup_decisions(name, jobs, report)
+
+    print("corpora:  " + ", ".join(f"{name} {len(jobs)}" for name, jobs in corpora.items()))
+    print()
+    print(f"{'check':<28} {'cases':>7} {'reference':>11} {'live':>10} {'speedup':>8}")
+    for name, (n, ref_t, new_t) in report["timings"].items():
+        print(f"{name:<28} {n:>7} {ref_t * 1000:>9.0f}ms {new_t * 1000:>8.0f}ms {ref_t / new_t:>7.1f}x")
+    print()
+    for name, value in report["info"].items():
+        print(f"{name}: {value}")
+    print()
+    if not report["mismatches"]:
+        print("no mismatches")
+        return 0
+    for kind, items in report["mismatches"].items():
+        print(f"MISMATCH {kind}: {len(items)}")
+        for case, a, b in items[:args.examples]:
+            print(f"    {case!r}\n        reference: {a}\n        live:      {b}")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""Check the list endpoints' queries use the migration 2 indexes.
+
+    python -m benchmarks.explain_plans --jobs 20000
+
+Builds a database without the list query indexes (as a database.db created
+before migrations), runs migrate(), and checks both migrations are recorded.
+It then seeds synthetic jobs, applications and keywords, and calls each
+endpoint shape. Every SELECT issued is captured and run through
+EXPLAIN QUERY PLAN. A check passes when:
+- one of its statements uses the expected index, and
+- none of its statements sorts the result set in a temp b-tree.
+Exits 1 on any failure.
+"""
+
+import argparse
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event, inspect, text
+
+from models import db, JobRecord, JobApplication, UserKeyword, SearchSession, SchemaMigration
+from migrations import MIGRATIONS, migrate
+from service_dedup import dedup_key, company_key
+import service_top_candidates as top_candidates
+from api_jobs import jobs_bp
+from api_applications import applications_bp
+from api_keywords import keywords_bp
+from benchmarks.common import make_app, synthetic_jobs
+
+MIGRATION_INDEXES = {
+    "jobs": ["ix_jobs_rank", "ix_jobs_source_rank", "ix_jobs_session_rank", "ix_jobs_recent"],
+    "job_applications": ["ix_job_applications_job_id", "ix_job_applications_status"],
+    "user_keywords": ["ix_user_keywords_category"],
+}
+
+# (label, url, index expected in the plan); {cursor} is filled with the
+# next_cursor of the same URL's first page
+CHECKS = [
+    ("jobs by score", "/api/jobs?page=2", "ix_jobs_rank"),
+    ("jobs by score, min_score", "/api/jobs?page=2&min_score=5", "ix_jobs_rank"),
+    ("jobs by date", "/api/jobs?sort=date", "ix_jobs_recent"),
+    ("jobs by source", "/api/jobs?page=2&source=linkedin", "ix_jobs_source_rank"),
+    ("jobs by session", "/api/jobs?session_id=3", "ix_jobs_session_rank"),
+    ("jobs by score, cursor", "/api/jobs?cursor={cursor}", "ix_jobs_rank"),
+    ("jobs by date, cursor", "/api/jobs?sort=date&cursor={cursor}", "ix_jobs_recent"),
+    ("jobs hiding dismissed", "/api/jobs?page=2&hide_dismissed=true", "ix_job_applications_status"),
+    ("applications by status", "/api/applications?status=applied", "ix_job_applications_status"),
+    ("keywords", "/api/keywords", "ix_user_keywords_category"),
+]
+
+
+def legacy_schema():
+    """Drop the indexes migration 2 adds and forget it ran."""
+    for table, names in MIGRATION_INDEXES.items():
+        for name in names:
+            db.session.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    db.session.query(SchemaMigration).delete()
+    db.session.commit()
+
+
+def seed(n_jobs: int, rng: random.Random):
+    now = datetime.now(timezone.utc)
+    db.session.execute(SearchSession.__table__.insert(), [{"sources": "bench"} for _ in range(20)])
+    sources = ["linkedin", "indeed", "seek", "glassdoor"]
+    db.session.execute(JobRecord.__table__.insert(), [{
+        "title": j["title"], "company": j["company"], "description": j["description"],
+        "source": rng.choice(sources), "unique_key": j["unique_key"], "job_id": j["job_id"],
+        "dedup_key": dedup_key(j["title"], j["company"]), "company_key": company_key(j["company"]),
+        "match_score": rng.uniform(0, 20), "experience_ok": True,
+        "search_session_id": rng.randint(1, 20),
+        "first_seen_at": now - timedelta(minutes=rng.randint(0, 60 * 24 * 90)),
+    } for j in synthetic_jobs(n_jobs, family_size=1)])
+    statuses = ["interested", "applied", "interview", "rejected", "not_interested"]
+    job_ids = rng.sample(range(1, n_jobs + 1), min(n_jobs, n_jobs // 10))
+    db.session.execute(JobApplication.__table__.insert(), [{
+        "job_id": jid, "status": rng.choice(statuses),
+        "updated_at": now - timedelta(minutes=rng.randint(0, 60 * 24 * 30)),
+    } for jid in job_ids])
+    db.session.execute(UserKeyword.__table__.insert(), [{
+        "keyword": f"kw{i}", "category": rng.choice(["boost", "exclude"]), "weight": rng.uniform(0.5, 3),
+    } for i in range(200)])
+    top_candidates.rebuild()
+    db.session.commit()
+
+
+def plans(statements) -> list[tuple[str, list[str]]]:
+    result = []
+    with db.engine.connect() as conn:
+        for statement, params in statements:
+            rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", params).all()
+            result.append((statement, [r[-1] for r in rows]))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=20000)
+    parser.add_argument("-v", "--verbose", action="store_true", help="print every plan")
+    args = parser.parse_args()
+
+    app = make_app(sqlite_only=True)  # SQLite query plans
+    for bp in (jobs_bp, applications_bp, keywords_bp):
+        app.register_blueprint(bp)
+    client = app.test_client()
+    failures = 0
+
+    with app.app_context():
+        legacy_schema()
+        ran = migrate()
+        recorded = {v for (v,) in db.session.query(SchemaMigration.version).all()}
+        created = {i["name"] for t in MIGRATION_INDEXES for i in inspect(db.engine).get_indexes(t)}
+        missing = [n for names in MIGRATION_INDEXES.values() for n in names if n not in created]
+        ok = ran == len(MIGRATIONS) and recorded == {v for v, _, _ in MIGRATIONS} and not missing
+        failures += not ok
+        print(f"{'ok' if ok else 'FAIL':<4}  migrate(): {ran} applied, recorded {sorted(recorded)}"
+              + (f", missing {missing}" if missing else ""))
+
+        seed(args.jobs, random.Random(11))
+
+        captured = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                captured.append((statement, parameters))
+        event.listen(db.engine, "before_cursor_execute", capture)
+
+        for label, url, index in CHECKS:
+            if "{cursor}" in url:
+                first = client.get(url.format(cursor="")).get_json()
+                url = url.format(cursor=first["next_cursor"])
+            captured.clear()
+            resp = client.get(url)
+            statements = plans(list(captured))
+            used = any(index in line for _, lines in statements for line in lines)
+            sorted_in_temp = [line for _, lines in statements for line in lines
+                              if "TEMP B-TREE FOR ORDER BY" in line]
+            ok = resp.status_code == 200 and used and not sorted_in_temp
+            failures += not ok
+            print(f"{'ok' if ok else 'FAIL':<4}  {label:<26} {url}")
+            if not ok or args.verbose:
+                for statement, lines in statements:
+                    print(f"        {' '.join(statement.split())[:150]}")
+                    for line in lines:
+                        print(f"          {line}")
+
+        event.remove(db.engine, "before_cursor_execute", capture)
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Check list endpoints issue the same number of SQL statements for any N.
+
+    python -m benchmarks.query_counts
+
+Grows the database in steps of N jobs, each with an application and two
+feedbacks. At each step it counts the statements one request executes (a
+before_cursor_execute listener) for each endpoint. An endpoint whose count
+changes with N has an N+1 and fails the check. Exits 1 on any failure.
+"""
+
+import sys
+
+from sqlalchemy import event
+
+from models import db, JobRecord, JobApplication, ApplicationFeedback
+from service_dedup import dedup_key, company_key
+from service_similarity import term_counts, job_text
+import service_similar_jobs as similar_index
+import service_top_candidates as top_candidates
+from api_jobs import jobs_bp
+from api_applications import applications_bp
+from benchmarks.common import make_app, synthetic_jobs
+
+STEPS = (2, 10, 100)  # from 2, so job 1 has a similar job
+ENDPOINTS = [
+    "/api/applications",
+    "/api/applications?status=applied",
+    "/api/jobs?per_page=500&page=2",
+    "/api/jobs?per_page=500&cursor=",
+    "/api/jobs/1/similar?limit=50",
+]
+
+
+def add_jobs(jobs: list[dict]):
+    """Store jobs (indexed for similar jobs), each with an application and two feedbacks."""
+    rows = [{
+        "title": j["title"], "company": j["company"], "description": j["description"],
+        "source": "bench", "unique_key": j["unique_key"], "job_id": j["job_id"],
+        "dedup_key": dedup_key(j["title"], j["company"]), "company_key": company_key(j["company"]),
+        "match_score": 5,
+    } for j in jobs]
+    db.session.execute(JobRecord.__table__.insert(), rows)
+    ids = dict(db.session.query(JobRecord.unique_key, JobRecord.id).filter(
+        JobRecord.unique_key.in_([r["unique_key"] for r in rows])).all())
+    similar_index.add_to_index([(ids[j["unique_key"]], term_counts(job_text(j)).keys()) for j in jobs])
+    for j in jobs:
+        app = JobApplication(job_id=ids[j["unique_key"]], status="applied")
+        db.session.add(app)
+        db.session.flush()
+        db.session.add_all([ApplicationFeedback(application_id=app.id, feedback_type="note",
+                                                feedback_text=f"feedback {i}") for i in range(2)])
+    top_candidates.rebuild()
+    db.session.commit()
+
+
+def main():
+    app = make_app()
+    app.register_blueprint(jobs_bp)
+    app.register_blueprint(applications_bp)
+    client = app.test_client()
+    # One family: every job is similar to job 1
+    jobs = synthetic_jobs(max(STEPS), family_size=max(STEPS), mutate=0.05)
+
+    counts = {url: [] for url in ENDPOINTS}
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    stored = 0
+    for n in STEPS:
+        with app.app_context():
+            add_jobs(jobs[stored:n])
+        stored = n
+        # Requests run outside that context, each with a fresh session as in
+        # the app: rows cached from earlier requests would hide statements
+        event.listen(engine, "before_cursor_execute", count)
+        for url in ENDPOINTS:
+            statements.clear()
+            resp = client.get(url)
+            assert resp.status_code == 200, (url, resp.status_code)
+            counts[url].append(len(statements))
+        event.remove(engine, "before_cursor_execute", count)
+
+    failures = 0
+    print(f"{'endpoint':<36}" + "".join(f"{'N=' + str(n):>8}" for n in STEPS))
+    for url, row in counts.items():
+        ok = len(set(row)) == 1
+        failures += not ok
+        print(f"{url:<36}" + "".join(f"{c:>8}" for c in row) + ("" if ok else "   FAIL (grows with N)"))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+"""Frozen reference implementations for the differential harness.
+
+Verbatim copies of the scorer, scraper title filter and in-batch dedup
+helpers as they stood at the baseline commit (70ded9d), before the
+rule-program, SimHash and company-canonicalization changes. Do not edit:
+benchmarks/differential.py compares the live code against these.
+"""
+
+import re
+import json
+
+
+# ---------- service_scoring.py @ 70ded9d ----------
+
+# Experience keywords that indicate >5 years required
+EXPERIENCE_EXCLUDE = [
+    "6+ years", "7+ years", "8+ years", "10+ years",
+    "12+ years", "15+ years",
+    "6 years experience", "7 years experience",
+    "8 years experience", "10 years experience",
+]
+
+# Contract keywords
+CONTRACT_KEYWORDS = [
+    "contract", "contractor", "freelance", "freelancer",
+    "fixed term", "fixed-term", "temporary",
+    "ftc", " month ftc", "month contract",
+    "6 month", "12 month", "3 month", "9 month",
+    "maternity cover", "paternity cover",
+    "interim", "inside ir35", "outside ir35", "day rate", "ir35",
+]
+
+# Language requirements to exclude
+LANGUAGE_EXCLUDE = [
+    "french", "german", "spanish", "italian", "portuguese",
+    "dutch", "japanese", "korean", "arabic", "russian",
+    "turkish", "polish", "hindi", "swedish", "norwegian",
+    "danish", "finnish", "greek", "hebrew", "czech",
+    "hungarian", "romanian", "thai", "vietnamese",
+]
+
+
+def _exceeds_max_experience(text: str, max_years: int = 5) -> bool:
+    """Check if description requires more than max_years experience."""
+    for kw in EXPERIENCE_EXCLUDE:
+        if kw in text:
+            return True
+    years_match = re.findall(r'(\d+)\+?\s*years?', text)
+    for y in years_match:
+        if int(y) > max_years:
+            return True
+    return False
+
+
+def _is_contract_job(text: str) -> bool:
+    """Check if text indicates a contract role."""
+    for kw in CONTRACT_KEYWORDS:
+        if kw in text:
+            return True
+    if re.search(r'\b(contract|contractor|ftc)\b', text):
+        return True
+    # "6 month contract/ftc/fixed"
+    if re.search(r'\d+[\s-]?months?\s*(contract|ftc|fixed)', text):
+        return True
+    # "Duration: 6 months" or "duration: 12 months"
+    if re.search(r'duration[:\s]+\d+\s*months?', text):
+        return True
+    # "X month role/position/assignment/placement"
+    if re.search(r'\d+[\s-]?months?\s*(role|position|assignment|placement|engagement)', text):
+        return True
+    return False
+
+
+def _requires_other_language(text: str) -> bool:
+    """Check if job requires a language other than Chinese/English."""
+    for lang in LANGUAGE_EXCLUDE:
+        if lang in text:
+            return True
+    return False
+
+
+def _get_filters():
+    """Load filter settings from DB (with fallback to defaults)."""
+    try:
+        from api_filters import get_all_filters
+        return get_all_filters()
+    except Exception:
+        return {
+            "min_salary": 45000,
+            "max_experience_years": 5,
+            "contract_keywords": CONTRACT_KEYWORDS,
+            "language_exclude": LANGUAGE_EXCLUDE,
+        }
+
+
+def _salary_below_minimum(text: str, min_salary: int = 45000) -> bool:
+    """Check if a stated salary is below the minimum threshold.
+
+    For salary ranges like '£24,000 - £35,000', filters if the highest
+    value in the range is still below the minimum.
+    """
+    # Match patterns like £30,000, £30000, £30k
+    matches = re.findall(r'£\s*([\d,]+)\s*(?:k|K)?', text)
+    if not matches:
+        return False
+
+    # Parse all salary values found
+    salaries = []
+    for m in matches:
+        val = int(m.replace(',', ''))
+        if val < 1000:
+            val *= 1000
+        # Only consider values that look like annual salaries
+        if 15000 <= val <= 500000:
+            salaries.append(val)
+
+    if not salaries:
+        return False
+
+    # If the highest salary in the text is below minimum, filter it out
+    max_salary = max(salaries)
+    return max_salary < min_salary
+
+
+def score_job(job_dict: dict, boost_keywords: list, exclude_keywords: list) -> dict:
+    """Score a job using user-defined keywords with weights.
+
+    Hard filters applied first:
+    - Must not require >5 years experience -> score -99 if exceeds
+    - Must not be a contract role -> score -99 if contract
+    - Salary must be >= £45,000 if stated
+
+    Args:
+        job_dict: dict with title, description, etc.
+        boost_keywords: list of {"keyword": str, "weight": float}
+        exclude_keywords: list of {"keyword": str, "weight": float}
+
+    Returns:
+        Updated job_dict with match_score, match_tags, experience_ok.
+    """
+    text = (job_dict.get("title", "") + " " + job_dict.get("description", "") + " " + job_dict.get("salary", "")).lower()
+    score = 0.0
+    tags = []
+    experience_ok = True
+
+    # Load dynamic filters from DB
+    filters = _get_filters()
+
+    # Hard filter: salary below minimum
+    if _salary_below_minimum(text, filters.get("min_salary", 45000)):
+        job_dict["match_score"] = -99
+        job_dict["match_tags"] = json.dumps(["❌salary <£45k"])
+        job_dict["experience_ok"] = False
+        return job_dict
+
+    # Hard filter: no contract jobs
+    if _is_contract_job(text):
+        job_dict["match_score"] = -99
+        job_dict["match_tags"] = json.dumps(["❌contract"])
+        job_dict["experience_ok"] = False
+        return job_dict
+
+    # Hard filter: no non-Chinese/English language requirements
+    if _requires_other_language(text):
+        job_dict["match_score"] = -99
+        job_dict["match_tags"] = json.dumps(["❌language requirement"])
+        job_dict["experience_ok"] = False
+        return job_dict
+
+    # Hard filter: no more than 5 years experience required
+    if _exceeds_max_experience(text):
+        job_dict["match_score"] = -99
+        job_dict["match_tags"] = json.dumps(["❌>5yr experience"])
+        job_dict["experience_ok"] = False
+        return job_dict
+
+    # Hard filter: exclude keyword in the job TITLE → always reject
+    # (soft scoring still applies when keyword is only in description)
+    title_text = job_dict.get("title", "").lower()
+    for kw_data in exclude_keywords:
+        kw = kw_data["keyword"].lower()
+        if kw in title_text:
+            job_dict["match_score"] = -99
+            job_dict["match_tags"] = json.dumps([f"❌{kw_data['keyword']}"])
+            job_dict["experience_ok"] = False
+            return job_dict
+
+    # Boost keywords
+    for kw_data in boost_keywords:
+        kw = kw_data["keyword"].lower()
+        weight = kw_data.get("weight", 1.0)
+        if kw in text:
+            score += weight
+            tags.append(f"⭐{kw_data['keyword']}")
+
+    # Exclude / warning keywords
+    for kw_data in exclude_keywords:
+        kw = kw_data["keyword"].lower()
+        weight = kw_data.get("weight", 2.0)
+        if kw in text:
+            score -= weight
+            tags.append(f"⚠️{kw_data['keyword']}")
+            experience_ok = False
+
+    # AI bonus (not required, but still a positive signal)
+    if any(kw in text for kw in ["genai", "generative ai", "llm", "agentic"]):
+        score += 2
+        tags.append("🤖AI")
+    elif " ai " in f" {text} " or "artificial intelligence" in text:
+        score += 1
+        tags.append("🤖AI")
+
+    # Experience year detection (bonus for <=5 years)
+    years_match = re.findall(r'(\d+)\+?\s*years?', text)
+    for y in years_match:
+        yr = int(y)
+        if yr <= 5:
+            score += 1
+
+    job_dict["match_score"] = round(score, 2)
+    job_dict["match_tags"] = json.dumps(tags)
+    job_dict["experience_ok"] = experience_ok
+    return job_dict
+
+
+# ---------- service_scraper.py @ 70ded9d ----------
+
+# Title filters - target roles
+TITLE_MUST_CONTAIN = [
+    "analyst",  # any role containing analyst
+    "product manager",  # includes associate/junior/senior product manager
+]
+
+TITLE_EXCLUDE = [
+    "scientist", "data scientist", "research scientist",
+    "engineer", "software engineer", "backend engineer", "frontend engineer",
+    "DevOps engineer", "QA engineer", "test engineer",
+    "director", "VP", "vice president", "head of", "chief",
+    "principal", "staff", "distinguished", "partner",
+    "6+ years", "7+ years", "8+ years", "10+ years",
+    "6 years", "7 years", "8 years", "10 years", "12 years", "15 years",
+    "intern", "internship", "graduate programme", "graduate program",
+    "graduate scheme", "entry level trainee",
+    "apprentice", "apprenticeship", "placement year",
+    "C++ developer", "Java developer",
+    "iOS developer", "Android developer",
+    "accountant", "solicitor", "nurse", "warehouse", "driver",
+    "IT ", "IT analyst", "summer",
+    # Training / bootcamp posts (not real jobs)
+    "job guarantee", "bootcamp", "training programme", "course",
+    # Analyst roles: exclude associate/junior/intern prefix
+    "associate analyst", "junior analyst", "intern analyst",
+    "associate data analyst", "junior data analyst",
+    "associate product analyst", "junior product analyst",
+    "associate business analyst", "junior business analyst",
+    "associate insight analyst", "junior insight analyst",
+]
+
+# Contract job keywords
+SCRAPER_CONTRACT_KEYWORDS = [
+    "contract", "contractor", "freelance", "freelancer",
+    "fixed term", "fixed-term", "temp ",
+    "FTC", "ftc", " month ftc", "month contract",
+    "6 month", "12 month", "3 month", "9 month",
+    "maternity cover", "paternity cover", "temporary",
+    "interim", "inside ir35", "outside ir35", "day rate", "ir35",
+]
+
+# Language requirements to exclude (keep only Chinese/English roles)
+SCRAPER_LANGUAGE_EXCLUDE = [
+    "french", "german", "spanish", "italian", "portuguese",
+    "dutch", "japanese", "korean", "arabic", "russian",
+    "turkish", "polish", "hindi", "swedish", "norwegian",
+    "danish", "finnish", "greek", "hebrew", "czech",
+    "hungarian", "romanian", "thai", "vietnamese",
+    "mandarin speaker", "cantonese speaker",
+]
+
+
+def _passes_title_filter(title: str) -> bool:
+    t = title.lower()
+    if TITLE_MUST_CONTAIN:
+        if not any(kw.lower() in t for kw in TITLE_MUST_CONTAIN):
+            return False
+    if TITLE_EXCLUDE:
+        if any(kw.lower() in t for kw in TITLE_EXCLUDE):
+            return False
+    # Exclude contract jobs from title
+    for kw in SCRAPER_CONTRACT_KEYWORDS:
+        if kw.lower() in t:
+            return False
+    # Exclude jobs requiring non-Chinese/English languages in title
+    for lang in SCRAPER_LANGUAGE_EXCLUDE:
+        if lang.lower() in t:
+            return False
+    return True
+
+
+# Nested in fetch_and_store_jobs @ 70ded9d
+def _dedup_key(title: str, company: str) -> str:
+    t = re.sub(r'[^a-z0-9]', '', title.lower())
+    c = re.sub(r'[^a-z0-9]', '', company.lower())
+    return f"{c}_{t}"
+
+
+def _desc_fingerprint(description: str) -> str | None:
+    """First 200 chars of description, normalised. None if description too short."""
+    fp = re.sub(r'\s+', ' ', (description or "").lower().strip())[:200]
+    return fp if len(fp) >= 50 else None  # ignore very short/empty descriptions
+
+
+def dedup_batch(all_raw_jobs: list[dict]) -> list[tuple | None]:
+    """The in-batch dedup loop of fetch_and_store_jobs @ 70ded9d. Returns, per
+    job, None if it was kept, else (index of the job it duplicated, "key" or
+    "description")."""
+    seen_dedup = {}   # title+company key -> job_data
+    seen_desc = {}    # description fingerprint -> job_data
+    index = {}        # id(job_data) -> position
+    decisions = []
+    for i, job_data in enumerate(all_raw_jobs):
+        index[id(job_data)] = i
+        dk = _dedup_key(job_data["title"], job_data["company"])
+        fp = _desc_fingerprint(job_data.get("description", ""))
+
+        # Check duplicate by title+company
+        if dk in seen_dedup:
+            existing = seen_dedup[dk]
+            decisions.append((index[id(existing)], "key"))
+            if (not existing.get("salary") and job_data.get("salary")) or \
+               (not existing.get("description") and job_data.get("description")):
+                seen_dedup[dk] = job_data
+                if fp:
+                    seen_desc[fp] = job_data
+            continue
+
+        # Check duplicate by description fingerprint (same job, different title)
+        if fp and fp in seen_desc:
+            decisions.append((index[id(seen_desc[fp])], "description"))
+            continue
+
+        seen_dedup[dk] = job_data
+        if fp:
+            seen_desc[fp] = job_data
+        decisions.append(None)
+    return decisions
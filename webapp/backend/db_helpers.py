@@ -0,0 +1,237 @@
+"""Dialect-aware SQL helpers shared by the services."""
+
+import os
+import logging
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no gunicorn, a single app process
+    fcntl = None
+
+from sqlalchemy import event, inspect, text
+
+from models import db, AppMeta
+
+logger = logging.getLogger(__name__)
+
+# Engine options for a PostgreSQL DATABASE_URL, per process: each gunicorn
+# worker holds up to DB_POOL_SIZE idle connections (request thread + db_writer)
+# and opens up to DB_MAX_OVERFLOW more under load. Sessions run in UTC, as the
+# app stores naive UTC timestamps.
+POSTGRES_ENGINE_OPTIONS = {
+    "pool_size": int(os.environ.get("DB_POOL_SIZE", "5")),
+    "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", "10")),
+    "pool_timeout": int(os.environ.get("DB_POOL_TIMEOUT", "30")),
+    "pool_recycle": int(os.environ.get("DB_POOL_RECYCLE", "1800")),
+    "pool_pre_ping": True,
+    "connect_args": {"options": "-c timezone=UTC -c statement_timeout="
+                                f"{int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', '120000'))}"},
+}
+
+def database_config(basedir: str) -> dict:
+    """Flask-SQLAlchemy settings for DATABASE_URL, or the SQLite file
+    database.db in basedir when it is unset."""
+    url = os.environ.get("DATABASE_URL") or f"sqlite:///{os.path.join(basedir, 'database.db')}"
+    if url.startswith("postgres://"):  # Heroku/Render style
+        url = "postgresql://" + url[len("postgres://"):]
+    config = {"SQLALCHEMY_DATABASE_URI": url}
+    if url.startswith("postgresql"):
+        logger.warning("PostgreSQL is not a supported store: it has not been run or tested, "
+                       "SQLite is (see README)")
+        config["SQLALCHEMY_ENGINE_OPTIONS"] = POSTGRES_ENGINE_OPTIONS
+    return config
+
+
+# Applied to every SQLite connection. WAL lets readers run alongside the
+# writer; busy_timeout makes a second writer (another gunicorn worker) wait
+# instead of failing with "database is locked".
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "15000")),
+    "mmap_size": int(os.environ.get("SQLITE_MMAP_MB", "256")) * 1024 * 1024,
+    "cache_size": -int(os.environ.get("SQLITE_CACHE_MB", "64")) * 1024,  # negative = KiB
+    "temp_store": "MEMORY",
+}
+
+
+def apply_sqlite_profile(engine):
+    """Set SQLITE_PRAGMAS on each new connection and let SQLAlchemy emit BEGIN
+    itself (pysqlite's implicit BEGIN breaks savepoints). A connection procured
+    with execution option sqlite_immediate=True begins with BEGIN IMMEDIATE,
+    taking the write lock up front (db_writer). No-op for other databases."""
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_conn, _record):
+        dbapi_conn.isolation_level = None
+        cursor = dbapi_conn.cursor()
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    @event.listens_for(engine, "begin")
+    def _on_begin(conn):
+        immediate = conn.get_execution_options().get("sqlite_immediate")
+        conn.exec_driver_sql("BEGIN IMMEDIATE" if immediate else "BEGIN")
+
+
+def begin_write():
+    """Begin the session's transaction holding the write lock (BEGIN IMMEDIATE
+    on SQLite), so a read-then-write request waits for other writers instead
+    of failing when its snapshot is stale. Call before the session's first
+    query; a no-op once it has a connection."""
+    db.session.connection(execution_options={"sqlite_immediate": True})
+
+
+# pg_advisory_lock key of startup_lock(), shared by every app instance
+STARTUP_LOCK_KEY = 0x6A6F6273
+
+
+@contextmanager
+def startup_lock():
+    """Hold a lock across processes for the startup schema and backfill steps
+    (create_app, migrations.py). Every gunicorn worker runs them: the first
+    one in migrates and backfills, the others wait, then find nothing left
+    to do. PostgreSQL takes an advisory lock; SQLite locks <database>.lock,
+    since a BEGIN IMMEDIATE would block the steps' own connections."""
+    engine = db.engine
+    if engine.dialect.name == "postgresql":
+        with engine.connect() as conn:
+            # Wait as long as the first worker's migrations take
+            conn.execute(text("SET statement_timeout = 0"))
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": STARTUP_LOCK_KEY})
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": STARTUP_LOCK_KEY})
+                conn.execute(text("RESET statement_timeout"))
+                conn.commit()
+        return
+    path = engine.url.database
+    if engine.dialect.name != "sqlite" or fcntl is None or not path or path == ":memory:":
+        yield
+        return
+    with open(path + ".lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def dialect_insert(table):
+    """INSERT construct supporting ON CONFLICT on SQLite/PostgreSQL, None elsewhere."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        return insert(table)
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        return insert(table)
+    return None
+
+
+def insert_ignore(table, rows: list[dict]):
+    """Insert rows, silently skipping ones that hit a unique constraint."""
+    if not rows:
+        return
+    stmt = dialect_insert(table)
+    stmt = stmt.on_conflict_do_nothing() if stmt is not None else table.insert()
+    db.session.execute(stmt, rows)
+
+
+def upsert(table, rows: list[dict], key: list[str], update: list[str]):
+    """Insert rows, or update the `update` columns of rows whose `key`
+    columns already exist (ON CONFLICT DO UPDATE), safe against concurrent
+    writers on other instances. Rows must have distinct keys."""
+    if not rows:
+        return
+    stmt = dialect_insert(table)
+    if stmt is None:
+        for row in rows:
+            where = [table.c[k] == row[k] for k in key]
+            if not db.session.execute(table.update().where(*where).values(
+                    {c: row[c] for c in update})).rowcount:
+                db.session.execute(table.insert(), [row])
+        return
+    stmt = stmt.on_conflict_do_update(index_elements=key, set_={c: stmt.excluded[c] for c in update})
+    db.session.execute(stmt, rows)
+
+
+def ensure_column(model, name: str) -> bool:
+    """Add a column (and its indexes) that db.create_all() won't add to an
+    existing table. Returns True if it was missing."""
+    table = model.__table__
+    existing = {c["name"] for c in inspect(db.engine).get_columns(table.name)}
+    if name in existing:
+        return False
+    column = table.c[name]
+    col_type = column.type.compile(dialect=db.engine.dialect)
+    with db.engine.begin() as conn:
+        conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {name} {col_type}'))
+        for index in table.indexes:
+            if name in index.columns:
+                index.create(conn, checkfirst=True)
+    return True
+
+
+def ensure_index(model, name: str) -> bool:
+    """Create an index declared on the model on an existing table. Returns
+    True if it was missing."""
+    index = next(i for i in model.__table__.indexes if i.name == name)
+    existing = {i["name"] for i in inspect(db.engine).get_indexes(model.__table__.name)}
+    if name in existing:
+        return False
+    with db.engine.begin() as conn:
+        index.create(conn)
+    return True
+
+
+def existing_values(column, values, chunk: int = 500) -> set:
+    """The subset of `values` present in `column`, with one IN query per chunk."""
+    values = list(set(values))
+    found = set()
+    for i in range(0, len(values), chunk):
+        found.update(r[0] for r in db.session.query(column).filter(
+            column.in_(values[i:i + chunk])).distinct().all())
+    return found
+
+
+def existing_map(key_column, value_column, keys, chunk: int = 500, *criteria) -> dict:
+    """{key: value} for the `keys` present in `key_column`, with one IN query
+    per chunk. Extra `criteria` narrow the rows considered."""
+    keys = list(set(keys))
+    found = {}
+    for i in range(0, len(keys), chunk):
+        found.update(db.session.query(key_column, value_column).filter(
+            key_column.in_(keys[i:i + chunk]), *criteria).all())
+    return found
+
+
+def insert_ignore_returning(table, rows: list[dict], conflict_column: str, *returning) -> list:
+    """Insert rows with ON CONFLICT (conflict_column) DO NOTHING as one
+    executemany; returns `returning` columns of the rows actually inserted."""
+    if not rows:
+        return []
+    stmt = dialect_insert(table)
+    if stmt is None:
+        taken = existing_values(table.c[conflict_column], [r[conflict_column] for r in rows])
+        rows = [r for r in rows if r[conflict_column] not in taken]
+        if not rows:
+            return []
+        stmt = table.insert()
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=[conflict_column])
+    return db.session.execute(stmt.returning(*returning), rows).all()
+
+
+def get_meta(name: str) -> str | None:
+    return db.session.query(AppMeta.value).filter(AppMeta.name == name).scalar()
+
+
+def set_meta(name: str, value: str):
+    """Record a marker in app_meta. Caller commits."""
+    upsert(AppMeta.__table__, [{"name": name, "value": value}], ["name"], ["value"])
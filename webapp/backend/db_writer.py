@@ -0,0 +1,157 @@
+"""Single writer queue for long write jobs (search ingest, rescore).
+
+SQLite has one writer at a time. A request that does its scoring inside a
+write transaction makes every other writer wait, and fail with "database is
+locked" once busy_timeout runs out. Long jobs instead compute outside any
+write transaction, then hand the writes to this queue:
+
+    result = db_writer.run(store_results, rows)
+
+One background thread per process applies queued jobs. Consecutive jobs are
+batched into one short transaction, up to WRITE_BATCH jobs, with a savepoint
+each, so a failing job rolls back alone. The transaction begins with
+BEGIN IMMEDIATE on SQLite, so a writer in another gunicorn worker is waited
+for (busy_timeout) rather than failing part-way. Jobs run in their own app
+context and session; they must not commit themselves, and should return
+plain data rather than ORM objects. run() waits up to WRITE_TIMEOUT seconds,
+and fails early if the writer thread dies under its job.
+
+Short read-then-write requests are marked @short_write instead: they take
+the write lock up front (see init_app).
+"""
+
+import os
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+from flask import current_app, request
+
+from models import db
+from db_helpers import begin_write
+
+logger = logging.getLogger(__name__)
+
+WRITE_BATCH = int(os.environ.get("WRITE_BATCH", "32"))
+WRITE_TIMEOUT = float(os.environ.get("WRITE_TIMEOUT", "600"))
+LIVENESS_INTERVAL = 1.0  # seconds between checks that the writer thread is alive
+
+_queue = queue.Queue()
+_thread = None
+_start_lock = threading.Lock()
+
+
+def _ensure_thread():
+    global _thread
+    with _start_lock:
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(target=_worker, name="db-writer", daemon=True)
+            _thread.start()
+
+
+def _worker():
+    while True:
+        batch = [_queue.get()]
+        while len(batch) < WRITE_BATCH:
+            try:
+                item = _queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+        # Jobs of different apps (only in scripts) get separate transactions
+        while batch:
+            app = batch[0][0]
+            same = [item for item in batch if item[0] is app]
+            batch = [item for item in batch if item[0] is not app]
+            try:
+                _run_batch(app, same)
+            except Exception as e:
+                # Keep the thread alive for the next jobs; fail these ones
+                logger.error(f"Writer failed outside a transaction: {e}")
+                for _, _, _, future in same:
+                    if not future.done():
+                        future.set_exception(e)
+
+
+def _run_batch(app, batch):
+    with app.app_context():
+        done = []
+        try:
+            db.session.connection(execution_options={"sqlite_immediate": True})
+            for _, fn, args, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    with db.session.begin_nested():
+                        result = fn(*args)
+                except Exception as e:
+                    future.set_exception(e)
+                else:
+                    done.append((future, result))
+            db.session.commit()
+        except Exception as e:
+            logger.error(f"Write batch of {len(batch)} failed: {e}")
+            db.session.rollback()
+            for future, _ in done:
+                future.set_exception(e)
+            return
+    for future, result in done:
+        future.set_result(result)
+
+
+def short_write(view):
+    """Mark a short read-then-write view: it begins its transaction holding
+    the write lock (see init_app)."""
+    view.short_write = True
+    return view
+
+
+def init_app(app):
+    """Requests to @short_write views take the write lock before the view
+    runs (begin_write), so their read-then-write waits for other writers
+    instead of failing on a stale snapshot. Nothing else does: a request
+    that computes before or between its writes (resume parsing, retraining,
+    search) would hold the lock, and block every other writer, meanwhile."""
+    @app.before_request
+    def begin_request_writes():
+        view = app.view_functions.get(request.endpoint)
+        if getattr(view, "short_write", False):
+            begin_write()
+
+
+def submit(fn, *args) -> Future:
+    """Queue fn(*args) to run in the writer's transaction."""
+    future = Future()
+    _queue.put((current_app._get_current_object(), fn, args, future))
+    _ensure_thread()
+    return future
+
+
+def run(fn, *args, timeout: float = WRITE_TIMEOUT):
+    """Run fn(*args) on the writer and return its result (re-raising its error).
+
+    Ends the caller's own transaction first (commit), so its read snapshot
+    doesn't hold up the writer. Called from the writer thread, runs inline.
+    Raises TimeoutError after `timeout` seconds (a job still queued is
+    cancelled; one already running may yet commit), and RuntimeError if the
+    writer thread died while running it.
+    """
+    if threading.current_thread() is _thread:
+        return fn(*args)
+    db.session.commit()
+    future = submit(fn, *args)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return future.result(timeout=max(0.0, min(LIVENESS_INTERVAL, deadline - time.monotonic())))
+        except FutureTimeout:
+            pass
+        if not _thread.is_alive():
+            if future.running():
+                raise RuntimeError(f"db writer thread died running {getattr(fn, '__name__', fn)}")
+            _ensure_thread()  # still queued: a new thread picks it up
+        if time.monotonic() >= deadline:
+            future.cancel()
+            raise TimeoutError(f"db writer: {getattr(fn, '__name__', fn)} not done after {timeout:.0f}s")
@@ -0,0 +1,173 @@
+"""Versioned schema migrations.
+
+db.create_all() creates missing tables but never alters existing ones, so a
+live database (database.db, or DATABASE_URL) only gains new columns and
+indexes through a migration. The steps go through the SQLAlchemy inspector
+and DDL, so the same migrations run on SQLite and PostgreSQL.
+Each migration runs once, in version order, and is recorded in
+schema_migrations. They are idempotent, so a database that already has a
+change (created fresh by create_all, or patched before this runner
+existed) just records it.
+
+Runs at startup (create_app) under db_helpers.startup_lock, so that of
+several gunicorn workers one applies them and the others find them
+recorded, or ahead of a deploy with:
+
+    python migrations.py            # apply pending migrations
+    python migrations.py --status   # list applied / pending
+
+With AUTO_MIGRATE=0 the app refuses to start while migrations are pending.
+Data backfills (dedup keys, sightings, ...) stay in the services' ensure_*
+steps, which run after the schema is current.
+"""
+
+import os
+import logging
+
+from sqlalchemy import MetaData, inspect, text
+from sqlalchemy.schema import CreateTable
+
+from models import db, JobRecord, JobApplication, UserKeyword, SearchSession, ArchivedJob, SchemaMigration
+from db_helpers import ensure_column, ensure_index, apply_sqlite_profile, database_config, startup_lock
+
+logger = logging.getLogger(__name__)
+
+AUTO_MIGRATE = os.environ.get("AUTO_MIGRATE", "1") != "0"
+
+
+def _dedup_columns():
+    """Columns added by the dedup work (formerly ensure_indexed)."""
+    for name in ("dedup_key", "company_key", "merged_into_id", "repost_of_id"):
+        ensure_column(JobRecord, name)
+
+
+def _list_query_indexes():
+    """Composite indexes for the list_jobs / list_applications / keywords
+    query shapes (declared in models.py)."""
+    for model, name in (
+        (JobRecord, "ix_jobs_rank"),
+        (JobRecord, "ix_jobs_source_rank"),
+        (JobRecord, "ix_jobs_session_rank"),
+        (JobRecord, "ix_jobs_recent"),
+        (JobApplication, "ix_job_applications_job_id"),
+        (JobApplication, "ix_job_applications_status"),
+        (UserKeyword, "ix_user_keywords_category"),
+    ):
+        ensure_index(model, name)
+
+
+def _search_session_status():
+    """Progress of a search whose results are stored chunk by chunk."""
+    ensure_column(SearchSession, "status")
+
+
+def _jobs_autoincrement():
+    """Never reuse a jobs id (see JobRecord). SQLite can't add AUTOINCREMENT
+    to a table, so jobs is rebuilt (copy, drop, rename, re-index); its id
+    counter then starts past every id handed out, archived ones included.
+    Ids reused before this migration stay as they are. PostgreSQL: nothing
+    to do."""
+    if db.engine.dialect.name != "sqlite":
+        return
+    table = JobRecord.__table__
+    with db.engine.begin() as conn:
+        ddl = conn.execute(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'jobs'")).scalar()
+        if "AUTOINCREMENT" not in ddl.upper():
+            # A copy of the model's table under another name; its foreign key
+            # needs search_sessions in the same metadata to compile
+            metadata = MetaData()
+            SearchSession.__table__.to_metadata(metadata)
+            conn.execute(CreateTable(table.to_metadata(metadata, name="jobs_rebuild")))
+            columns = ", ".join(c["name"] for c in inspect(conn).get_columns("jobs") if c["name"] in table.c)
+            conn.execute(text(f"INSERT INTO jobs_rebuild ({columns}) SELECT {columns} FROM jobs"))
+            conn.execute(text("DROP TABLE jobs"))
+            conn.execute(text("ALTER TABLE jobs_rebuild RENAME TO jobs"))
+            for index in table.indexes:
+                index.create(conn)
+        high = conn.execute(text(f"SELECT max(id) FROM {ArchivedJob.__tablename__}")).scalar() or 0
+        seq = conn.execute(text("SELECT seq FROM sqlite_sequence WHERE name = 'jobs'")).scalar()
+        if seq is None:
+            conn.execute(text("INSERT INTO sqlite_sequence (name, seq) VALUES ('jobs', :high)"), {"high": high})
+        elif seq < high:
+            conn.execute(text("UPDATE sqlite_sequence SET seq = :high WHERE name = 'jobs'"), {"high": high})
+
+
+MIGRATIONS = [
+    (1, "dedup columns", _dedup_columns),
+    (2, "list query indexes", _list_query_indexes),
+    (3, "search session status", _search_session_status),
+    (4, "jobs ids never reused", _jobs_autoincrement),
+]
+
+
+def applied_versions() -> set:
+    if not inspect(db.engine).has_table(SchemaMigration.__tablename__):
+        return set()
+    return {v for (v,) in db.session.query(SchemaMigration.version).all()}
+
+
+def pending() -> list:
+    done = applied_versions()
+    return [m for m in MIGRATIONS if m[0] not in done]
+
+
+def migrate() -> int:
+    """Apply pending migrations in order; returns how many ran."""
+    todo = pending()
+    # The steps run DDL on their own connections: end this session's read
+    # transaction, whose snapshot SQLite wouldn't let write afterwards
+    db.session.commit()
+    if todo:
+        SchemaMigration.__table__.create(db.engine, checkfirst=True)
+    for version, name, step in todo:
+        logger.info(f"Migration {version}: {name}")
+        step()
+        db.session.add(SchemaMigration(version=version, name=name))
+        db.session.commit()
+    return len(todo)
+
+
+def ensure_current():
+    """Startup hook: migrate, or with AUTO_MIGRATE=0 fail if anything is pending."""
+    if AUTO_MIGRATE:
+        migrate()
+        return
+    todo = pending()
+    if todo:
+        raise RuntimeError(f"{len(todo)} schema migration(s) pending "
+                           f"(first: {todo[0][0]} {todo[0][1]}); run: python migrations.py")
+
+
+def main():
+    import argparse
+    from flask import Flask
+
+    parser = argparse.ArgumentParser(description="Apply pending schema migrations to DATABASE_URL "
+                                                 "(default database.db)")
+    parser.add_argument("--status", action="store_true", help="list migrations without applying")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(name)s - %(message)s')
+    basedir = os.path.abspath(os.path.dirname(__file__))
+    app = Flask(__name__)
+    app.config.update(database_config(basedir))
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    with app.app_context():
+        apply_sqlite_profile(db.engine)
+        if args.status:
+            if db.engine.dialect.name == "sqlite" and not os.path.exists(db.engine.url.database):
+                print("database.db does not exist yet")
+                return
+            done = applied_versions()
+            for version, name, _ in MIGRATIONS:
+                print(f"{version:>4}  {'applied' if version in done else 'pending':<8} {name}")
+            return
+        with startup_lock():
+            db.create_all()
+            ran = migrate()
+        print(f"{ran} migration(s) applied")
+
+
+if __name__ == "__main__":
+    main()
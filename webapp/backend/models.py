@@ -57,6 +57,10 @@ class UserKeyword(db.Model):
         }
 
 
+# GET /api/keywords order
+db.Index("ix_user_keywords_category", UserKeyword.category, UserKeyword.weight.desc())
+
+
 class SearchSession(db.Model):
     __tablename__ = "search_sessions"
     id = db.Column(db.Integer, primary_key=True)
@@ -64,8 +68,19 @@ class SearchSession(db.Model):
     total_results = db.Column(db.Integer, default=0)
     sources = db.Column(db.String(200))
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    status = db.Column(db.String(20))  # storing / complete / partial / failed (None: sessions before chunked storing)
     jobs = db.relationship("JobRecord", backref="search_session", lazy=True)
 
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "query_text": self.query_text,
+            "total_results": self.total_results,
+            "sources": self.sources,
+            "status": self.status,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
+
 
 class JobRecord(db.Model):
     __tablename__ = "jobs"
@@ -73,6 +88,8 @@ class JobRecord(db.Model):
     job_id = db.Column(db.String(200))
     source = db.Column(db.String(50))
     unique_key = db.Column(db.String(500), unique=True)
+    dedup_key = db.Column(db.String(800), index=True)  # canonical company + normalized title
+    company_key = db.Column(db.String(300), index=True)  # canonical company (service_company)
     title = db.Column(db.String(500))
     company = db.Column(db.String(300))
     location = db.Column(db.String(300))
@@ -85,9 +102,22 @@ class JobRecord(db.Model):
     experience_ok = db.Column(db.Boolean, default=True)
     search_session_id = db.Column(db.Integer, db.ForeignKey("search_sessions.id"))
     first_seen_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    # References to other jobs, and the per-job dedup index tables below, have
+    # no foreign key: the job may be archived (service_archive), which keeps
+    # them. SQLite never enforced them; PostgreSQL would.
+    # Set on pre-dedup duplicate rows folded into another record (service_job_sources)
+    merged_into_id = db.Column(db.Integer, index=True)
+    # Earlier posting of the same role this one reposts (service_reposts)
+    repost_of_id = db.Column(db.Integer, index=True)
 
     application = db.relationship("JobApplication", backref="job", uselist=False, lazy=True)
 
+    # Ids are never reused: archiving deletes rows, newest ones included, whose
+    # ids live on in archived_jobs, job_sources and the dedup index tables.
+    # SQLite would otherwise hand out max(id) + 1 again (PostgreSQL sequences
+    # never go back).
+    __table_args__ = {"sqlite_autoincrement": True}
+
     def to_dict(self):
         import json
         tags = []
@@ -113,10 +143,42 @@ class JobRecord(db.Model):
             "experience_ok": self.experience_ok,
             "search_session_id": self.search_session_id,
             "first_seen_at": self.first_seen_at.isoformat() if self.first_seen_at else None,
+            "repost_of_id": self.repost_of_id,
             "application": self.application.to_dict() if self.application else None,
         }
 
 
+# GET /api/jobs query shapes (migration 2): visible rows (merged_into_id IS NULL)
+# in score order, the same per source / search session, and newest first
+db.Index("ix_jobs_rank", JobRecord.merged_into_id, JobRecord.match_score.desc(), JobRecord.id)
+db.Index("ix_jobs_source_rank", JobRecord.source, JobRecord.match_score.desc(), JobRecord.id)
+db.Index("ix_jobs_session_rank", JobRecord.search_session_id, JobRecord.match_score.desc(), JobRecord.id)
+db.Index("ix_jobs_recent", JobRecord.merged_into_id, JobRecord.first_seen_at)
+
+
+class JobSource(db.Model):
+    """One sighting of a job on a source; every sighting of the same job
+    points at one canonical JobRecord (see service_job_sources)."""
+    __tablename__ = "job_sources"
+    id = db.Column(db.Integer, primary_key=True)
+    job_record_id = db.Column(db.Integer, nullable=False, index=True)  # jobs.id, hot or archived
+    source = db.Column(db.String(50))
+    external_id = db.Column(db.String(200))
+    unique_key = db.Column(db.String(500), unique=True, nullable=False)
+    url = db.Column(db.Text)
+    salary = db.Column(db.String(200))
+    first_seen_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    def to_dict(self):
+        return {
+            "source": self.source,
+            "external_id": self.external_id,
+            "url": self.url,
+            "salary": self.salary,
+            "first_seen_at": self.first_seen_at.isoformat() if self.first_seen_at else None,
+        }
+
+
 class JobApplication(db.Model):
     __tablename__ = "job_applications"
     id = db.Column(db.Integer, primary_key=True)
@@ -143,6 +205,12 @@ class JobApplication(db.Model):
         }
 
 
+# Lookups by job (create, hide_dismissed, processed keys) and the
+# GET /api/applications?status= order
+db.Index("ix_job_applications_job_id", JobApplication.job_id)
+db.Index("ix_job_applications_status", JobApplication.status, JobApplication.updated_at)
+
+
 class ApplicationFeedback(db.Model):
     __tablename__ = "application_feedback"
     id = db.Column(db.Integer, primary_key=True)
@@ -168,3 +236,147 @@ class ApplicationFeedback(db.Model):
             "keywords_mentioned": kw,
             "created_at": self.created_at.isoformat() if self.created_at else None,
         }
+
+
+class ScoreCacheEntry(db.Model):
+    __tablename__ = "score_cache"
+    id = db.Column(db.Integer, primary_key=True)
+    keywords_version = db.Column(db.String(40), nullable=False)
+    filters_version = db.Column(db.String(40), nullable=False)
+    content_hash = db.Column(db.String(40), nullable=False)
+    match_score = db.Column(db.Float, default=0)
+    match_tags = db.Column(db.Text)  # JSON
+    experience_ok = db.Column(db.Boolean, default=True)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        db.UniqueConstraint("keywords_version", "filters_version", "content_hash",
+                            name="uq_score_cache_key"),
+    )
+
+
+class TopCandidate(db.Model):
+    """Materialized top-N jobs by match_score, maintained by service_top_candidates."""
+    __tablename__ = "top_candidates"
+    job_id = db.Column(db.Integer, db.ForeignKey("jobs.id"), primary_key=True)
+    match_score = db.Column(db.Float, nullable=False)
+    source = db.Column(db.String(50))
+    application_status = db.Column(db.String(20))
+
+    __table_args__ = (
+        db.Index("ix_top_candidates_rank", "match_score", "job_id"),
+    )
+
+
+class TermStat(db.Model):
+    """Document frequency per term over the stored job corpus (TF-IDF vocabulary)."""
+    __tablename__ = "term_stats"
+    term = db.Column(db.String(100), primary_key=True)
+    doc_freq = db.Column(db.Integer, nullable=False, default=0)
+
+
+class TextVector(db.Model):
+    """Cached sparse term-frequency vector for a job or the resume."""
+    __tablename__ = "text_vectors"
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)  # job / resume
+    ref_id = db.Column(db.Integer, nullable=False)   # jobs.id, or 0 for the resume
+    terms = db.Column(db.Text, nullable=False)       # JSON {term: count}
+
+    __table_args__ = (
+        db.UniqueConstraint("kind", "ref_id", name="uq_text_vectors_ref"),
+    )
+
+
+class MinHashSignature(db.Model):
+    """MinHash signature of a job's title + description tokens (similar-jobs index)."""
+    __tablename__ = "minhash_signatures"
+    job_id = db.Column(db.Integer, db.ForeignKey("jobs.id"), primary_key=True)
+    signature = db.Column(db.LargeBinary, nullable=False)
+
+
+class LshBucket(db.Model):
+    """LSH band bucket membership; (band, bucket) lookups find candidate similar jobs."""
+    __tablename__ = "lsh_buckets"
+    band = db.Column(db.Integer, primary_key=True)
+    bucket = db.Column(db.BigInteger, primary_key=True)
+    job_id = db.Column(db.Integer, db.ForeignKey("jobs.id"), primary_key=True)
+
+
+class DescriptionFingerprint(db.Model):
+    """64-bit SimHash of a job description (NULL when too short to fingerprint)."""
+    __tablename__ = "desc_fingerprints"
+    job_id = db.Column(db.Integer, primary_key=True, autoincrement=False)  # jobs.id, hot or archived
+    company_key = db.Column(db.String(200), index=True)
+    simhash = db.Column(db.BigInteger)  # stored signed
+
+
+class SimHashBucket(db.Model):
+    """Block-pair table keys of description fingerprints, for Hamming-radius lookups."""
+    __tablename__ = "simhash_buckets"
+    bucket = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.Integer, primary_key=True)  # jobs.id, hot or archived
+
+
+class CompanySimHashBlock(db.Model):
+    """8-bit blocks of description fingerprints per company key, for the
+    wider same-company Hamming radius (service_dedup)."""
+    __tablename__ = "company_simhash_blocks"
+    company_key = db.Column(db.String(200), primary_key=True)
+    block = db.Column(db.Integer, primary_key=True)  # block number << 8 | block value
+    job_id = db.Column(db.Integer, primary_key=True)  # jobs.id, hot or archived
+
+
+class ProcessedKey(db.Model):
+    """dedup_key of a job with an application (see service_processed_keys)."""
+    __tablename__ = "processed_keys"
+    dedup_key = db.Column(db.String(800), primary_key=True)
+
+
+class AppMeta(db.Model):
+    """Small key/value store for data-version markers (e.g. dedup key format)."""
+    __tablename__ = "app_meta"
+    name = db.Column(db.String(100), primary_key=True)
+    value = db.Column(db.Text)
+
+
+class CompanyAlias(db.Model):
+    """Company key learned to be another name for `canonical` (see service_company)."""
+    __tablename__ = "company_aliases"
+    alias = db.Column(db.String(300), primary_key=True)
+    canonical = db.Column(db.String(300), nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+
+class CompanyAliasEvidence(db.Model):
+    """A stored job confirmed as a duplicate of a posting under another company
+    key, for an alias that needs more than one (see service_company)."""
+    __tablename__ = "company_alias_evidence"
+    alias = db.Column(db.String(300), primary_key=True)
+    canonical = db.Column(db.String(300), primary_key=True)
+    job_id = db.Column(db.Integer, primary_key=True)  # the stored job matched
+
+
+class ArchivedJob(db.Model):
+    """Lookup entry of a job moved to cold storage (see service_archive): the
+    gzip block holding its row, and the keys dedup and repost detection use."""
+    __tablename__ = "archived_jobs"
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)  # its jobs.id
+    segment = db.Column(db.String(200), nullable=False)  # file in ARCHIVE_FOLDER
+    block_offset = db.Column(db.Integer, nullable=False)
+    block_length = db.Column(db.Integer, nullable=False)
+    dedup_key = db.Column(db.String(800), index=True)
+    company_key = db.Column(db.String(300), index=True)
+    title = db.Column(db.String(500))
+    company = db.Column(db.String(300))
+    merged_into_id = db.Column(db.Integer)
+    first_seen_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+
+class SchemaMigration(db.Model):
+    """Schema migration applied to this database (see migrations.py)."""
+    __tablename__ = "schema_migrations"
+    version = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(200), nullable=False)
+    applied_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
@@ -0,0 +1,202 @@
+"""Cold storage for old jobs nobody acted on.
+
+The jobs table only grows, while the UI reads recent postings and jobs with
+an application. archive_jobs() moves jobs first seen more than
+RETENTION_DAYS ago that have no application out of the hot tables into
+compressed NDJSON segments under ARCHIVE_FOLDER:
+- one segment file per run of up to ARCHIVE_BATCH jobs, written as blocks
+  of BLOCK_JOBS rows, each block its own gzip member: `zcat` reads the
+  whole file, and one block decompresses on its own;
+- archived_jobs is the lookup index: per job, its segment and block, plus
+  the keys dedup and repost detection match on.
+
+An archived job still counts as stored. Its job_sources sightings and
+description fingerprints stay, and find_stored_keys() / stored_postings()
+also read archived_jobs, so seeing it again is a duplicate, or a repost
+linked to its id, rather than a new job. GET /api/jobs/<id> serves it from
+its block, and an application on it moves it back (restore()).
+
+Its text vector, MinHash signature and top-candidate entry are dropped, so
+TF-IDF and "more like this" cover hot jobs only.
+"""
+
+import os
+import gzip
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+
+from models import db, JobRecord, JobApplication, ArchivedJob, TopCandidate
+from service_similarity import term_counts, job_text, index_jobs, unindex_jobs
+import service_similar_jobs as similar_index
+import service_top_candidates as top_candidates
+import db_writer
+
+logger = logging.getLogger(__name__)
+
+RETENTION_DAYS = int(os.environ.get("JOB_RETENTION_DAYS", "30"))
+ARCHIVE_BATCH = 5000
+BLOCK_JOBS = 200
+LOOKUP_CHUNK = 500
+
+_COLUMNS = list(JobRecord.__table__.c)
+_DATETIMES = {c.name for c in _COLUMNS if isinstance(c.type, db.DateTime)}
+
+
+def archive_folder() -> str:
+    return current_app.config.get("ARCHIVE_FOLDER") or \
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "archive")
+
+
+def _encode(row: dict) -> str:
+    return json.dumps({name: value.isoformat() if name in _DATETIMES and value else value
+                       for name, value in row.items()}, separators=(",", ":"))
+
+
+def _decode(line: str) -> dict:
+    row = json.loads(line)
+    for name in _DATETIMES:
+        if row.get(name):
+            row[name] = datetime.fromisoformat(row[name])
+    return row
+
+
+def _write_segment(rows: list[dict], now) -> tuple[str, dict]:
+    """Write rows as a new segment; returns its name and {job id: (offset, length)}."""
+    folder = archive_folder()
+    os.makedirs(folder, exist_ok=True)
+    name = f"jobs-{now:%Y%m%d%H%M%S}-{rows[0]['id']}-{rows[-1]['id']}.ndjson.gz"
+    path = os.path.join(folder, name)
+    blocks = {}
+    with open(path + ".tmp", "wb") as f:
+        for i in range(0, len(rows), BLOCK_JOBS):
+            block = rows[i:i + BLOCK_JOBS]
+            data = gzip.compress("".join(_encode(r) + "\n" for r in block).encode("utf-8"), mtime=0)
+            offset = f.tell()
+            f.write(data)
+            blocks.update((r["id"], (offset, len(data))) for r in block)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + ".tmp", path)
+    return name, blocks
+
+
+def _read(entry: ArchivedJob) -> dict | None:
+    """The archived jobs row of an index entry (one block decompressed)."""
+    try:
+        with open(os.path.join(archive_folder(), entry.segment), "rb") as f:
+            f.seek(entry.block_offset)
+            data = f.read(entry.block_length)
+    except OSError as e:
+        logger.error(f"Archived job {entry.id}: segment {entry.segment} unreadable: {e}")
+        return None
+    for line in gzip.decompress(data).decode("utf-8").splitlines():
+        if json.loads(line)["id"] == entry.id:
+            return _decode(line)
+    return None
+
+
+def _candidates(cutoff, after_id: int, limit: int) -> list[dict]:
+    applied = db.session.query(JobApplication.id).filter(JobApplication.job_id == JobRecord.id).exists()
+    rows = db.session.query(*_COLUMNS).filter(
+        JobRecord.id > after_id, JobRecord.first_seen_at < cutoff, ~applied,
+    ).order_by(JobRecord.id).limit(limit).all()
+    return [row._asdict() for row in rows]
+
+
+def _move(segment: str, rows: list[dict], blocks: dict) -> int:
+    """Swap written rows for index entries (runs on the writer). Rows applied
+    to or removed since they were read stay as they are; returns how many
+    moved."""
+    moved = 0
+    for i in range(0, len(rows), LOOKUP_CHUNK):
+        chunk = rows[i:i + LOOKUP_CHUNK]
+        ids = [r["id"] for r in chunk]
+        applied = {j for (j,) in db.session.query(JobApplication.job_id).filter(
+            JobApplication.job_id.in_(ids)).all()}
+        present = {j for (j,) in db.session.query(JobRecord.id).filter(JobRecord.id.in_(ids)).all()}
+        chunk = [r for r in chunk if r["id"] in present and r["id"] not in applied]
+        if not chunk:
+            continue
+        ids = [r["id"] for r in chunk]
+        db.session.execute(ArchivedJob.__table__.insert(), [{
+            "id": r["id"], "segment": segment,
+            "block_offset": blocks[r["id"]][0], "block_length": blocks[r["id"]][1],
+            "dedup_key": r["dedup_key"], "company_key": r["company_key"],
+            "title": r["title"], "company": r["company"],
+            "merged_into_id": r["merged_into_id"], "first_seen_at": r["first_seen_at"],
+        } for r in chunk])
+        unindex_jobs(ids)
+        similar_index.remove_from_index(ids)
+        TopCandidate.query.filter(TopCandidate.job_id.in_(ids)).delete(synchronize_session=False)
+        JobRecord.query.filter(JobRecord.id.in_(ids)).delete(synchronize_session=False)
+        moved += len(ids)
+    return moved
+
+
+def archive_jobs(days: int = RETENTION_DAYS) -> dict:
+    """Move jobs first seen over `days` ago with no application to cold storage."""
+    now = datetime.now(timezone.utc)
+    cutoff = now - timedelta(days=days)
+    archived = segments = 0
+    after_id = 0
+    while True:
+        rows = _candidates(cutoff, after_id, ARCHIVE_BATCH)
+        if not rows:
+            break
+        after_id = rows[-1]["id"]
+        segment, blocks = _write_segment(rows, now)
+        moved = db_writer.run(_move, segment, rows, blocks)
+        if moved:
+            segments += 1
+            archived += moved
+        else:
+            os.remove(os.path.join(archive_folder(), segment))
+    if archived:
+        db_writer.run(top_candidates.rebuild)
+    logger.info(f"Archive: {archived} jobs first seen before {cutoff:%Y-%m-%d} moved "
+                f"to {segments} segments")
+    return {"archived": archived, "segments": segments, "cutoff": cutoff.isoformat()}
+
+
+def archived_record(job_id: int) -> JobRecord | None:
+    """An archived job as a detached JobRecord (no application), or None."""
+    entry = db.session.get(ArchivedJob, job_id)
+    row = _read(entry) if entry is not None else None
+    return JobRecord(**row) if row is not None else None
+
+
+def restore(job_id: int) -> bool:
+    """Move an archived job back to the hot tables (before giving it an
+    application). Returns False if it isn't archived. Caller commits."""
+    entry = db.session.get(ArchivedJob, job_id)
+    row = _read(entry) if entry is not None else None
+    if row is None:
+        return False
+    db.session.execute(JobRecord.__table__.insert(), [row])
+    counts = term_counts(job_text(row))
+    index_jobs([(job_id, counts)])
+    similar_index.add_to_index([(job_id, counts.keys())])
+    if row["merged_into_id"] is None:
+        top_candidates.add_jobs([row])
+    db.session.delete(entry)
+    return True
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Move old un-actioned jobs to cold storage")
+    parser.add_argument("--days", type=int, default=RETENTION_DAYS,
+                        help=f"archive jobs first seen more than this many days ago ({RETENTION_DAYS})")
+    args = parser.parse_args()
+
+    from app import app
+    with app.app_context():
+        print(archive_jobs(args.days))
+
+
+if __name__ == "__main__":
+    main()
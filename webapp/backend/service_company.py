@@ -0,0 +1,172 @@
+"""Canonical company names for dedup keys and the /api/jobs company filter.
+
+normalize_company folds case, accents and punctuation and strips legal or
+corporate suffixes ("ACME Group plc", "Acme Ltd." -> "acme"). It is
+LRU-cached: the ingest loop calls it several times per job for a few
+hundred distinct names.
+
+On top of that, company_aliases maps company keys seen on confirmed
+duplicates to the key already stored ("monzobank" -> "monzo"). An alias is
+learned at ingest when a posting's description is a near-duplicate of a
+stored posting with the same title under another company, and the names
+have the same tokens once suffixes are dropped ("Acme UK Digital" and
+"Acme Digital Ltd"). When one name's tokens only contain the other's
+("Monzo Bank" and "Monzo"), it takes ALIAS_MIN_EVIDENCE such duplicates of
+different stored jobs, so one recruiter reposting a client's job does not
+make the recruiter an alias of the client. Aliases live in memory: load_aliases()
+reads them at app start and after an ingest commits new ones. Learning
+them bumps the ALIASES_META marker in app_meta, so other workers see their
+map is stale and reload it (refresh_aliases, at ingest and for
+company-filtered list requests).
+"""
+
+import re
+import logging
+import unicodedata
+from functools import lru_cache
+
+from sqlalchemy import func, literal
+
+from models import (db, JobRecord, ArchivedJob, CompanyAlias, CompanyAliasEvidence, DescriptionFingerprint,
+                    CompanySimHashBlock)
+from db_helpers import insert_ignore, upsert, get_meta, set_meta
+import service_processed_keys as processed_keys
+
+logger = logging.getLogger(__name__)
+
+SUFFIXES = {
+    "ltd", "limited", "plc", "llp", "llc", "lp", "inc", "incorporated", "corp",
+    "corporation", "co", "company", "group", "holdings", "holding", "gmbh", "ag",
+    "sa", "bv", "nv", "uk", "international",
+}
+
+# app_meta marker, bumped whenever aliases are learned
+ALIASES_META = "company_aliases_version"
+
+# Confirmed duplicates (of distinct stored jobs) needed for an alias whose
+# name only contains the other's
+ALIAS_MIN_EVIDENCE = 2
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_aliases = {}   # company key -> canonical company key
+_aliases_version = None  # ALIASES_META value _aliases was loaded at
+
+
+def compact(text: str) -> str:
+    """Lowercase alphanumerics only (the form keys are built from)."""
+    return re.sub(r'[^a-z0-9]', '', (text or "").lower())
+
+
+@lru_cache(maxsize=8192)
+def normalize_company(name: str) -> str:
+    """Space-separated canonical tokens of a company name."""
+    text = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode("ascii")
+    tokens = _TOKEN_RE.findall(text.lower().replace("&", " and "))
+    if len(tokens) > 1 and tokens[0] == "the":
+        tokens = tokens[1:]
+    while len(tokens) > 1 and tokens[-1] in SUFFIXES:
+        tokens.pop()
+    return " ".join(tokens)
+
+
+def company_key(name: str) -> str:
+    """Canonical company key, after aliases."""
+    key = normalize_company(name).replace(" ", "")
+    return _aliases.get(key, key)
+
+
+def load_aliases():
+    """Refresh the in-memory alias map from the company_aliases table."""
+    global _aliases_version
+    _aliases_version = get_meta(ALIASES_META) or ""
+    rows = db.session.query(CompanyAlias.alias, CompanyAlias.canonical).all()
+    _aliases.clear()
+    _aliases.update(rows)
+
+
+def refresh_aliases():
+    """load_aliases() if aliases were learned (by any worker) since this
+    worker last loaded them; one app_meta lookup otherwise."""
+    if (get_meta(ALIASES_META) or "") != _aliases_version:
+        load_aliases()
+
+
+def _name_tokens(name: str) -> set:
+    """Tokens of a company name without suffixes, wherever they stand."""
+    tokens = set(normalize_company(name).split())
+    return tokens - SUFFIXES or tokens
+
+
+def _confirmed(alias: str, canonical: str, job_id: int) -> bool:
+    """Record job_id as evidence for alias -> canonical; True once
+    ALIAS_MIN_EVIDENCE distinct stored jobs back it."""
+    insert_ignore(CompanyAliasEvidence.__table__, [{"alias": alias, "canonical": canonical, "job_id": job_id}])
+    return CompanyAliasEvidence.query.filter_by(alias=alias, canonical=canonical).count() >= ALIAS_MIN_EVIDENCE
+
+
+def _add_alias(alias: str, canonical: str):
+    """Persist alias -> canonical and move stored rows over. Caller commits;
+    the in-memory map is left to load_aliases() once the commit landed."""
+    CompanyAlias.query.filter_by(canonical=alias).update(
+        {"canonical": canonical}, synchronize_session=False)
+    upsert(CompanyAlias.__table__, [{"alias": alias, "canonical": canonical}], ["alias"], ["canonical"])
+    CompanyAliasEvidence.query.filter(
+        (CompanyAliasEvidence.alias == alias) | (CompanyAliasEvidence.canonical == alias)
+    ).delete(synchronize_session=False)
+
+    # dedup_key is "<company key>_<title>"; swap the company prefix in place
+    for model in (JobRecord, ArchivedJob):
+        model.query.filter(model.company_key == alias).update({
+            "company_key": canonical,
+            "dedup_key": literal(canonical).concat(func.substr(model.dedup_key, len(alias) + 1)),
+        }, synchronize_session=False)
+    for model in (DescriptionFingerprint, CompanySimHashBlock):
+        model.query.filter(model.company_key == alias).update(
+            {"company_key": canonical}, synchronize_session=False)
+
+
+def learn_aliases(sightings: list[tuple[str, str, int]]) -> list[tuple[str, str]]:
+    """Learn aliases from confirmed duplicates. Caller commits, then calls
+    load_aliases() if any were learned. Returns the [(alias, canonical)]
+    pairs learned.
+
+    sightings: [(company name, title, stored job id)] for incoming jobs whose
+    description matched the stored job's.
+    """
+    if not sightings:
+        return []
+    ids = list({job_id for _, _, job_id in sightings})
+    stored = {r.id: r for r in db.session.query(
+        JobRecord.id, JobRecord.company, JobRecord.title, JobRecord.company_key
+    ).filter(JobRecord.id.in_(ids)).all()}
+
+    learned = {}  # alias -> canonical, on top of _aliases until the caller reloads it
+    for company, title, job_id in sightings:
+        row = stored.get(job_id)
+        if row is None:
+            continue
+        alias = company_key(company)
+        alias = learned.get(alias, alias)
+        canonical = row.company_key or company_key(row.company)
+        canonical = learned.get(canonical, canonical)
+        if not alias or not canonical or alias == canonical:
+            continue
+        if compact(title) != compact(row.title):
+            continue
+        ta, tb = _name_tokens(company), _name_tokens(row.company)
+        if not ta or not tb:
+            continue
+        if ta != tb:
+            # One name containing the other: wait for more confirmed duplicates
+            if not (ta < tb or tb < ta) or not _confirmed(alias, canonical, job_id):
+                continue
+        _add_alias(alias, canonical)
+        for key, value in list(learned.items()):
+            if value == alias:
+                learned[key] = canonical
+        learned[alias] = canonical
+        logger.info(f"Company alias learned: {company!r} -> {row.company!r}")
+    if learned:
+        processed_keys.rebuild()
+        set_meta(ALIASES_META, str(int(get_meta(ALIASES_META) or 0) + 1))
+    return list(learned.items())
@@ -0,0 +1,516 @@
+"""Cross-source duplicate detection for scraped jobs.
+
+Two signals:
+- dedup_key: canonical company (service_company) + normalized title, for
+  the same posting listed by several sources under the same name. Stored
+  in the indexed jobs.dedup_key column and checked with IN lookups per
+  batch.
+- A 64-bit SimHash of the description, for the same posting under a
+  different title, truncated differently, or with a reworded intro/footer.
+
+SimHash features are the description's words and word pairs with stopwords
+removed. Descriptions are short (sources cut them at ~500 chars), so a
+reworded sentence moves the fingerprint by up to ~12 bits while different
+postings sit at 15+ even when they share company boilerplate (see
+benchmarks/bench_dedup.py). A radius that wide can't be indexed cheaply
+over the whole table, so a description counts as a duplicate when:
+- a posting from the same company is within MAX_DISTANCE bits, found
+  through per-company block tables: the fingerprint is split into BLOCKS
+  8-bit blocks, each scoring 2 when equal and 1 when within 1 bit. A
+  block scoring s differs by at least 2 - s bits, so fingerprints within
+  MAX_DISTANCE bits score at least COMPANY_MIN_SCORE. A lookup probes
+  each block and its 8 one-bit neighbours under the company key and
+  checks the postings scoring enough (a company with up to SCAN_ENTRIES
+  postings is checked directly), or
+- any posting is within CROSS_COMPANY_DISTANCE bits, found through
+  block-pair tables: every pair of blocks is a 16-bit table key, so
+  fingerprints within BLOCKS - 2 bits always share a key.
+Both are answered with a few queries per batch.
+"""
+
+import re
+import hashlib
+import logging
+from functools import lru_cache, reduce
+from itertools import combinations, filterfalse, repeat
+from operator import getitem, or_
+
+from sqlalchemy import bindparam, func, text
+
+from models import db, JobRecord, ArchivedJob, DescriptionFingerprint, SimHashBucket, CompanySimHashBlock
+from db_helpers import insert_ignore, get_meta, set_meta
+from service_company import compact, company_key, load_aliases
+import service_processed_keys as processed_keys
+from service_feedback_learning import STOPWORDS
+
+logger = logging.getLogger(__name__)
+
+SIMHASH_BITS = 64
+MAX_DISTANCE = 12
+CROSS_COMPANY_DISTANCE = 6
+MIN_FEATURES = 8
+BLOCKS = 8
+LOOKUP_CHUNK = 500
+# Items per same-company lookup query (~80 block values each)
+COMPANY_LOOKUP_CHUNK = 100
+# Up to this many fingerprints per company are compared directly rather
+# than through block tables
+SCAN_ENTRIES = 64
+# Bump when company_key/dedup_key normalization changes; stored keys are
+# recomputed once on the next start
+KEY_VERSION = "2"
+
+_BLOCK_BITS = SIMHASH_BITS // BLOCKS
+_TABLES = [(t << (2 * _BLOCK_BITS), i, j) for t, (i, j) in enumerate(combinations(range(BLOCKS), 2))]
+# Block score (2 per equal block, 1 per block within 1 bit) of a
+# same-company pair within MAX_DISTANCE bits
+COMPANY_MIN_SCORE = 2 * BLOCKS - MAX_DISTANCE
+# Blocks a pair within CROSS_COMPANY_DISTANCE bits has equal
+CROSS_COMPANY_MIN_BLOCKS = BLOCKS - CROSS_COMPANY_DISTANCE
+# _NEAR[v]: v and its one-bit neighbours
+_NEAR = [(v,) + tuple(v ^ (1 << k) for k in range(_BLOCK_BITS)) for v in range(1 << _BLOCK_BITS)]
+# _NEAR_SQL[i][v]: company_simhash_blocks.block values within 1 bit of
+# value v in block i, as SQL
+_NEAR_SQL = [[",".join(str((i << _BLOCK_BITS) | near) for near in _NEAR[v]) for v in range(1 << _BLOCK_BITS)]
+             for i in range(BLOCKS)]
+# Positions in a bitset: its nonzero bytes, and the bits set in a byte
+_NONZERO = re.compile(rb"[^\x00]")
+_BYTE_BITS = [tuple(b for b in range(8) if v >> b & 1) for v in range(256)]
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_SIGN_BIT = 1 << (SIMHASH_BITS - 1)
+
+# _SPREAD[i][v]: byte i of a feature hash having value v, as one counter lane
+# per bit (bit k of the byte adds 1 to lane 8 * i + k)
+_LANE_BITS = 16
+_LANE_MASK = (1 << _LANE_BITS) - 1
+_SPREAD = [[sum(((v >> k) & 1) << ((8 * i + k) * _LANE_BITS) for k in range(8)) for v in range(256)]
+           for i in range(SIMHASH_BITS // 8)]
+_LANE_HALF = 1 << (_LANE_BITS - 1)
+_LANE_ONES = sum(1 << (bit * _LANE_BITS) for bit in range(SIMHASH_BITS))
+_TOP_BIT = bytes(b"0"[0] if v < 0x80 else b"1"[0] for v in range(256))
+# simhash tokenizes bytes: _WORD_RE's words are ASCII, anything else separates them
+_SEPARATE = bytes(v if re.fullmatch(_WORD_RE, chr(v)) else b" "[0] for v in range(256))
+_STOPWORDS = frozenset(w.encode("utf-8") for w in STOPWORDS)
+# Feature (word, or pair of words) -> its hash spread into lanes. Descriptions
+# share most of their vocabulary, so most features are hashed once.
+_LANES = {}
+LANES_CACHE_SIZE = 65536
+
+
+def dedup_key(title: str, company: str) -> str:
+    """Canonical company + normalized title (same posting listed by several sources)."""
+    return f"{company_key(company)}_{compact(title)}"
+
+
+def find_stored_keys(keys) -> dict:
+    """{dedup key: id of the latest canonical job with that key} for keys
+    already stored, hot or archived (reposts share the key of the earlier
+    posting)."""
+    keys = list(set(keys))
+    found = {}
+    for model in (JobRecord, ArchivedJob):
+        for i in range(0, len(keys), LOOKUP_CHUNK):
+            for key, job_id in db.session.query(model.dedup_key, func.max(model.id)).filter(
+                model.dedup_key.in_(keys[i:i + LOOKUP_CHUNK]), model.merged_into_id.is_(None)
+            ).group_by(model.dedup_key).all():
+                found[key] = max(found.get(key, 0), job_id)
+    return found
+
+
+def features(text: str) -> list[str]:
+    words = [w for w in _WORD_RE.findall((text or "").lower()) if w not in STOPWORDS]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def _feature_lanes(feature) -> int:
+    text = feature if isinstance(feature, bytes) else b" ".join(feature)
+    return sum(map(getitem, _SPREAD, hashlib.blake2b(text, digest_size=8).digest()))
+
+
+@lru_cache(maxsize=4096)
+def simhash(text: str) -> int | None:
+    """Unsigned 64-bit SimHash of a description (of its features()), None if
+    too short to be meaningful. LRU-cached: every fetch sees mostly postings
+    it fingerprinted before, and merging recomputes the kept description's."""
+    words = list(filterfalse(_STOPWORDS.__contains__, (text or "").lower().encode(
+        "ascii", "replace").translate(_SEPARATE).split()))
+    n = 2 * len(words) - 1
+    if n < MIN_FEATURES:
+        return None
+    # Per-bit vote counts, summed in parallel: each feature hash byte is
+    # spread into one 16-bit counter lane per bit (see _SPREAD). A word and
+    # the pair it starts are cached together, so one lookup covers both
+    pairs = zip(words, words[1:])
+    try:
+        acc = sum(map(_LANES.__getitem__, pairs)) + _LANES[words[-1]]
+    except KeyError:
+        if len(_LANES) > LANES_CACHE_SIZE:
+            _LANES.clear()
+        for pair in zip(words, words[1:]):
+            if pair not in _LANES:
+                _LANES[pair] = _feature_lanes(pair[0]) + _feature_lanes(pair)
+        if words[-1] not in _LANES:
+            _LANES[words[-1]] = _feature_lanes(words[-1])
+        acc = sum(map(_LANES.__getitem__, zip(words, words[1:]))) + _LANES[words[-1]]
+    if n < _LANE_HALF:
+        # Bit set where votes > n / 2: bias every lane so that its top bit
+        # says so, then read the 64 top bits off the lanes' high bytes
+        lanes = (acc + (_LANE_HALF - n // 2 - 1) * _LANE_ONES).to_bytes(SIMHASH_BITS * _LANE_BITS // 8, "little")
+        return int(lanes[1::2].translate(_TOP_BIT)[::-1], 2)
+    fp = 0
+    for bit in range(SIMHASH_BITS):
+        if (acc >> (bit * _LANE_BITS)) & _LANE_MASK > n / 2:
+            fp |= 1 << bit
+    return fp
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def is_near_duplicate(fp_a: int, company_a: str, fp_b: int, company_b: str) -> bool:
+    """The pairwise rule the lookups implement (company_* are company_key values)."""
+    limit = MAX_DISTANCE if company_a and company_a == company_b else CROSS_COMPANY_DISTANCE
+    return hamming(fp_a, fp_b) <= limit
+
+
+def table_keys(fp: int) -> list[int]:
+    """One key per block pair: table number in the high bits, the two blocks below."""
+    blocks = fp.to_bytes(BLOCKS, "little")
+    return [base | (blocks[i] << _BLOCK_BITS) | blocks[j] for base, i, j in _TABLES]
+
+
+def company_blocks(fp: int) -> list[int]:
+    """Block number << 8 | block value, per block (company_simhash_blocks.block)."""
+    return [(i << _BLOCK_BITS) | v for i, v in enumerate(fp.to_bytes(BLOCKS, "little"))]
+
+
+def _to_signed(fp: int) -> int:
+    return fp - (1 << SIMHASH_BITS) if fp & _SIGN_BIT else fp
+
+
+def _to_unsigned(value: int) -> int:
+    return value & ((1 << SIMHASH_BITS) - 1)
+
+
+def _transpose(fp: int) -> int:
+    """fp with its 8x8 bit matrix transposed: byte i of the result holds bit
+    i of each byte of fp, so its blocks partition the bits differently."""
+    t = (fp ^ (fp >> 7)) & 0x00AA00AA00AA00AA
+    fp ^= t ^ (t << 7)
+    t = (fp ^ (fp >> 14)) & 0x0000CCCC0000CCCC
+    fp ^= t ^ (t << 14)
+    t = (fp ^ (fp >> 28)) & 0x00000000F0F0F0F0
+    return fp ^ t ^ (t << 28)
+
+
+class _BlockIndex:
+    """Fingerprints in insertion order, with per-block bitsets of their
+    positions (SimHashIndex). A company index finds entries within
+    MAX_DISTANCE bits by block score; the cross-company one finds entries
+    within CROSS_COMPANY_DISTANCE bits, which have CROSS_COMPANY_MIN_BLOCKS
+    equal blocks both in fp and in its transpose: each alone lets through
+    fingerprints sharing boilerplate, the two together few of them. Up to
+    SCAN_ENTRIES entries are checked directly instead (most companies have
+    a handful per batch), and the bitsets are built past that."""
+
+    def __init__(self, company: bool):
+        self.company = company
+        self.limit = MAX_DISTANCE if company else CROSS_COMPANY_DISTANCE
+        self.entries = []   # [(fp, item)]
+        self.positions = {}  # fp -> position of its first entry
+        # Per block of fp (then of its transpose): block value -> bitset of positions
+        self.blocks = None
+
+    def _block_values(self, fp: int) -> bytes:
+        blocks = fp.to_bytes(BLOCKS, "little")
+        return blocks if self.company else blocks + _transpose(fp).to_bytes(BLOCKS, "little")
+
+    def _index(self, fp: int, bit: int):
+        for table, v in zip(self.blocks, self._block_values(fp)):
+            table[v] = table.get(v, 0) | bit
+
+    def add(self, fp: int, item) -> int:
+        """Index fp; returns its position bit, 0 if already indexed."""
+        if fp in self.positions:
+            return 0  # lookups return the earliest entry
+        bit = 1 << len(self.entries)
+        self.positions[fp] = len(self.entries)
+        self.entries.append((fp, item))
+        if self.blocks is not None:
+            self._index(fp, bit)
+        elif len(self.entries) > SCAN_ENTRIES:
+            self.blocks = [{} for _ in range(BLOCKS if self.company else 2 * BLOCKS)]
+            for position, (other, _) in enumerate(self.entries):
+                self._index(other, 1 << position)
+        return bit
+
+    def _candidates(self, fp: int) -> int:
+        if self.company:
+            # Score: 2 per equal block, 1 per block within 1 bit
+            values = fp.to_bytes(BLOCKS, "little")
+            need, groups = COMPANY_MIN_SCORE, [list(map(dict.get, self.blocks, values, repeat(0))) + [
+                reduce(or_, map(table.get, _NEAR[v], repeat(0))) for table, v in zip(self.blocks, values)]]
+        else:
+            found = list(map(dict.get, self.blocks, self._block_values(fp), repeat(0)))
+            need, groups = CROSS_COMPANY_MIN_BLOCKS, [found[:BLOCKS], found[BLOCKS:]]
+        candidates = -1
+        for group in groups:
+            hits = [0] * need   # hits[k]: positions scoring more than k
+            for bits in filter(None, group):
+                for k in range(need - 1, 0, -1):
+                    hits[k] |= hits[k - 1] & bits
+                hits[0] |= bits
+            candidates &= hits[-1]
+        return candidates
+
+    def find(self, fp: int, exclude: int = 0):
+        """Item of the earliest entry within the index's distance of fp, not
+        in the `exclude` bitset."""
+        if self.blocks is None:
+            for position, (other, item) in enumerate(self.entries):
+                if hamming(fp, other) <= self.limit and not (exclude >> position) & 1:
+                    return item
+            return None
+        candidates = self._candidates(fp) & ~exclude
+        if not candidates:
+            return None
+        # Lowest positions first: scan the bitset's bytes once rather than
+        # clearing one bit at a time, which costs a pass per candidate
+        data = candidates.to_bytes((candidates.bit_length() + 7) // 8, "little")
+        for match in _NONZERO.finditer(data):
+            base = match.start()
+            for bit in _BYTE_BITS[data[base]]:
+                other, item = self.entries[base * 8 + bit]
+                if hamming(fp, other) <= self.limit:
+                    return item
+        return None
+
+
+class SimHashIndex:
+    """In-memory version of the stored index, for deduplicating within one
+    fetch batch. Block positions are kept as bitsets, so a lookup is a few
+    dict probes and integer operations rather than a pass over candidates."""
+
+    def __init__(self):
+        self._by_company = {}   # company key -> _BlockIndex
+        self._all = _BlockIndex(company=False)
+        self._company_bits = {}  # company key -> its positions in _all
+
+    def find(self, fp: int, company: str):
+        """Item of an indexed near-duplicate of (fp, company key), else None
+        (the first one added, same company first)."""
+        index = self._by_company.get(company) if company else None
+        if index is not None:
+            item = index.find(fp)
+            if item is not None:
+                return item
+        # None of the company's own entries is within MAX_DISTANCE, so none
+        # is within the narrower cross-company distance either
+        return self._all.find(fp, exclude=self._company_bits.get(company, 0))
+
+    def add(self, fp: int, company: str, item=None):
+        if company:
+            index = self._by_company.get(company)
+            if index is None:
+                index = self._by_company[company] = _BlockIndex(company=True)
+            index.add(fp, item)
+            self._company_bits[company] = self._company_bits.get(company, 0) | self._all.add(fp, item)
+        else:
+            self._all.add(fp, item)
+
+
+def _company_candidates(items: list) -> dict:
+    """{(fp, company key): [stored job id]} of same-company postings scoring
+    at least COMPANY_MIN_SCORE against each item (see the module docstring).
+
+    Scored in SQL per item, so only candidates come back: each item is one
+    arm of a UNION ALL over the (company_key, block) primary key. Block
+    numbers are our own integers and are written into the SQL; building
+    ~80 bound parameters per item costs more than the lookup.
+    """
+    table = CompanySimHashBlock.__tablename__
+    candidates = {}
+    for i in range(0, len(items), COMPANY_LOOKUP_CHUNK):
+        arms, params = [], {}
+        for n, (fp, company) in enumerate(items[i:i + COMPANY_LOOKUP_CHUNK], start=i):
+            probes = ",".join(map(getitem, _NEAR_SQL, fp.to_bytes(BLOCKS, "little")))
+            exact = ",".join(map(str, company_blocks(fp)))
+            arms.append(f"SELECT {n} AS item, job_id FROM {table} "
+                        f"WHERE company_key = :company_{n} AND block IN ({probes}) GROUP BY job_id "
+                        f"HAVING SUM(CASE WHEN block IN ({exact}) THEN 2 ELSE 1 END) >= {COMPANY_MIN_SCORE}")
+            params[f"company_{n}"] = company
+        for n, job_id in db.session.execute(text(" UNION ALL ".join(arms)), params):
+            candidates.setdefault(items[n], []).append(job_id)
+    return candidates
+
+
+def find_stored(items) -> dict:
+    """{(fp, company key): stored job id} for each item with a stored near-duplicate.
+
+    items: iterable of (fp, company key).
+    """
+    items = set(items)
+    by_company = {}   # company key -> [fp]
+    by_table = {}     # table key -> [(fp, company key)]
+    for fp, company in items:
+        if company:
+            by_company.setdefault(company, []).append(fp)
+        for key in table_keys(fp):
+            by_table.setdefault(key, []).append((fp, company))
+
+    matches = {}
+    stored = {}   # job id -> (fp, company key)
+
+    def check(fp, company, job_id):
+        if (fp, company) not in matches and job_id in stored \
+                and is_near_duplicate(fp, company, *stored[job_id]):
+            matches[(fp, company)] = job_id
+
+    # Same company first: companies with up to SCAN_ENTRIES stored postings
+    # are checked directly, larger ones scored in SQL
+    companies = list(by_company)
+    sizes = {}
+    for i in range(0, len(companies), LOOKUP_CHUNK):
+        sizes.update(db.session.query(DescriptionFingerprint.company_key, func.count()).filter(
+            DescriptionFingerprint.company_key.in_(companies[i:i + LOOKUP_CHUNK]),
+            DescriptionFingerprint.simhash.isnot(None)).group_by(DescriptionFingerprint.company_key).all())
+    small = [c for c in companies if 0 < sizes.get(c, 0) <= SCAN_ENTRIES]
+    for i in range(0, len(small), LOOKUP_CHUNK):
+        for job_id, stored_company, fp in db.session.query(
+                DescriptionFingerprint.job_id, DescriptionFingerprint.company_key,
+                DescriptionFingerprint.simhash).filter(
+                DescriptionFingerprint.company_key.in_(small[i:i + LOOKUP_CHUNK]),
+                DescriptionFingerprint.simhash.isnot(None)).all():
+            stored[job_id] = (_to_unsigned(fp), stored_company)
+            for item_fp in by_company[stored_company]:
+                check(item_fp, stored_company, job_id)
+    same = _company_candidates([(fp, c) for c in companies if sizes.get(c, 0) > SCAN_ENTRIES
+                                for fp in by_company[c]])
+
+    cross = {}   # job id -> {(fp, company key)}
+    keys = list(by_table)
+    for i in range(0, len(keys), LOOKUP_CHUNK):
+        for bucket, job_id in db.session.query(SimHashBucket.bucket, SimHashBucket.job_id).filter(
+                SimHashBucket.bucket.in_(keys[i:i + LOOKUP_CHUNK])).all():
+            cross.setdefault(job_id, set()).update(by_table[bucket])
+
+    ids = list({job_id for job_ids in same.values() for job_id in job_ids}.union(cross) - stored.keys())
+    for i in range(0, len(ids), LOOKUP_CHUNK):
+        for job_id, stored_company, fp in db.session.query(
+                DescriptionFingerprint.job_id, DescriptionFingerprint.company_key,
+                DescriptionFingerprint.simhash).filter(
+                DescriptionFingerprint.job_id.in_(ids[i:i + LOOKUP_CHUNK])).all():
+            stored[job_id] = (_to_unsigned(fp), stored_company)
+    for (fp, company), job_ids in same.items():
+        for job_id in job_ids:
+            check(fp, company, job_id)
+    for job_id, found in cross.items():
+        for fp, company in found:
+            check(fp, company, job_id)
+    return matches
+
+
+def add_to_index(items: list[tuple[int, int | None, str]]):
+    """Persist fingerprints of newly stored jobs. Caller commits.
+
+    items: [(job id, fp or None, company key)].
+    """
+    if not items:
+        return
+    insert_ignore(DescriptionFingerprint.__table__, [
+        {"job_id": job_id, "simhash": _to_signed(fp) if fp is not None else None,
+         "company_key": company or None}
+        for job_id, fp, company in items
+    ])
+    insert_ignore(SimHashBucket.__table__, [
+        {"bucket": key, "job_id": job_id}
+        for job_id, fp, _ in items if fp is not None for key in table_keys(fp)
+    ])
+    insert_ignore(CompanySimHashBlock.__table__, [
+        {"company_key": company, "block": block, "job_id": job_id}
+        for job_id, fp, company in items if fp is not None and company for block in company_blocks(fp)
+    ])
+
+
+def _backfill_keys(rekey: bool = False):
+    """Fill jobs.dedup_key/company_key where missing (or recompute them all)."""
+    query = db.session.query(JobRecord.id, JobRecord.title, JobRecord.company)
+    if not rekey:
+        query = query.filter((JobRecord.dedup_key.is_(None)) | (JobRecord.company_key.is_(None)))
+    rows = query.all()
+    if rows:
+        stmt = JobRecord.__table__.update().where(
+            JobRecord.__table__.c.id == bindparam("_id")
+        ).values(dedup_key=bindparam("_key"), company_key=bindparam("_company"))
+        for i in range(0, len(rows), LOOKUP_CHUNK):
+            db.session.execute(stmt, [
+                {"_id": r.id, "_key": dedup_key(r.title, r.company), "_company": company_key(r.company)}
+                for r in rows[i:i + LOOKUP_CHUNK]])
+        processed_keys.rebuild()
+    if rekey:
+        # Archived jobs keep their keys in archived_jobs
+        archived = db.session.query(ArchivedJob.id, ArchivedJob.title, ArchivedJob.company).all()
+        stmt = ArchivedJob.__table__.update().where(
+            ArchivedJob.__table__.c.id == bindparam("_id")
+        ).values(dedup_key=bindparam("_key"), company_key=bindparam("_company"))
+        for i in range(0, len(archived), LOOKUP_CHUNK):
+            db.session.execute(stmt, [
+                {"_id": r.id, "_key": dedup_key(r.title, r.company), "_company": company_key(r.company)}
+                for r in archived[i:i + LOOKUP_CHUNK]])
+        fp_rows = [*db.session.query(DescriptionFingerprint.job_id, JobRecord.company).join(
+            JobRecord, JobRecord.id == DescriptionFingerprint.job_id).all(),
+            *db.session.query(DescriptionFingerprint.job_id, ArchivedJob.company).join(
+            ArchivedJob, ArchivedJob.id == DescriptionFingerprint.job_id).all()]
+        stmt = DescriptionFingerprint.__table__.update().where(
+            DescriptionFingerprint.__table__.c.job_id == bindparam("_id")
+        ).values(company_key=bindparam("_company"))
+        for i in range(0, len(fp_rows), LOOKUP_CHUNK):
+            db.session.execute(stmt, [{"_id": r.job_id, "_company": company_key(r.company) or None}
+                                      for r in fp_rows[i:i + LOOKUP_CHUNK]])
+        _rebuild_company_blocks()
+        set_meta("dedup_key_version", KEY_VERSION)
+    db.session.commit()
+    if rows:
+        logger.info(f"Dedup keys {'recomputed' if rekey else 'backfilled'} for {len(rows)} jobs")
+
+
+def _rebuild_company_blocks():
+    """Rewrite company_simhash_blocks from desc_fingerprints (table added
+    after fingerprints were stored, or company keys recomputed). Caller commits."""
+    CompanySimHashBlock.query.delete(synchronize_session=False)
+    rows = db.session.query(
+        DescriptionFingerprint.job_id, DescriptionFingerprint.company_key, DescriptionFingerprint.simhash
+    ).filter(DescriptionFingerprint.company_key.isnot(None), DescriptionFingerprint.simhash.isnot(None)).all()
+    for i in range(0, len(rows), LOOKUP_CHUNK):
+        insert_ignore(CompanySimHashBlock.__table__, [
+            {"company_key": r.company_key, "block": block, "job_id": r.job_id}
+            for r in rows[i:i + LOOKUP_CHUNK] for block in company_blocks(_to_unsigned(r.simhash))])
+    set_meta("company_blocks_built", "1")
+    if rows:
+        logger.info(f"Company fingerprint blocks rebuilt for {len(rows)} jobs")
+
+
+def _backfill_fingerprints():
+    rows = db.session.query(JobRecord.id, JobRecord.company, JobRecord.description).outerjoin(
+        DescriptionFingerprint, DescriptionFingerprint.job_id == JobRecord.id
+    ).filter(DescriptionFingerprint.job_id.is_(None), JobRecord.merged_into_id.is_(None)).all()
+    if not rows:
+        return
+    for i in range(0, len(rows), LOOKUP_CHUNK):
+        add_to_index([(r.id, simhash(r.description), company_key(r.company))
+                      for r in rows[i:i + LOOKUP_CHUNK]])
+    db.session.commit()
+    logger.info(f"Description fingerprints backfilled for {len(rows)} jobs")
+
+
+def ensure_indexed():
+    """Backfill the dedup columns (added by migration 1) and fingerprint
+    tables for jobs stored before they existed, and recompute keys after a
+    normalization change (first start after upgrade; a no-op afterwards)."""
+    load_aliases()
+    _backfill_keys(rekey=get_meta("dedup_key_version") != KEY_VERSION)
+    if get_meta("company_blocks_built") is None:
+        _rebuild_company_blocks()
+        db.session.commit()
+    _backfill_fingerprints()
@@ -0,0 +1,395 @@
+"""Bulk import of job history and dumps (backfill).
+
+    python service_import.py jobs.ndjson.gz seen_jobs.db [--workers 4] [--defer-index]
+    POST /api/import/jobs?format=csv&gzip=true   (the file as the request body)
+
+Reads records as a stream from:
+- NDJSON or CSV, plain or gzipped: GET /api/export/jobs dumps of another
+  deployment, or any file with title and company columns (description,
+  url, source, job_id, unique_key, first_seen_at, ... when present);
+- the CLI bot's history: seen_jobs.json or seen_jobs.db (key, title,
+  company, date; the keys are the same unique keys the scrapers build).
+
+Records are taken IMPORT_BATCH at a time. Per batch:
+1. normalize; records without a title are counted as invalid;
+2. dedup within the batch (unique key, then title+company key), then
+   against stored sightings and stored dedup keys, hot or archived. A
+   record of a stored job becomes a sighting of it (and fills its missing
+   fields, as a scraped duplicate does);
+3. score with the current keywords and filters in one ScoreCache batch,
+   its misses in `workers` processes;
+4. store the batch in one writer transaction: bulk insert
+   (insert_ignore_returning), sightings, top candidates, and the
+   import's search session count.
+
+Unlike a search, the import skips description near-duplicate detection
+and repost linking. Text vectors, SimHash fingerprints and MinHash
+signatures are the costly per-job steps. They are built after the load,
+for the imported jobs only (the index phase). With defer_index (by default
+when more than INDEX_INLINE_MAX jobs were inserted) they are left to the
+existing backfills: fingerprints at the next start
+(ensure_indexed), vectors and signatures on rescore or the first "more
+like this".
+"""
+
+import io
+import os
+import csv
+import gzip
+import json
+import time
+import sqlite3
+import logging
+from itertools import islice
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor
+
+from models import db, JobRecord, SearchSession, UserKeyword
+from db_helpers import insert_ignore_returning
+import db_writer
+import service_top_candidates as top_candidates
+import service_similar_jobs as similar_index
+from service_scoring import load_filters
+from service_score_cache import ScoreCache
+from service_similarity import ResumeMatcher, term_counts, job_text, index_jobs
+from service_company import load_aliases
+from service_dedup import dedup_key, company_key, simhash, find_stored_keys, add_to_index as add_fingerprints
+from service_job_sources import sighting, find_stored_sources, record_sightings, merge_into_stored
+from service_scraper import make_unique_key
+
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH = int(os.environ.get("IMPORT_BATCH", "5000"))  # records per write transaction
+# Imports inserting more jobs than this leave the index phase to the backfills
+# unless asked to run it (a request would otherwise wait for it)
+INDEX_INLINE_MAX = int(os.environ.get("IMPORT_INDEX_INLINE_MAX", "20000"))
+INDEX_BATCH = 2000
+SOURCES = ("google_jobs", "x_twitter", "adzuna", "linkedin", "reed", "jungle")
+FORMATS = ("ndjson", "csv")
+
+
+# ---------- Reading ----------
+
+def read_stream(stream, fmt: str, compressed: bool = False):
+    """Records (dicts) from a binary NDJSON or CSV stream."""
+    if compressed:
+        stream = gzip.GzipFile(fileobj=stream)
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    if fmt == "csv":
+        yield from csv.DictReader(text)
+        return
+    for line in text:
+        if line.strip():
+            yield json.loads(line)
+
+
+def _seen_json(path: str):
+    with open(path, encoding="utf-8") as f:
+        jobs = json.load(f).get("jobs", {})
+    for key, seen in jobs.items():
+        yield {"unique_key": key, "title": seen.get("title"), "company": seen.get("company"),
+               "first_seen_at": seen.get("date")}
+
+
+def _seen_db(path: str):
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        for key, title, company, date in conn.execute("SELECT key, title, company, date FROM seen"):
+            yield {"unique_key": key, "title": title, "company": company, "first_seen_at": date}
+    finally:
+        conn.close()
+
+
+def read_file(path: str):
+    """Records from a dump (.ndjson/.jsonl/.csv, optionally .gz) or the CLI
+    bot's seen_jobs.json / seen_jobs.db."""
+    name = path.lower()
+    if name.endswith(".db"):
+        yield from _seen_db(path)
+        return
+    if name.endswith(".json"):
+        yield from _seen_json(path)
+        return
+    compressed = name.endswith(".gz")
+    base = name[:-3] if compressed else name
+    fmt = "csv" if base.endswith(".csv") else "ndjson"
+    with open(path, "rb") as f:
+        yield from read_stream(f, fmt, compressed)
+
+
+# ---------- Normalizing ----------
+
+def _text(value) -> str:
+    return str(value).strip() if value is not None else ""
+
+
+def _source_of(unique_key: str) -> str:
+    for source in SOURCES:
+        if unique_key.startswith(source + "_"):
+            return source
+    return unique_key.split("_", 1)[0] or "import"
+
+
+def _seen_at(value, default):
+    try:
+        seen_at = datetime.fromisoformat(_text(value))
+    except ValueError:
+        return default
+    return seen_at if seen_at.tzinfo else seen_at.replace(tzinfo=timezone.utc)
+
+
+def normalize(record: dict, now) -> dict | None:
+    """A scraped-job dict for a record, or None without a title."""
+    title = _text(record.get("title"))
+    if not title:
+        return None
+    company = _text(record.get("company"))
+    source = _text(record.get("source"))
+    job_id = _text(record.get("job_id"))
+    unique_key = _text(record.get("unique_key")) or make_unique_key(source or "import", job_id, title, company)
+    job_data = {
+        "title": title,
+        "company": company,
+        "source": source or _source_of(unique_key),
+        "job_id": job_id,
+        "unique_key": unique_key,
+        "location": _text(record.get("location")),
+        "salary": _text(record.get("salary")),
+        "url": _text(record.get("url")),
+        "description": _text(record.get("description")),
+        "posted_date": _text(record.get("posted_date")),
+        "first_seen_at": _seen_at(record.get("first_seen_at"), now),
+    }
+    job_data["_sightings"] = [sighting(job_data, job_data["first_seen_at"])]
+    return job_data
+
+
+# ---------- Loading ----------
+
+def _start_session(sources: str, query_text: str) -> int:
+    session = SearchSession(query_text=query_text, total_results=0, sources=sources[:200],
+                            status="storing", created_at=datetime.now(timezone.utc))
+    db.session.add(session)
+    db.session.flush()
+    return session.id
+
+
+def _set_status(session_id: int, status: str):
+    SearchSession.query.filter_by(id=session_id).update(
+        {SearchSession.status: status}, synchronize_session=False)
+
+
+def _store_batch(session_id: int, rows: list[dict], row_sightings: dict, sightings: list[dict],
+                 merges: dict, score_cache: ScoreCache) -> tuple:
+    """Write one batch (runs on the writer, one transaction). Returns
+    (inserted, sightings recorded, stored jobs updated)."""
+    for row in rows:
+        row["search_session_id"] = session_id
+    ids = {key: job_id for job_id, key in insert_ignore_returning(
+        JobRecord.__table__, rows, "unique_key", JobRecord.__table__.c.id, JobRecord.__table__.c.unique_key)}
+    inserted = []
+    for row in rows:
+        if row["unique_key"] in ids:
+            row["id"] = ids[row["unique_key"]]
+            inserted.append(row)
+            sightings.extend({**s, "job_record_id": row["id"]} for s in row_sightings[row["unique_key"]])
+    record_sightings(sightings)
+    top_candidates.add_jobs(inserted)
+    merged = merge_into_stored(merges)
+    score_cache.flush()
+    SearchSession.query.filter_by(id=session_id).update(
+        {SearchSession.total_results: SearchSession.total_results + len(inserted)},
+        synchronize_session=False)
+    return len(inserted), len(sightings), merged
+
+
+def _prepare_batch(records: list, now, counts: dict, score_cache: ScoreCache, matcher, map_fn):
+    """Normalize, dedup and score a batch; returns (jobs rows, {unique key:
+    the row's sightings}, sightings of stored jobs, {stored job id: [job_data]})."""
+    kept = {}       # dedup key -> job_data kept for it
+    seen_keys = set()
+    for record in records:
+        job_data = normalize(record, now)
+        if job_data is None:
+            counts["invalid"] += 1
+            continue
+        if job_data["unique_key"] in seen_keys:
+            counts["duplicate"] += 1
+            continue
+        seen_keys.add(job_data["unique_key"])
+        dk = dedup_key(job_data["title"], job_data["company"])
+        first = kept.get(dk)
+        if first is not None:
+            counts["duplicate"] += 1
+            first["_sightings"].append(job_data["_sightings"][0])
+            continue
+        job_data["dedup_key"] = dk
+        kept[dk] = job_data
+
+    jobs = list(kept.values())
+    stored_sources = find_stored_sources(s["unique_key"] for job_data in jobs for s in job_data["_sightings"])
+    stored_keys = find_stored_keys(kept.keys())
+    fresh, sightings, merges = [], [], {}
+    for job_data in jobs:
+        stored_id = stored_sources.get(job_data["unique_key"])
+        if stored_id is not None:
+            counts["existing"] += 1
+        else:
+            stored_id = stored_keys.get(job_data["dedup_key"])
+            if stored_id is not None:
+                counts["duplicate"] += 1
+                merges.setdefault(stored_id, []).append(job_data)
+        if stored_id is None:
+            fresh.append(job_data)
+            continue
+        sightings.extend({**s, "job_record_id": stored_id} for s in job_data["_sightings"]
+                         if s["unique_key"] not in stored_sources)
+
+    similarities = None
+    if matcher.similarity({}) is not None:  # a resume is stored
+        similarities = [matcher.similarity(term_counts(job_text(j))) for j in fresh]
+    score_cache.score_many(fresh, similarities, map_fn)
+    rows, row_sightings = [], {}
+    for job_data in fresh:
+        if job_data["match_score"] <= -99:
+            counts["filtered"] += 1
+            continue
+        rows.append({
+            **{name: job_data[name] for name in (
+                "job_id", "source", "unique_key", "dedup_key", "title", "company", "location", "salary",
+                "url", "description", "posted_date", "match_score", "match_tags", "experience_ok",
+                "first_seen_at")},
+            "company_key": company_key(job_data["company"]),
+        })
+        row_sightings[job_data["unique_key"]] = job_data["_sightings"]
+    return rows, row_sightings, sightings, merges
+
+
+def _batches(records, size: int):
+    records = iter(records)
+    while batch := list(islice(records, size)):
+        yield batch
+
+
+def _index(items: list[tuple]):
+    index_jobs([(job_id, counts) for job_id, counts, _, _ in items])
+    similar_index.add_to_index([(job_id, counts.keys()) for job_id, counts, _, _ in items])
+    add_fingerprints([(job_id, fp, ck) for job_id, _, fp, ck in items])
+
+
+def index_imported(session_id: int) -> int:
+    """Build text vectors, MinHash signatures and SimHash fingerprints for an
+    import's jobs; returns how many were indexed."""
+    indexed = after_id = 0
+    while True:
+        rows = db.session.query(JobRecord.id, JobRecord.title, JobRecord.company, JobRecord.description).filter(
+            JobRecord.search_session_id == session_id, JobRecord.id > after_id,
+        ).order_by(JobRecord.id).limit(INDEX_BATCH).all()
+        if not rows:
+            return indexed
+        after_id = rows[-1].id
+        db_writer.run(_index, [(r.id, term_counts(job_text(r._asdict())), simhash(r.description),
+                                company_key(r.company)) for r in rows])
+        indexed += len(rows)
+
+
+def import_records(records, sources: str = "import", keywords: list | None = None,
+                   workers: int = 0, defer_index: bool | None = None) -> dict:
+    """Load records (dicts) as new jobs; see the module docstring. Returns
+    the counts and the throughput. defer_index None: defer when more than
+    INDEX_INLINE_MAX jobs were inserted.
+
+    If reading the records fails (unreadable input, an aborted or oversized
+    request body), the session is marked partial, or failed when nothing
+    was stored, and the error is raised."""
+    if keywords is None:
+        keywords = [kw.to_dict() for kw in UserKeyword.query.all()]
+    boost_keywords = [{"keyword": k["keyword"], "weight": k.get("weight", 1.0)}
+                      for k in keywords if k.get("category") == "boost"]
+    exclude_keywords = [{"keyword": k["keyword"], "weight": k.get("weight", 2.0)}
+                        for k in keywords if k.get("category") == "exclude"]
+    score_cache = ScoreCache(boost_keywords, exclude_keywords, load_filters())
+    matcher = ResumeMatcher.load()
+    load_aliases()
+    now = datetime.now(timezone.utc)
+    counts = {"read": 0, "inserted": 0, "existing": 0, "duplicate": 0, "filtered": 0, "invalid": 0,
+              "failed": 0, "sightings": 0, "merged": 0}
+
+    session_id = db_writer.run(_start_session, sources,
+                               json.dumps([k["keyword"] for k in boost_keywords]))
+    pool = ProcessPoolExecutor(workers) if workers > 1 else None
+    map_fn = (lambda fn, items: pool.map(fn, items, chunksize=256)) if pool else map
+    start = time.perf_counter()
+    try:
+        for batch in _batches(records, IMPORT_BATCH):
+            counts["read"] += len(batch)
+            rows, row_sightings, sightings, merges = _prepare_batch(
+                batch, now, counts, score_cache, matcher, map_fn)
+            try:
+                inserted, recorded, merged = db_writer.run(
+                    _store_batch, session_id, rows, row_sightings, sightings, merges, score_cache)
+            except Exception as e:
+                logger.error(f"Import batch of {len(batch)} records ({len(rows)} new jobs) failed: {e}")
+                counts["failed"] += len(rows)
+                continue
+            counts["existing"] += len(rows) - inserted  # stored meanwhile
+            counts["inserted"] += inserted
+            counts["sightings"] += recorded
+            counts["merged"] += merged
+    except Exception:
+        # Unreadable input: the batches stored so far stay
+        stored = counts["inserted"] or counts["sightings"] or counts["merged"]
+        db_writer.run(_set_status, session_id, "partial" if stored else "failed")
+        raise
+    finally:
+        if pool:
+            pool.shutdown()
+    load_seconds = time.perf_counter() - start
+    db_writer.run(_set_status, session_id, "partial" if counts["failed"] else "complete")
+
+    if defer_index is None:
+        defer_index = counts["inserted"] > INDEX_INLINE_MAX
+    indexed, index_seconds = 0, 0.0
+    if not defer_index:
+        start = time.perf_counter()
+        indexed = index_imported(session_id)
+        index_seconds = time.perf_counter() - start
+
+    logger.info(f"Import {sources}: {counts} in {load_seconds:.1f}s "
+                f"({counts['read'] / load_seconds if load_seconds else 0:,.0f} records/s), "
+                f"{indexed} indexed in {index_seconds:.1f}s")
+    return {
+        "session_id": session_id,
+        **counts,
+        "seconds": round(load_seconds, 2),
+        "jobs_per_sec": round(counts["read"] / load_seconds) if load_seconds else None,
+        "indexed": indexed,
+        "index_deferred": defer_index,
+        "index_seconds": round(index_seconds, 2),
+        "indexed_per_sec": round(indexed / index_seconds) if index_seconds else None,
+    }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Import jobs from dumps or the CLI bot's seen_jobs history")
+    parser.add_argument("files", nargs="+",
+                        help=".ndjson/.jsonl/.csv (optionally .gz), seen_jobs.json or seen_jobs.db")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="processes scoring in parallel (1: in this process)")
+    parser.add_argument("--defer-index", action=argparse.BooleanOptionalAction, default=None,
+                        help="skip the index phase and leave it to the backfills "
+                             f"(default: when more than {INDEX_INLINE_MAX} jobs are inserted)")
+    args = parser.parse_args()
+
+    from app import app
+    with app.app_context():
+        for path in args.files:
+            print(json.dumps({"file": path, **import_records(
+                read_file(path), f"import:{os.path.basename(path)}",
+                workers=args.workers, defer_index=args.defer_index)}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Column projections for job list responses.
+
+A list row is built from the selected columns only, with no ORM objects. It
+carries a description snippet rather than the full text, and the
+application's id and status rather than application.to_dict() with every
+feedback. GET /api/jobs returns SUMMARY_FIELDS, or the names given in
+?fields=. Detail (full description, application, sources) is served by
+GET /api/jobs/<id>.
+
+Exports (GET /api/export/jobs) select from EXPORT_FIELDS, which adds the
+full description, and carry every field unless ?fields= names some.
+"""
+
+import json
+
+from sqlalchemy import func, select
+
+from models import JobRecord, JobApplication
+
+SNIPPET_CHARS = 200
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def _tags(value):
+    if not value:
+        return []
+    try:
+        return json.loads(value)
+    except (json.JSONDecodeError, TypeError):
+        return []
+
+
+def _snippet(value):
+    if not value:
+        return value
+    return value[:SNIPPET_CHARS] + "..." if len(value) > SNIPPET_CHARS else value
+
+
+def _application(row):
+    if row.application_id is None:
+        return None
+    return {"id": row.application_id, "status": row.application_status}
+
+
+def _application_column(column):
+    return select(column).where(JobApplication.job_id == JobRecord.id).limit(1).scalar_subquery()
+
+
+def _plain(name):
+    return lambda row: getattr(row, name)
+
+
+# name -> (columns to select, as {label: expression}; value from the row)
+FIELDS = {name: ({name: getattr(JobRecord, name)}, _plain(name)) for name in (
+    "id", "job_id", "source", "unique_key", "title", "company", "location", "salary", "url",
+    "posted_date", "match_score", "experience_ok", "search_session_id", "repost_of_id",
+)}
+FIELDS.update({
+    "first_seen_at": ({"first_seen_at": JobRecord.first_seen_at}, lambda row: _iso(row.first_seen_at)),
+    "match_tags": ({"match_tags": JobRecord.match_tags}, lambda row: _tags(row.match_tags)),
+    # One extra character tells a truncated snippet apart
+    "description_snippet": ({"description_snippet": func.substr(JobRecord.description, 1, SNIPPET_CHARS + 1)},
+                            lambda row: _snippet(row.description_snippet)),
+    "application": ({"application_id": _application_column(JobApplication.id),
+                     "application_status": _application_column(JobApplication.status)},
+                    _application),
+})
+
+# What a job card shows
+SUMMARY_FIELDS = ("id", "source", "title", "company", "location", "salary", "url", "posted_date",
+                  "match_score", "match_tags", "experience_ok", "first_seen_at", "repost_of_id",
+                  "description_snippet", "application")
+
+# Export rows may carry the full text
+EXPORT_FIELDS = {**FIELDS, "description": ({"description": JobRecord.description}, _plain("description"))}
+
+# Always selected: the keys cursors and ordering are built from
+_KEY_FIELDS = ("id", "match_score", "first_seen_at")
+
+
+def parse(arg: str | None, default=SUMMARY_FIELDS, available=FIELDS) -> tuple:
+    """Field names from a ?fields=a,b,c argument (`default` when absent)."""
+    if not arg:
+        return tuple(default)
+    names = tuple(dict.fromkeys(n.strip() for n in arg.split(",") if n.strip()))
+    unknown = [n for n in names if n not in available]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)} (available: {', '.join(available)})")
+    return names
+
+
+def columns(names, available=FIELDS) -> list:
+    """Labelled column expressions to select for `names`."""
+    selected = {}
+    for name in (*_KEY_FIELDS, *names):
+        for label, expression in available[name][0].items():
+            selected[label] = expression
+    return [expression.label(label) for label, expression in selected.items()]
+
+
+def to_dict(row, names, available=FIELDS) -> dict:
+    return {name: available[name][1](row) for name in names}
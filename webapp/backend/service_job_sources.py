@@ -0,0 +1,209 @@
+"""Job sightings across sources and field-level merging.
+
+Every time a job is seen on a source, a job_sources row records the source,
+external id, url and salary against one canonical JobRecord. This includes
+the cross-source duplicates that ingest used to drop. The canonical record
+takes the best value of each field across its sightings (FIELD_RULES), so
+list endpoints read one row per job and never match duplicates at query
+time.
+
+Rows stored before ingest-time dedup are folded on the first start by
+ensure_sources(): extra rows sharing a dedup_key get merged_into_id set,
+their sightings move to the canonical record, and list queries skip them.
+"""
+
+import re
+import logging
+
+from sqlalchemy import bindparam, func
+
+from models import (db, JobRecord, JobSource, JobApplication, DescriptionFingerprint, SimHashBucket,
+                    CompanySimHashBlock)
+from db_helpers import insert_ignore, existing_map, get_meta, set_meta
+import service_top_candidates as top_candidates
+
+logger = logging.getLogger(__name__)
+
+LOOKUP_CHUNK = 500
+
+
+def _fill_empty(current: str, new: str) -> bool:
+    return bool(new) and not current
+
+
+def _longer(current: str, new: str) -> bool:
+    return bool(new) and len(new) > len(current or "")
+
+
+def _better_salary(current: str, new: str) -> bool:
+    """A salary with figures beats none or a vague one ("Competitive")."""
+    if not new:
+        return False
+    return not current or (not re.search(r"\d", current) and bool(re.search(r"\d", new)))
+
+
+FIELD_RULES = {
+    "salary": _better_salary,
+    "location": _fill_empty,
+    "posted_date": _fill_empty,
+    "description": _longer,
+}
+# Stored records keep their description: fingerprints and the similarity
+# indexes were built from it. A salary filled in here is scored by the next
+# rescore.
+STORED_FIELDS = ("salary", "location", "posted_date")
+
+
+def merge_fields(target: dict, other: dict, fields=FIELD_RULES) -> list[str]:
+    """Copy the fields of `other` that beat `target`'s into target; returns the
+    names that changed."""
+    changed = []
+    for name in fields:
+        if FIELD_RULES[name](target.get(name) or "", other.get(name) or ""):
+            target[name] = other[name]
+            changed.append(name)
+    return changed
+
+
+def sighting(job_data: dict, seen_at) -> dict:
+    """job_sources row (without job_record_id) for a scraped job."""
+    return {
+        "source": job_data["source"],
+        "external_id": job_data["job_id"],
+        "unique_key": job_data["unique_key"],
+        "url": job_data.get("url", ""),
+        "salary": job_data.get("salary", ""),
+        "first_seen_at": seen_at,
+    }
+
+
+def find_stored_sources(unique_keys) -> dict:
+    """{unique key: canonical job id} for sightings already recorded."""
+    return existing_map(JobSource.unique_key, JobSource.job_record_id, unique_keys, LOOKUP_CHUNK)
+
+
+def record_sightings(rows: list[dict]):
+    """Insert job_sources rows; ones already recorded are skipped. Caller commits."""
+    for i in range(0, len(rows), LOOKUP_CHUNK):
+        insert_ignore(JobSource.__table__, rows[i:i + LOOKUP_CHUNK])
+
+
+def _update_fields(updates: list[dict]):
+    if not updates:
+        return
+    table = JobRecord.__table__
+    stmt = table.update().where(table.c.id == bindparam("_id")).values(
+        {name: bindparam(f"_{name}") for name in STORED_FIELDS})
+    db.session.execute(stmt, updates)
+
+
+def merge_into_stored(merges: dict) -> int:
+    """Apply the best-value rules of new sightings to stored records.
+
+    merges: {stored job id: [scraped job dicts]}. Returns how many records
+    changed. Caller commits.
+    """
+    ids = list(merges)
+    updates = []
+    for i in range(0, len(ids), LOOKUP_CHUNK):
+        for row in db.session.query(JobRecord.id, *(getattr(JobRecord, n) for n in STORED_FIELDS)).filter(
+                JobRecord.id.in_(ids[i:i + LOOKUP_CHUNK])).all():
+            current = {name: getattr(row, name) for name in STORED_FIELDS}
+            changed = False
+            for job_data in merges[row.id]:
+                changed |= bool(merge_fields(current, job_data, STORED_FIELDS))
+            if changed:
+                updates.append({"_id": row.id, **{f"_{n}": current[n] for n in STORED_FIELDS}})
+    _update_fields(updates)
+    return len(updates)
+
+
+# ---------- Legacy rows ----------
+
+def _backfill_sources() -> int:
+    """One sighting per stored row that has none yet (rows predating job_sources)."""
+    rows = db.session.query(
+        func.coalesce(JobRecord.merged_into_id, JobRecord.id).label("job_record_id"),
+        JobRecord.source, JobRecord.job_id, JobRecord.unique_key, JobRecord.url,
+        JobRecord.salary, JobRecord.first_seen_at,
+    ).outerjoin(JobSource, JobSource.unique_key == JobRecord.unique_key).filter(
+        JobSource.id.is_(None), JobRecord.unique_key.isnot(None)).all()
+    record_sightings([{
+        "job_record_id": r.job_record_id, "source": r.source, "external_id": r.job_id,
+        "unique_key": r.unique_key, "url": r.url, "salary": r.salary,
+        "first_seen_at": r.first_seen_at,
+    } for r in rows])
+    return len(rows)
+
+
+def _fold_duplicates() -> int:
+    """Fold canonical rows sharing a dedup_key into one record.
+
+    The record kept is the one with an application, else the oldest. Rows
+    folded keep their own application, if any.
+    """
+    keys = [k for (k,) in db.session.query(JobRecord.dedup_key).filter(
+        JobRecord.merged_into_id.is_(None), JobRecord.dedup_key.isnot(None)
+    ).group_by(JobRecord.dedup_key).having(func.count() > 1).all()]
+    if not keys:
+        return 0
+
+    folded = []     # (folded id, canonical id)
+    updates = []
+    for i in range(0, len(keys), LOOKUP_CHUNK):
+        groups = {}
+        for row in db.session.query(
+            JobRecord.id, JobRecord.dedup_key, JobApplication.id.label("application_id"),
+            *(getattr(JobRecord, n) for n in STORED_FIELDS),
+        ).outerjoin(JobApplication, JobApplication.job_id == JobRecord.id).filter(
+            JobRecord.dedup_key.in_(keys[i:i + LOOKUP_CHUNK]), JobRecord.merged_into_id.is_(None)
+        ).order_by(JobRecord.id).all():
+            groups.setdefault(row.dedup_key, []).append(row)
+
+        for rows in groups.values():
+            canonical = next((r for r in rows if r.application_id is not None), rows[0])
+            current = {name: getattr(canonical, name) for name in STORED_FIELDS}
+            for r in rows:
+                if r.id != canonical.id:
+                    merge_fields(current, {name: getattr(r, name) for name in STORED_FIELDS}, STORED_FIELDS)
+                    folded.append((r.id, canonical.id))
+            updates.append({"_id": canonical.id, **{f"_{n}": current[n] for n in STORED_FIELDS}})
+
+    _update_fields(updates)
+    table = JobRecord.__table__
+    db.session.execute(table.update().where(table.c.id == bindparam("_id")).values(
+        merged_into_id=bindparam("_into")), [{"_id": a, "_into": b} for a, b in folded])
+    sources = JobSource.__table__
+    db.session.execute(sources.update().where(sources.c.job_record_id == bindparam("_id")).values(
+        job_record_id=bindparam("_into")), [{"_id": a, "_into": b} for a, b in folded])
+
+    # Folded rows must not match as stored duplicates any more
+    folded_ids = [a for a, _ in folded]
+    for i in range(0, len(folded_ids), LOOKUP_CHUNK):
+        chunk = folded_ids[i:i + LOOKUP_CHUNK]
+        SimHashBucket.query.filter(SimHashBucket.job_id.in_(chunk)).delete(synchronize_session=False)
+        CompanySimHashBlock.query.filter(CompanySimHashBlock.job_id.in_(chunk)).delete(
+            synchronize_session=False)
+        DescriptionFingerprint.query.filter(DescriptionFingerprint.job_id.in_(chunk)).delete(
+            synchronize_session=False)
+    return len(folded)
+
+
+def ensure_sources():
+    """Record sightings for rows stored before job_sources existed and fold
+    their duplicates (first start after upgrade; cheap afterwards).
+
+    Folding runs once: later rows sharing a dedup_key are reposts
+    (service_reposts), which stay separate records.
+    """
+    backfilled = _backfill_sources()
+    folded = 0
+    if get_meta("legacy_duplicates_folded") is None:
+        folded = _fold_duplicates()
+        set_meta("legacy_duplicates_folded", "1")
+    if folded:
+        db.session.flush()
+        top_candidates.rebuild()
+    db.session.commit()
+    if backfilled or folded:
+        logger.info(f"Job sources: {backfilled} sightings backfilled, {folded} duplicate rows folded")
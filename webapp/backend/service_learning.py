@@ -6,6 +6,7 @@ from collections import Counter
 from datetime import datetime, timezone
 
 from models import db, UserKeyword, JobRecord, JobApplication, ApplicationFeedback
+from db_helpers import begin_write
 
 logger = logging.getLogger(__name__)
 
@@ -39,11 +40,14 @@ def analyze_and_retrain() -> dict:
 
     positive_jobs = JobRecord.query.filter(JobRecord.id.in_(positive_job_ids)).all() if positive_job_ids else []
 
+    # Loaded once, not per job
+    boost_keywords = UserKeyword.query.filter_by(category="boost").all()
+
     # Extract keyword frequencies from positive jobs
     positive_keywords = Counter()
     for job in positive_jobs:
         text = (job.title + " " + (job.description or "")).lower()
-        for kw in UserKeyword.query.filter_by(category="boost").all():
+        for kw in boost_keywords:
             if kw.keyword.lower() in text:
                 positive_keywords[kw.keyword.lower()] += 1
 
@@ -51,7 +55,7 @@ def analyze_and_retrain() -> dict:
     not_interested_keywords = Counter()
     for job in not_interested_jobs:
         text = (job.title + " " + (job.description or "")).lower()
-        for kw in UserKeyword.query.filter_by(category="boost").all():
+        for kw in boost_keywords:
             if kw.keyword.lower() in text:
                 not_interested_keywords[kw.keyword.lower()] += 1
 
@@ -59,7 +63,7 @@ def analyze_and_retrain() -> dict:
     ignored_keywords = Counter()
     for job in ignored_jobs:
         text = (job.title + " " + (job.description or "")).lower()
-        for kw in UserKeyword.query.filter_by(category="boost").all():
+        for kw in boost_keywords:
             if kw.keyword.lower() in text:
                 ignored_keywords[kw.keyword.lower()] += 1
 
@@ -75,6 +79,11 @@ def analyze_and_retrain() -> dict:
             except (json.JSONDecodeError, TypeError):
                 pass
 
+    # Everything above only read. End that transaction and hold the write
+    # lock for the short update below only, not for the analysis
+    db.session.commit()
+    begin_write()
+
     # Update weights
     updates = []
     all_keywords = UserKeyword.query.filter_by(category="boost").all()
@@ -0,0 +1,70 @@
+"""Request-arg filters shared by the list endpoints and the exports.
+
+GET /api/jobs and GET /api/export/jobs build their query here, as do
+GET /api/applications and GET /api/export/applications, so an export holds
+the same rows as the list it was taken from.
+"""
+
+from models import db, JobRecord, JobApplication
+import service_processed_keys as processed_keys
+from service_company import company_key, refresh_aliases
+
+
+def _flag(args, name: str) -> bool:
+    value = args.get(name)
+    return bool(value and value.lower() == "true")
+
+
+def jobs_query(args):
+    """Listable jobs filtered by min_score, source, experience_ok,
+    session_id, company, hide_dismissed and hide_processed."""
+    # Always exclude hard-filtered jobs (score = -99: contract, wrong title, excluded keyword in title, etc.)
+    # and legacy duplicate rows folded into another record
+    query = JobRecord.query.filter(JobRecord.match_score > -99, JobRecord.merged_into_id.is_(None))
+
+    min_score = args.get("min_score", type=float)
+    if min_score is not None:
+        query = query.filter(JobRecord.match_score >= min_score)
+
+    source = args.get("source")
+    if source:
+        query = query.filter(JobRecord.source == source)
+
+    experience_ok = args.get("experience_ok")
+    if experience_ok is not None:
+        query = query.filter(JobRecord.experience_ok == (experience_ok.lower() == "true"))
+
+    session_id = args.get("session_id", type=int)
+    if session_id:
+        query = query.filter(JobRecord.search_session_id == session_id)
+
+    # Company filter matches every spelling/alias of the canonical company
+    company = args.get("company")
+    if company:
+        refresh_aliases()
+        query = query.filter(JobRecord.company_key == company_key(company))
+
+    # Hide jobs marked as "not_interested"
+    if _flag(args, "hide_dismissed"):
+        dismissed_job_ids = db.session.query(JobApplication.job_id).filter(
+            JobApplication.status == "not_interested"
+        )
+        query = query.filter(~JobRecord.id.in_(dismissed_job_ids))
+
+    # Hide ALL jobs that have been processed (any application status),
+    # including other rows of the same job: anti-join on processed dedup keys
+    if _flag(args, "hide_processed"):
+        query = query.filter(processed_keys.hidden_filter())
+    return query
+
+
+def applications_query(args):
+    """Applications filtered by status and exclude_status."""
+    status = args.get("status")
+    exclude_status = args.get("exclude_status")
+    query = JobApplication.query
+    if status:
+        query = query.filter_by(status=status)
+    if exclude_status:
+        query = query.filter(JobApplication.status != exclude_status)
+    return query
@@ -0,0 +1,114 @@
+"""Keyset pagination and cached totals for GET /api/jobs.
+
+An OFFSET page scans and discards every row before it, and paginate() runs
+a COUNT(*) over the whole filtered query on every request. With a cursor,
+each page continues from the (sort key, id) of the previous page's last row,
+through the same index as page one (ix_jobs_rank / ix_jobs_recent), so deep
+pages cost the same as the first. Cursors are opaque to clients: base64 of
+the sort and the last row's key.
+
+Totals are cached per filter signature for COUNT_TTL_SECONDS, and dropped
+early when new jobs are stored. Between searches they are approximate: an
+application or score change shows up once the entry expires.
+"""
+
+import os
+import json
+import time
+import base64
+from collections import OrderedDict
+from datetime import datetime
+
+from sqlalchemy import and_, or_, func
+
+from models import db, JobRecord
+
+COUNT_TTL_SECONDS = int(os.environ.get("JOB_COUNT_TTL_SECONDS", "30"))
+COUNT_CACHE_SIZE = 256
+
+_counts = OrderedDict()  # filter signature -> (expires at, newest job id, total)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def order_by(query, sort: str):
+    """Total order for `sort`: the sort key, then id as the tie-break."""
+    if sort == "date":
+        # NULLS LAST is SQLite's default for DESC; PostgreSQL needs it spelled out
+        return query.order_by(JobRecord.first_seen_at.desc().nulls_last(), JobRecord.id.desc())
+    return query.order_by(JobRecord.match_score.desc(), JobRecord.id)
+
+
+def encode_cursor(sort: str, job) -> str:
+    """Cursor continuing after `job` (any row with id, match_score, first_seen_at)."""
+    if sort == "date":
+        value = job.first_seen_at.isoformat() if job.first_seen_at else None
+    else:
+        value = job.match_score
+    raw = json.dumps([sort, value, job.id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> tuple:
+    """(sort key value, id) of a cursor made by encode_cursor for `sort`."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, value, job_id = json.loads(raw)
+        if cursor_sort != sort or not isinstance(job_id, int):
+            raise ValueError("cursor from another sort")
+        if sort == "date":
+            value = datetime.fromisoformat(value) if value is not None else None
+        elif not isinstance(value, (int, float)):
+            raise ValueError("bad score")
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {e}") from e
+    return value, job_id
+
+
+def fetch_page(query, sort: str, cursor: str | None, limit: int) -> list:
+    """Up to `limit` rows of `query` after `cursor` (None: from the start) in
+    `sort` order."""
+    value, job_id = decode_cursor(cursor, sort) if cursor else (None, None)
+    if sort == "score":
+        if cursor:
+            column = JobRecord.match_score
+            # The redundant bound lets SQLite range-scan ix_jobs_rank from the cursor
+            query = query.filter(column <= value, or_(
+                column < value, and_(column == value, JobRecord.id > job_id)))
+        return order_by(query, sort).limit(limit).all()
+
+    # Date order: dated rows through ix_jobs_recent, then undated ones (NULLs
+    # sort last descending), which only the final page reaches
+    column = JobRecord.first_seen_at
+    rows = []
+    if not cursor or value is not None:
+        dated = query.filter(column.isnot(None))
+        if cursor:
+            dated = dated.filter(column <= value, or_(
+                column < value, and_(column == value, JobRecord.id < job_id)))
+        rows = order_by(dated, sort).limit(limit).all()
+    if len(rows) < limit:
+        undated = query.filter(column.is_(None))
+        if cursor and value is None:
+            undated = undated.filter(JobRecord.id < job_id)
+        rows += undated.order_by(JobRecord.id.desc()).limit(limit - len(rows)).all()
+    return rows
+
+
+def cached_total(signature: str, query, exact: bool = False) -> int:
+    """COUNT of `query`, reused for the same filter signature until it expires
+    or a job is stored. exact=True recounts and refreshes the entry."""
+    newest = db.session.query(func.max(JobRecord.id)).scalar()
+    now = time.monotonic()
+    hit = _counts.get(signature)
+    if not exact and hit and hit[0] > now and hit[1] == newest:
+        _counts.move_to_end(signature)
+        return hit[2]
+    total = query.order_by(None).count()
+    _counts[signature] = (now + COUNT_TTL_SECONDS, newest, total)
+    _counts.move_to_end(signature)
+    while len(_counts) > COUNT_CACHE_SIZE:
+        _counts.popitem(last=False)
+    return total
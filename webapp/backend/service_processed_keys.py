@@ -0,0 +1,68 @@
+"""Processed-job set for GET /api/jobs?hide_processed=true.
+
+processed_keys holds the dedup_key of every job with an application (any
+status). Hiding processed jobs is then one anti-join on that primary key,
+which also hides other rows of the same job (same canonical company +
+title). Maintained alongside applications:
+- create/delete application -> refresh_job(job_id)
+- dedup keys rewritten (alias learned, backfilled at start) -> rebuild()
+- first start -> ensure_built()
+Callers commit, except ensure_built().
+"""
+
+import logging
+
+from models import db, JobRecord, JobApplication, ProcessedKey
+from db_helpers import insert_ignore, get_meta, set_meta
+
+logger = logging.getLogger(__name__)
+
+
+def _processed(keys=None) -> set:
+    query = db.session.query(JobRecord.dedup_key).join(
+        JobApplication, JobApplication.job_id == JobRecord.id
+    ).filter(JobRecord.dedup_key.isnot(None))
+    if keys is not None:
+        query = query.filter(JobRecord.dedup_key.in_(keys))
+    return {k for (k,) in query.distinct().all()}
+
+
+def refresh(keys: list[str]):
+    """Re-derive membership of `keys` after an application change."""
+    keys = [k for k in keys if k]
+    if not keys:
+        return
+    processed = _processed(keys)
+    stale = [k for k in keys if k not in processed]
+    if stale:
+        ProcessedKey.query.filter(ProcessedKey.dedup_key.in_(stale)).delete(synchronize_session=False)
+    insert_ignore(ProcessedKey.__table__, [{"dedup_key": k} for k in processed])
+
+
+def refresh_job(job_id: int):
+    key = db.session.query(JobRecord.dedup_key).filter(JobRecord.id == job_id).scalar()
+    refresh([key])
+
+
+def rebuild():
+    """Recompute the whole set (one pass over applications)."""
+    ProcessedKey.query.delete(synchronize_session=False)
+    keys = _processed()
+    insert_ignore(ProcessedKey.__table__, [{"dedup_key": k} for k in keys])
+    logger.info(f"Processed keys rebuilt: {len(keys)}")
+
+
+def ensure_built():
+    """Build the set on the first start (runs under the startup lock); later
+    starts find the marker and skip the full pass."""
+    if get_meta("processed_keys_built") is not None:
+        return
+    rebuild()
+    set_meta("processed_keys_built", "1")
+    db.session.commit()
+
+
+def hidden_filter():
+    """Criterion excluding jobs whose dedup_key is processed."""
+    return ~db.session.query(ProcessedKey.dedup_key).filter(
+        ProcessedKey.dedup_key == JobRecord.dedup_key).exists()
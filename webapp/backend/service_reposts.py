@@ -0,0 +1,98 @@
+"""Repost detection at ingest.
+
+Employers repost the same role under a new source id every couple of weeks.
+An incoming job is a repost of a stored one when it has:
+- the same dedup_key (canonical company + normalized title),
+- a description within MAX_DISTANCE bits of the stored fingerprint, and
+- a stored posting first seen between REPOST_AFTER_DAYS and
+  REPOST_WINDOW_DAYS ago.
+Matches seen more recently are the same posting listed on another source
+(a job_sources sighting). Matches older than the window are treated as
+before.
+
+A repost is stored as a new job with repost_of_id pointing at the earlier
+posting, and it inherits that posting's application status. The earlier
+posting is found through the dedup_key index and then a primary-key
+lookup; no prior jobs are scanned.
+"""
+
+import os
+import logging
+from datetime import timedelta, timezone
+
+from models import db, JobRecord, JobApplication, ArchivedJob, DescriptionFingerprint
+from service_dedup import hamming, MAX_DISTANCE, _to_unsigned
+import service_top_candidates as top_candidates
+
+logger = logging.getLogger(__name__)
+
+REPOST_WINDOW_DAYS = int(os.environ.get("REPOST_WINDOW_DAYS", "60"))
+REPOST_AFTER_DAYS = int(os.environ.get("REPOST_AFTER_DAYS", "3"))
+LOOKUP_CHUNK = 500
+
+
+def stored_postings(job_ids) -> dict:
+    """{job id: (first_seen_at, fingerprint or None)} for the given stored
+    jobs, hot or archived."""
+    ids = list(set(job_ids))
+    found = {}
+    for model in (JobRecord, ArchivedJob):
+        ids = [i for i in ids if i not in found]
+        for i in range(0, len(ids), LOOKUP_CHUNK):
+            for row in db.session.query(
+                model.id, model.first_seen_at, DescriptionFingerprint.simhash,
+            ).outerjoin(DescriptionFingerprint, DescriptionFingerprint.job_id == model.id).filter(
+                model.id.in_(ids[i:i + LOOKUP_CHUNK])
+            ).all():
+                fp = _to_unsigned(row.simhash) if row.simhash is not None else None
+                found[row.id] = (row.first_seen_at, fp)
+    return found
+
+
+def is_repost(posting: tuple | None, fp: int | None, now) -> bool:
+    """Whether a job with fingerprint `fp` seen at `now` reposts `posting`
+    (an entry of stored_postings for the same dedup_key)."""
+    if posting is None or fp is None:
+        return False
+    first_seen_at, stored_fp = posting
+    if first_seen_at is None or stored_fp is None:
+        return False
+    if first_seen_at.tzinfo is None:
+        first_seen_at = first_seen_at.replace(tzinfo=timezone.utc)
+    age = now - first_seen_at
+    if not timedelta(days=REPOST_AFTER_DAYS) <= age <= timedelta(days=REPOST_WINDOW_DAYS):
+        return False
+    return hamming(fp, stored_fp) <= MAX_DISTANCE
+
+
+def inherit_status(links: list[tuple[int, int]], now) -> int:
+    """Give each new repost the application status of the posting it reposts.
+
+    links: [(new job id, earlier job id)]. Returns how many applications were
+    created. Call after top_candidates.add_jobs; caller commits.
+    """
+    earlier_ids = list({earlier for _, earlier in links})
+    applications = {}
+    for i in range(0, len(earlier_ids), LOOKUP_CHUNK):
+        applications.update((a.job_id, a) for a in JobApplication.query.filter(
+            JobApplication.job_id.in_(earlier_ids[i:i + LOOKUP_CHUNK])).all())
+
+    created = 0
+    for job_id, earlier in links:
+        previous = applications.get(earlier)
+        if previous is None:
+            continue
+        db.session.add(JobApplication(
+            job_id=job_id,
+            status=previous.status,
+            applied_date=previous.applied_date,
+            notes=f"Repost of job #{earlier}",
+            created_at=now,
+            updated_at=now,
+        ))
+        # Same dedup_key as the earlier posting, so processed_keys already has it
+        top_candidates.set_application_status(job_id, previous.status)
+        created += 1
+    if created:
+        logger.info(f"Reposts: {created} inherited an application status")
+    return created
@@ -0,0 +1,189 @@
+"""Compiled hard-filter rules shared by the scorer and the scraper title filter.
+
+Each rule set is compiled from the live filter settings into a program of
+one check per rule (a regex, or substring tests for keyword lists), run in
+precedence order until one fails. Programs
+are cached by filter signature, so edits made in the UI take effect on the
+next call without recompiling for every job.
+"""
+
+import re
+import copy
+import json
+from dataclasses import dataclass
+from functools import lru_cache
+
+# Structural contract patterns that are always applied on top of the
+# user-editable contract keyword list, each with the words it can't match
+# without
+CONTRACT_PATTERNS = [
+    (r'\b(?:contract|contractor|ftc)\b', ("contract", "ftc")),
+    (r'\d+[\s-]?months?\s*(?:contract|ftc|fixed)', ("month",)),           # "6 month contract/ftc/fixed"
+    (r'duration[:\s]+\d+\s*months?', ("duration",)),                        # "Duration: 6 months"
+    (r'\d+[\s-]?months?\s*(?:role|position|assignment|placement|engagement)', ("month",)),
+]
+
+SALARY_PATTERN = r'£\s*[\d,]+\s*k?'
+YEARS_PATTERN = r'\d+\+?\s*years?'
+
+_DIGITS = re.compile(r'\d[\d,]*')
+
+TITLE_EXCLUDE_KEYS = [
+    "title_exclude_roles", "title_exclude_seniority", "title_exclude_junior",
+    "title_exclude_analyst_prefixes", "title_exclude_other",
+]
+
+
+@dataclass(frozen=True)
+class Rule:
+    """A single hard-filter rule.
+
+    kind:
+        match    - fails when the pattern or one of `words` occurs anywhere
+        missing  - fails when neither ever occurs
+        salary   - fails when the highest stated salary is below `limit`
+        years    - fails when any stated year count is above `limit`
+
+    words: literal substrings, tested with `in`. Over a long description
+    that beats a regex alternation of the same keywords, which the title
+    rules use instead.
+    needs: words the pattern can't match without (one of them). Texts with
+    none of them skip the regex: a substring test is far cheaper than a
+    search for a pattern that doesn't start with a literal.
+    """
+    name: str
+    tag: str
+    pattern: str = ""
+    kind: str = "match"
+    limit: int = 0
+    needs: tuple = ()
+    words: tuple = ()
+
+
+class RuleProgram:
+    """An ordered list of rules, each compiled to its own check.
+
+    Rules are listed in precedence order; `first_failure` checks them one
+    after another, as the checks used to run, and stops at the first that
+    fails. A single search per rule lets the regex engine skip ahead to its
+    literal prefix; one alternation of every rule would be tried at every
+    character of the text.
+    """
+
+    def __init__(self, rules: list[Rule]):
+        self.rules = [r for r in rules if r.pattern or r.words]
+        self._checks = [(r, r.kind, re.compile(r.pattern) if r.pattern else None, r.needs, r.words)
+                        for r in self.rules]
+
+    def first_failure(self, text: str) -> Rule | None:
+        """Check `text` (already lowercased) and return the first failing rule."""
+        for rule, kind, regex, needs, words in self._checks:
+            possible = regex is not None and (not needs or any(word in text for word in needs))
+            if kind == "salary":
+                salaries = [v for v in map(_parse_salary, regex.findall(text)) if v is not None] \
+                    if possible else []
+                if salaries and max(salaries) < rule.limit:
+                    return rule
+            elif kind == "years":
+                if possible and any(int(_DIGITS.search(found).group()) > rule.limit
+                                    for found in regex.findall(text)):
+                    return rule
+            else:
+                occurs = any(word in text for word in words) or (possible and regex.search(text) is not None)
+                if occurs != (kind == "missing"):
+                    return rule
+        return None
+
+
+def _parse_salary(match_text: str) -> int | None:
+    """Turn '£30,000' / '£30k' into an annual figure, None if it doesn't look like one."""
+    digits = _DIGITS.search(match_text)
+    if not digits:
+        return None
+    val = int(digits.group().replace(',', ''))
+    if val < 1000:
+        val *= 1000
+    # Only consider values that look like annual salaries
+    if 15000 <= val <= 500000:
+        return val
+    return None
+
+
+def _keywords(keywords) -> tuple:
+    """Case-folded keywords, longest first, for substring tests."""
+    words = {kw.lower() for kw in (keywords or []) if kw and kw.strip()}
+    return tuple(sorted(words, key=len, reverse=True))
+
+
+def _keywords_pattern(keywords) -> str:
+    """Case-folded, longest-first literal alternation (substring semantics)."""
+    return "|".join(re.escape(w) for w in _keywords(keywords))
+
+
+def _int_setting(filters: dict, key: str, default: int) -> int:
+    value = filters.get(key)
+    try:
+        return int(value) if value is not None else default
+    except (TypeError, ValueError):
+        return default
+
+
+def filters_signature(filters: dict) -> str:
+    """Stable string identifying a filter configuration."""
+    return json.dumps(filters, sort_keys=True, default=str)
+
+
+@lru_cache(maxsize=16)
+def _compile_score_rules(signature: str) -> RuleProgram:
+    filters = json.loads(signature)
+    min_salary = _int_setting(filters, "min_salary", 45000)
+    max_years = _int_setting(filters, "max_experience_years", 5)
+    return RuleProgram([
+        Rule("salary", f"❌salary <£{min_salary // 1000}k", SALARY_PATTERN, "salary", min_salary, ("£",)),
+        Rule("contract", "❌contract", words=_keywords(filters.get("contract_keywords"))),
+        *(Rule(f"contract_{i}", "❌contract", pattern, needs=needs)
+          for i, (pattern, needs) in enumerate(CONTRACT_PATTERNS)),
+        Rule("language", "❌language requirement", words=_keywords(filters.get("language_exclude"))),
+        Rule("experience", f"❌>{max_years}yr experience", YEARS_PATTERN, "years", max_years, ("year",)),
+    ])
+
+
+@lru_cache(maxsize=16)
+def _compile_title_rules(signature: str) -> RuleProgram:
+    filters = json.loads(signature)
+    max_years = _int_setting(filters, "max_experience_years", 5)
+    excluded = []
+    for key in TITLE_EXCLUDE_KEYS:
+        excluded.extend(filters.get(key) or [])
+    return RuleProgram([
+        Rule("title_required", "❌title", _keywords_pattern(filters.get("title_must_contain")), "missing"),
+        Rule("title_exclude", "❌title", _keywords_pattern(excluded)),
+        Rule("contract", "❌contract", _keywords_pattern(filters.get("contract_keywords"))),
+        Rule("language", "❌language requirement", _keywords_pattern(filters.get("language_exclude"))),
+        Rule("experience", f"❌>{max_years}yr experience", YEARS_PATTERN, "years", max_years, ("year",)),
+    ])
+
+
+# Last program built per compiler, with a copy of its filters: a batch scores
+# every job with the same settings, and comparing them is far cheaper than
+# serializing them into a signature per job
+_last_built = {}
+
+
+def _build(compile_rules, filters: dict) -> RuleProgram:
+    last = _last_built.get(compile_rules)
+    if last is not None and last[0] == filters:
+        return last[1]
+    program = compile_rules(filters_signature(filters))
+    _last_built[compile_rules] = (copy.deepcopy(filters), program)
+    return program
+
+
+def build_score_rules(filters: dict) -> RuleProgram:
+    """Hard filters applied to title + description + salary text before scoring."""
+    return _build(_compile_score_rules, filters)
+
+
+def build_title_rules(filters: dict) -> RuleProgram:
+    """Title screen applied by the scrapers before a job is kept."""
+    return _build(_compile_title_rules, filters)
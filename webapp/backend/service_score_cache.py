@@ -0,0 +1,193 @@
+"""Persistent memoization of score_job results.
+
+A cached score is keyed by (keyword-set version, filter version, job content
+hash). Versions are content hashes of the keyword list and filter settings,
+so every gunicorn worker derives the same key without shared state, and a
+rescore with unchanged keywords/filters is a lookup instead of a re-score.
+The filter version also covers SCORER_VERSION, so a change to the scoring
+code (with its version bumped) invalidates every cached score.
+
+The cache holds the keyword score only; the resume similarity signal depends
+on the evolving corpus IDF, so it is blended in after the lookup.
+"""
+
+import json
+import hashlib
+import logging
+from datetime import datetime, timezone
+from functools import partial
+
+from models import db, ScoreCacheEntry
+from db_helpers import insert_ignore
+from service_rules import filters_signature
+from service_scoring import SCORER_VERSION, score_job, load_filters, blend_similarity
+
+logger = logging.getLogger(__name__)
+
+LOOKUP_CHUNK = 500
+
+# Process-wide counters (per worker), reported by /api/analytics/score-cache
+STATS = {"hits": 0, "misses": 0}
+
+
+def _sha1(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def content_hash(job_dict: dict) -> str:
+    """Hash of the fields score_job reads."""
+    return _sha1("\x1f".join([
+        job_dict.get("title") or "",
+        job_dict.get("description") or "",
+        job_dict.get("salary") or "",
+    ]))
+
+
+def _score_fields(boost_keywords: list, exclude_keywords: list, filters: dict, job_dict: dict) -> tuple:
+    """score_job's (match_score, match_tags, experience_ok); module level so a
+    process pool can run it."""
+    scored = score_job(dict(job_dict), boost_keywords, exclude_keywords, filters)
+    return scored["match_score"], scored["match_tags"], scored["experience_ok"]
+
+
+def keywords_version(boost_keywords: list, exclude_keywords: list) -> str:
+    def norm(kws):
+        return sorted([kw["keyword"], kw.get("weight")] for kw in kws)
+    return _sha1(json.dumps([norm(boost_keywords), norm(exclude_keywords)], default=str))
+
+
+def filters_version(filters: dict) -> str:
+    return _sha1(SCORER_VERSION + "\x1f" + filters_signature(filters))
+
+
+class ScoreCache:
+    """Score jobs for one keyword/filter configuration, consulting the cache first.
+
+    Usage:
+        cache = ScoreCache(boost_kws, exclude_kws)
+        cache.preload(job_dicts)           # optional, one query per chunk
+        scored = cache.score(job_dict)     # same contract as score_job
+        cache.score_many(job_dicts)        # a batch; misses optionally via a process pool
+        cache.flush()                      # stage new entries; caller commits
+    """
+
+    def __init__(self, boost_keywords: list, exclude_keywords: list, filters: dict | None = None):
+        self.boost_keywords = boost_keywords
+        self.exclude_keywords = exclude_keywords
+        self.filters = filters if filters is not None else load_filters()
+        self.keywords_version = keywords_version(boost_keywords, exclude_keywords)
+        self.filters_version = filters_version(self.filters)
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}   # content_hash -> (match_score, match_tags, experience_ok)
+        self._loaded = set()
+        self._pending = []
+
+    def preload(self, job_dicts):
+        """Fetch cached results for a batch of jobs with chunked IN lookups."""
+        hashes = [content_hash(j) for j in job_dicts]
+        todo = [h for h in dict.fromkeys(hashes) if h not in self._loaded]
+        for i in range(0, len(todo), LOOKUP_CHUNK):
+            chunk = todo[i:i + LOOKUP_CHUNK]
+            rows = db.session.query(
+                ScoreCacheEntry.content_hash, ScoreCacheEntry.match_score,
+                ScoreCacheEntry.match_tags, ScoreCacheEntry.experience_ok,
+            ).filter(
+                ScoreCacheEntry.keywords_version == self.keywords_version,
+                ScoreCacheEntry.filters_version == self.filters_version,
+                ScoreCacheEntry.content_hash.in_(chunk),
+            ).all()
+            for row in rows:
+                self._entries[row.content_hash] = (row.match_score, row.match_tags, row.experience_ok)
+            self._loaded.update(chunk)
+
+    def score(self, job_dict: dict, similarity: float | None = None) -> dict:
+        """Return job_dict with match_score, match_tags and experience_ok set."""
+        h = content_hash(job_dict)
+        if h not in self._loaded:
+            self.preload([job_dict])
+
+        cached = self._entries.get(h)
+        if cached is not None:
+            self.hits += 1
+            STATS["hits"] += 1
+            job_dict["match_score"], job_dict["match_tags"], job_dict["experience_ok"] = cached
+            return blend_similarity(job_dict, similarity)
+
+        self.misses += 1
+        STATS["misses"] += 1
+        scored = score_job(job_dict, self.boost_keywords, self.exclude_keywords, self.filters)
+        self._entries[h] = (scored["match_score"], scored["match_tags"], scored["experience_ok"])
+        self._pending.append({
+            "keywords_version": self.keywords_version,
+            "filters_version": self.filters_version,
+            "content_hash": h,
+            "match_score": scored["match_score"],
+            "match_tags": scored["match_tags"],
+            "experience_ok": scored["experience_ok"],
+            "created_at": datetime.now(timezone.utc),
+        })
+        return blend_similarity(scored, similarity)
+
+    def score_many(self, job_dicts: list, similarities=None, map_fn=map) -> list:
+        """score() for a batch: one preload, then the misses scored through
+        map_fn (e.g. a process pool's map). Returns the job_dicts."""
+        self.preload(job_dicts)
+        hashes = [content_hash(j) for j in job_dicts]
+        todo = {}
+        for h, job_dict in zip(hashes, job_dicts):
+            if h not in self._entries and h not in todo:
+                todo[h] = {"title": job_dict.get("title") or "",
+                           "description": job_dict.get("description") or "",
+                           "salary": job_dict.get("salary") or ""}
+        score = partial(_score_fields, self.boost_keywords, self.exclude_keywords, self.filters)
+        now = datetime.now(timezone.utc)
+        for h, cached in zip(todo, map_fn(score, todo.values())):
+            self._entries[h] = cached
+            self._pending.append({
+                "keywords_version": self.keywords_version,
+                "filters_version": self.filters_version,
+                "content_hash": h,
+                "match_score": cached[0],
+                "match_tags": cached[1],
+                "experience_ok": cached[2],
+                "created_at": now,
+            })
+        self.misses += len(todo)
+        self.hits += len(job_dicts) - len(todo)
+        STATS["misses"] += len(todo)
+        STATS["hits"] += len(job_dicts) - len(todo)
+
+        if similarities is None:
+            similarities = [None] * len(job_dicts)
+        for h, job_dict, similarity in zip(hashes, job_dicts, similarities):
+            job_dict["match_score"], job_dict["match_tags"], job_dict["experience_ok"] = self._entries[h]
+            blend_similarity(job_dict, similarity)
+        return job_dicts
+
+    def flush(self):
+        """Stage newly computed entries in the current transaction."""
+        insert_ignore(ScoreCacheEntry.__table__, self._pending)
+        self._pending = []
+
+    def prune_stale(self) -> int:
+        """Drop entries computed under other keyword/filter/scorer versions."""
+        removed = ScoreCacheEntry.query.filter(
+            (ScoreCacheEntry.keywords_version != self.keywords_version) |
+            (ScoreCacheEntry.filters_version != self.filters_version)
+        ).delete(synchronize_session=False)
+        if removed:
+            logger.info(f"Score cache: pruned {removed} stale entries")
+        return removed
+
+    def stats(self) -> dict:
+        return {"cache_hits": self.hits, "cache_misses": self.misses}
+
+
+def cache_stats() -> dict:
+    """Process counters plus the persisted cache size."""
+    return {
+        "hits": STATS["hits"],
+        "misses": STATS["misses"],
+        "entries": ScoreCacheEntry.query.count(),
+    }
@@ -1,25 +1,31 @@
 """Adaptive job scoring using user keywords and learned weights.
 
-Hard filters:
-- Exclude jobs requiring more than 5 years experience
+Hard filters (compiled from the live filter settings, see service_rules):
+- Exclude jobs with a stated salary below the minimum
 - Exclude contract/freelance jobs
+- Exclude jobs requiring a language other than Chinese/English
+- Exclude jobs requiring more than max_experience_years experience
 """
 
 import re
 import json
 import logging
 
+from service_rules import build_score_rules
+
 logger = logging.getLogger(__name__)
 
-# Experience keywords that indicate >5 years required
-EXPERIENCE_EXCLUDE = [
-    "6+ years", "7+ years", "8+ years", "10+ years",
-    "12+ years", "15+ years",
-    "6 years experience", "7 years experience",
-    "8 years experience", "10 years experience",
-]
+YEARS_RE = re.compile(r'(\d+)\+?\s*years?')
+
+# Part of the score cache key (service_score_cache): bump whenever score_job or
+# the rules it compiles (service_rules) change what a job scores, so cached
+# scores from the old logic stop matching and prune_stale drops them
+SCORER_VERSION = "1"
+
+# Points added at cosine similarity 1.0 between resume and job (see service_similarity)
+SIMILARITY_WEIGHT = 4.0
 
-# Contract keywords
+# Contract keywords (fallback when filter settings can't be loaded)
 CONTRACT_KEYWORDS = [
     "contract", "contractor", "freelance", "freelancer",
     "fixed term", "fixed-term", "temporary",
@@ -39,46 +45,7 @@ LANGUAGE_EXCLUDE = [
 ]
 
 
-def _exceeds_max_experience(text: str, max_years: int = 5) -> bool:
-    """Check if description requires more than max_years experience."""
-    for kw in EXPERIENCE_EXCLUDE:
-        if kw in text:
-            return True
-    years_match = re.findall(r'(\d+)\+?\s*years?', text)
-    for y in years_match:
-        if int(y) > max_years:
-            return True
-    return False
-
-
-def _is_contract_job(text: str) -> bool:
-    """Check if text indicates a contract role."""
-    for kw in CONTRACT_KEYWORDS:
-        if kw in text:
-            return True
-    if re.search(r'\b(contract|contractor|ftc)\b', text):
-        return True
-    # "6 month contract/ftc/fixed"
-    if re.search(r'\d+[\s-]?months?\s*(contract|ftc|fixed)', text):
-        return True
-    # "Duration: 6 months" or "duration: 12 months"
-    if re.search(r'duration[:\s]+\d+\s*months?', text):
-        return True
-    # "X month role/position/assignment/placement"
-    if re.search(r'\d+[\s-]?months?\s*(role|position|assignment|placement|engagement)', text):
-        return True
-    return False
-
-
-def _requires_other_language(text: str) -> bool:
-    """Check if job requires a language other than Chinese/English."""
-    for lang in LANGUAGE_EXCLUDE:
-        if lang in text:
-            return True
-    return False
-
-
-def _get_filters():
+def load_filters() -> dict:
     """Load filter settings from DB (with fallback to defaults)."""
     try:
         from api_filters import get_all_filters
@@ -92,47 +59,40 @@ def _get_filters():
         }
 
 
-def _salary_below_minimum(text: str, min_salary: int = 45000) -> bool:
-    """Check if a stated salary is below the minimum threshold.
+def blend_similarity(job_dict: dict, similarity: float | None) -> dict:
+    """Add the resume-similarity signal to an already scored job.
 
-    For salary ranges like '£24,000 - £35,000', filters if the highest
-    value in the range is still below the minimum.
+    Hard-filtered jobs (-99) are left alone.
     """
-    # Match patterns like £30,000, £30000, £30k
-    matches = re.findall(r'£\s*([\d,]+)\s*(?:k|K)?', text)
-    if not matches:
-        return False
-
-    # Parse all salary values found
-    salaries = []
-    for m in matches:
-        val = int(m.replace(',', ''))
-        if val < 1000:
-            val *= 1000
-        # Only consider values that look like annual salaries
-        if 15000 <= val <= 500000:
-            salaries.append(val)
-
-    if not salaries:
-        return False
-
-    # If the highest salary in the text is below minimum, filter it out
-    max_salary = max(salaries)
-    return max_salary < min_salary
-
-
-def score_job(job_dict: dict, boost_keywords: list, exclude_keywords: list) -> dict:
+    if similarity is None or job_dict["match_score"] <= -99:
+        return job_dict
+    bonus = round(SIMILARITY_WEIGHT * similarity, 2)
+    if bonus <= 0:
+        return job_dict
+    tags = json.loads(job_dict["match_tags"]) if job_dict.get("match_tags") else []
+    tags.append(f"📄resume {similarity:.0%}")
+    job_dict["match_score"] = round(job_dict["match_score"] + bonus, 2)
+    job_dict["match_tags"] = json.dumps(tags)
+    return job_dict
+
+
+def score_job(job_dict: dict, boost_keywords: list, exclude_keywords: list,
+              filters: dict | None = None, similarity: float | None = None) -> dict:
     """Score a job using user-defined keywords with weights.
 
-    Hard filters applied first:
-    - Must not require >5 years experience -> score -99 if exceeds
-    - Must not be a contract role -> score -99 if contract
-    - Salary must be >= £45,000 if stated
+    Hard filters applied first, in order (score -99 on the first failure):
+    - Salary must be >= min_salary if stated
+    - Must not be a contract role
+    - Must not require a language other than Chinese/English
+    - Must not require more than max_experience_years experience
 
     Args:
         job_dict: dict with title, description, etc.
         boost_keywords: list of {"keyword": str, "weight": float}
         exclude_keywords: list of {"keyword": str, "weight": float}
+        filters: filter settings; loaded from DB when not given. Callers
+            scoring a batch should load them once and pass them in.
+        similarity: optional resume/job cosine similarity (0-1) to blend in.
 
     Returns:
         Updated job_dict with match_score, match_tags, experience_ok.
@@ -143,33 +103,13 @@ def score_job(job_dict: dict, boost_keywords: list, exclude_keywords: list) -> d
     experience_ok = True
 
     # Load dynamic filters from DB
-    filters = _get_filters()
-
-    # Hard filter: salary below minimum
-    if _salary_below_minimum(text, filters.get("min_salary", 45000)):
-        job_dict["match_score"] = -99
-        job_dict["match_tags"] = json.dumps(["❌salary <£45k"])
-        job_dict["experience_ok"] = False
-        return job_dict
-
-    # Hard filter: no contract jobs
-    if _is_contract_job(text):
-        job_dict["match_score"] = -99
-        job_dict["match_tags"] = json.dumps(["❌contract"])
-        job_dict["experience_ok"] = False
-        return job_dict
+    if filters is None:
+        filters = load_filters()
 
-    # Hard filter: no non-Chinese/English language requirements
-    if _requires_other_language(text):
+    failed = build_score_rules(filters).first_failure(text)
+    if failed:
         job_dict["match_score"] = -99
-        job_dict["match_tags"] = json.dumps(["❌language requirement"])
-        job_dict["experience_ok"] = False
-        return job_dict
-
-    # Hard filter: no more than 5 years experience required
-    if _exceeds_max_experience(text):
-        job_dict["match_score"] = -99
-        job_dict["match_tags"] = json.dumps(["❌>5yr experience"])
+        job_dict["match_tags"] = json.dumps([failed.tag])
         job_dict["experience_ok"] = False
         return job_dict
 
@@ -210,7 +150,7 @@ def score_job(job_dict: dict, boost_keywords: list, exclude_keywords: list) -> d
         tags.append("🤖AI")
 
     # Experience year detection (bonus for <=5 years)
-    years_match = re.findall(r'(\d+)\+?\s*years?', text)
+    years_match = YEARS_RE.findall(text)
     for y in years_match:
         yr = int(y)
         if yr <= 5:
@@ -219,4 +159,4 @@ def score_job(job_dict: dict, boost_keywords: list, exclude_keywords: list) -> d
     job_dict["match_score"] = round(score, 2)
     job_dict["match_tags"] = json.dumps(tags)
     job_dict["experience_ok"] = experience_ok
-    return job_dict
+    return blend_similarity(job_dict, similarity)
@@ -13,6 +13,18 @@ from datetime import datetime, timezone
 from base64 import b64encode
 
 from models import db, JobRecord, SearchSession
+from service_rules import RuleProgram, build_title_rules
+import service_top_candidates as top_candidates
+from service_similarity import ResumeMatcher, term_counts, job_text, index_jobs
+import service_similar_jobs as similar_index
+from db_helpers import insert_ignore_returning
+import db_writer
+from service_dedup import (dedup_key, company_key, simhash, SimHashIndex, find_stored,
+                           find_stored_keys, add_to_index as add_fingerprints)
+from service_company import load_aliases, refresh_aliases, learn_aliases
+from service_job_sources import (sighting, merge_fields, find_stored_sources, record_sightings,
+                                 merge_into_stored)
+from service_reposts import stored_postings, is_repost, inherit_status
 
 logger = logging.getLogger(__name__)
 
@@ -25,108 +37,19 @@ LOCATION = "London"
 COUNTRY = "gb"
 MAX_RESULTS_PER_QUERY = 50
 MIN_SALARY = 45000  # Minimum annual salary £45,000
-
-# Title filters - target roles
-TITLE_MUST_CONTAIN = [
-    "analyst",  # any role containing analyst
-    "product manager",  # includes associate/junior/senior product manager
-]
-
-TITLE_EXCLUDE = [
-    "scientist", "data scientist", "research scientist",
-    "engineer", "software engineer", "backend engineer", "frontend engineer",
-    "DevOps engineer", "QA engineer", "test engineer",
-    "director", "VP", "vice president", "head of", "chief",
-    "principal", "staff", "distinguished", "partner",
-    "6+ years", "7+ years", "8+ years", "10+ years",
-    "6 years", "7 years", "8 years", "10 years", "12 years", "15 years",
-    "intern", "internship", "graduate programme", "graduate program",
-    "graduate scheme", "entry level trainee",
-    "apprentice", "apprenticeship", "placement year",
-    "C++ developer", "Java developer",
-    "iOS developer", "Android developer",
-    "accountant", "solicitor", "nurse", "warehouse", "driver",
-    "IT ", "IT analyst", "summer",
-    # Training / bootcamp posts (not real jobs)
-    "job guarantee", "bootcamp", "training programme", "course",
-    # Analyst roles: exclude associate/junior/intern prefix
-    "associate analyst", "junior analyst", "intern analyst",
-    "associate data analyst", "junior data analyst",
-    "associate product analyst", "junior product analyst",
-    "associate business analyst", "junior business analyst",
-    "associate insight analyst", "junior insight analyst",
-]
-
-# Contract job keywords
-CONTRACT_KEYWORDS = [
-    "contract", "contractor", "freelance", "freelancer",
-    "fixed term", "fixed-term", "temp ",
-    "FTC", "ftc", " month ftc", "month contract",
-    "6 month", "12 month", "3 month", "9 month",
-    "maternity cover", "paternity cover", "temporary",
-    "interim", "inside ir35", "outside ir35", "day rate", "ir35",
-]
-
-# Language requirements to exclude (keep only Chinese/English roles)
-LANGUAGE_EXCLUDE = [
-    "french", "german", "spanish", "italian", "portuguese",
-    "dutch", "japanese", "korean", "arabic", "russian",
-    "turkish", "polish", "hindi", "swedish", "norwegian",
-    "danish", "finnish", "greek", "hebrew", "czech",
-    "hungarian", "romanian", "thai", "vietnamese",
-    "mandarin speaker", "cantonese speaker",
-]
-
+# Jobs per write transaction when storing a search (one bulk insert each)
+STORE_CHUNK = int(os.environ.get("STORE_CHUNK", "500"))
 
 def _clean_html(text: str) -> str:
     return re.sub(r'<[^>]+>', '', text or "")
 
 
-def _passes_title_filter(title: str) -> bool:
-    t = title.lower()
-    if TITLE_MUST_CONTAIN:
-        if not any(kw.lower() in t for kw in TITLE_MUST_CONTAIN):
-            return False
-    if TITLE_EXCLUDE:
-        if any(kw.lower() in t for kw in TITLE_EXCLUDE):
-            return False
-    # Exclude contract jobs from title
-    for kw in CONTRACT_KEYWORDS:
-        if kw.lower() in t:
-            return False
-    # Exclude jobs requiring non-Chinese/English languages in title
-    for lang in LANGUAGE_EXCLUDE:
-        if lang.lower() in t:
-            return False
-    return True
-
-
-def _is_contract_job(text: str) -> bool:
-    """Check if text indicates a contract role."""
-    t = f" {text.lower()} "
-    for kw in CONTRACT_KEYWORDS:
-        if kw.lower() in t:
-            return True
-    if re.search(r'\b(contract|contractor|ftc)\b', t):
-        return True
-    if re.search(r'\d+[\s-]?months?\s*(contract|ftc|fixed)', t):
-        return True
-    # "Duration: 6 months"
-    if re.search(r'duration[:\s]+\d+\s*months?', t):
-        return True
-    # "X month role/position/assignment"
-    if re.search(r'\d+[\s-]?months?\s*(role|position|assignment|placement|engagement)', t):
-        return True
-    return False
-
-
-def _requires_other_language(text: str) -> bool:
-    """Check if job requires a language other than Chinese/English."""
-    t = text.lower()
-    for lang in LANGUAGE_EXCLUDE:
-        if lang.lower() in t:
-            return True
-    return False
+def _passes_title_filter(title: str, title_rules: RuleProgram | None = None) -> bool:
+    """Screen a title against the live title/contract/language filters."""
+    if title_rules is None:
+        from service_scoring import load_filters
+        title_rules = build_title_rules(load_filters())
+    return title_rules.first_failure(title.lower()) is None
 
 
 # Default job-title search queries (always used as the base)
@@ -171,7 +94,7 @@ def _build_search_queries(keywords: list[dict]) -> list[str]:
     return queries[:12]  # Cap at 12 queries
 
 
-def _make_unique_key(source: str, job_id: str, title: str, company: str) -> str:
+def make_unique_key(source: str, job_id: str, title: str, company: str) -> str:
     if job_id:
         return f"{source}_{job_id}"
     clean_title = re.sub(r'[^a-z0-9]', '', title.lower())
@@ -183,7 +106,7 @@ def _make_unique_key(source: str, job_id: str, title: str, company: str) -> str:
 # Adzuna API
 # ============================================================
 
-def fetch_adzuna(queries: list[str]) -> list[dict]:
+def fetch_adzuna(queries: list[str], title_rules: RuleProgram | None = None) -> list[dict]:
     """Fetch jobs from Adzuna API."""
     all_jobs = []
     base_url = f"https://api.adzuna.com/v1/api/jobs/{COUNTRY}/search/1"
@@ -210,7 +133,7 @@ def fetch_adzuna(queries: list[str]) -> list[dict]:
             count = 0
             for item in data.get("results", []):
                 title = item.get("title", "")
-                if not _passes_title_filter(title):
+                if not _passes_title_filter(title, title_rules):
                     continue
 
                 salary = ""
@@ -232,7 +155,7 @@ def fetch_adzuna(queries: list[str]) -> list[dict]:
                     "description": _clean_html(item.get("description", ""))[:500],
                     "posted_date": item.get("created", "")[:10],
                     "job_id": job_id,
-                    "unique_key": _make_unique_key("adzuna", job_id, title,
+                    "unique_key": make_unique_key("adzuna", job_id, title,
                                                     item.get("company", {}).get("display_name", "")),
                 })
                 count += 1
@@ -249,7 +172,7 @@ def fetch_adzuna(queries: list[str]) -> list[dict]:
 # LinkedIn (public job listings)
 # ============================================================
 
-def fetch_linkedin(queries: list[str]) -> list[dict]:
+def fetch_linkedin(queries: list[str], title_rules: RuleProgram | None = None) -> list[dict]:
     """Fetch jobs from LinkedIn public listings."""
     all_jobs = []
     base_url = "https://www.linkedin.com/jobs-guest/jobs/api/seeMoreJobPostings/search"
@@ -301,7 +224,7 @@ def fetch_linkedin(queries: list[str]) -> list[dict]:
 
             for i in range(num_jobs):
                 title = _clean_html(titles[i]).strip()
-                if not _passes_title_filter(title):
+                if not _passes_title_filter(title, title_rules):
                     continue
 
                 company = _clean_html(companies[i]).strip() if i < len(companies) else "Unknown"
@@ -322,7 +245,7 @@ def fetch_linkedin(queries: list[str]) -> list[dict]:
                     "description": "",
                     "posted_date": posted,
                     "job_id": jid,
-                    "unique_key": _make_unique_key("linkedin", jid, title, company),
+                    "unique_key": make_unique_key("linkedin", jid, title, company),
                 })
                 count += 1
 
@@ -339,7 +262,7 @@ def fetch_linkedin(queries: list[str]) -> list[dict]:
 # Google Jobs (via SerpAPI)
 # ============================================================
 
-def fetch_google_jobs(queries: list[str]) -> list[dict]:
+def fetch_google_jobs(queries: list[str], title_rules: RuleProgram | None = None) -> list[dict]:
     """Fetch jobs from Google Jobs via SerpAPI."""
     if SERPAPI_KEY == "YOUR_SERPAPI_KEY":
         logger.warning("  SerpAPI not configured, skipping Google Jobs")
@@ -369,7 +292,7 @@ def fetch_google_jobs(queries: list[str]) -> list[dict]:
             count = 0
             for item in data.get("jobs_results", []):
                 title = item.get("title", "")
-                if not _passes_title_filter(title):
+                if not _passes_title_filter(title, title_rules):
                     continue
 
                 desc = item.get("description", "")[:500]
@@ -397,7 +320,7 @@ def fetch_google_jobs(queries: list[str]) -> list[dict]:
                     "description": desc,
                     "posted_date": posted,
                     "job_id": job_id,
-                    "unique_key": _make_unique_key("google_jobs", job_id, title, company),
+                    "unique_key": make_unique_key("google_jobs", job_id, title, company),
                 })
                 count += 1
 
@@ -477,7 +400,7 @@ def fetch_x_twitter() -> list[dict]:
                         "description": desc,
                         "posted_date": "",
                         "job_id": link,
-                        "unique_key": _make_unique_key("x_twitter", link, text[:120], "x_twitter"),
+                        "unique_key": make_unique_key("x_twitter", link, text[:120], "x_twitter"),
                     })
 
                 fetched = True
@@ -501,7 +424,7 @@ JUNGLE_ALGOLIA_API_KEY = os.environ.get("JUNGLE_ALGOLIA_API_KEY", "")
 JUNGLE_ALGOLIA_INDEX = os.environ.get("JUNGLE_ALGOLIA_INDEX", "wttj_jobs_production_en")
 
 
-def fetch_jungle() -> list[dict]:
+def fetch_jungle(title_rules: RuleProgram | None = None) -> list[dict]:
     """Fetch jobs from Jungle (Welcome to the Jungle) via Algolia search."""
     all_jobs = []
 
@@ -531,7 +454,7 @@ def fetch_jungle() -> list[dict]:
             count = 0
             for hit in data.get("hits", []):
                 title = hit.get("name", "")
-                if not _passes_title_filter(title):
+                if not _passes_title_filter(title, title_rules):
                     continue
 
                 # Check for London office
@@ -578,7 +501,7 @@ def fetch_jungle() -> list[dict]:
                     "description": desc,
                     "posted_date": posted,
                     "job_id": job_id,
-                    "unique_key": _make_unique_key("jungle", job_id, title, company_name),
+                    "unique_key": make_unique_key("jungle", job_id, title, company_name),
                 })
                 count += 1
 
@@ -594,11 +517,52 @@ def fetch_jungle() -> list[dict]:
 # Main entry point
 # ============================================================
 
+def dedup_batch(raw_jobs: list[dict], now) -> list[dict]:
+    """Cross-source deduplication within one fetch: same title+company or a
+    near-duplicate description is the same job. Duplicates are merged into
+    the job kept first and recorded in its "_sightings"; returns the kept
+    jobs, in order, each with "_simhash" set."""
+    seen_dedup = {}            # title+company key -> job_data kept for it
+    seen_desc = SimHashIndex()  # description fingerprints of kept jobs
+    kept_jobs = []
+    for job_data in raw_jobs:
+        dk = dedup_key(job_data["title"], job_data["company"])
+        ck = company_key(job_data["company"])
+        fp = simhash(job_data.get("description", ""))
+        job_data["_simhash"] = fp
+        job_data["_sightings"] = [sighting(job_data, now)]
+
+        # Same title+company, or near-duplicate description (different title or wording)
+        kept = seen_dedup.get(dk)
+        if kept is None and fp is not None:
+            kept = seen_desc.find(fp, ck)
+        if kept is not None:
+            # Later sightings under this title+company or description belong to the same job
+            seen_dedup.setdefault(dk, kept)
+            if fp is not None:
+                seen_desc.add(fp, ck, kept)
+            kept["_sightings"].append(job_data["_sightings"][0])
+            if "description" in merge_fields(kept, job_data):
+                kept["_simhash"] = simhash(kept["description"])
+                if kept["_simhash"] is not None:
+                    seen_desc.add(kept["_simhash"], company_key(kept["company"]), kept)
+            continue
+
+        seen_dedup[dk] = job_data
+        kept_jobs.append(job_data)
+        if fp is not None:
+            seen_desc.add(fp, ck, job_data)
+    return kept_jobs
+
+
 def fetch_and_store_jobs(keywords: list[dict]) -> dict:
     """Fetch jobs from all sources, score with user keywords, and store in DB."""
-    from service_scoring import score_job
+    from service_scoring import load_filters
+    from service_score_cache import ScoreCache
 
     queries = _build_search_queries(keywords)
+    filters = load_filters()
+    title_rules = build_title_rules(filters)
     logger.info(f"Starting job search with queries: {queries}")
 
     # Fetch from all sources
@@ -606,7 +570,7 @@ def fetch_and_store_jobs(keywords: list[dict]) -> dict:
 
     logger.info("--- Fetching from Adzuna ---")
     try:
-        adzuna_jobs = fetch_adzuna(queries)
+        adzuna_jobs = fetch_adzuna(queries, title_rules)
         all_raw_jobs.extend(adzuna_jobs)
         logger.info(f"  Adzuna total: {len(adzuna_jobs)}")
     except Exception as e:
@@ -614,7 +578,7 @@ def fetch_and_store_jobs(keywords: list[dict]) -> dict:
 
     logger.info("--- Fetching from LinkedIn ---")
     try:
-        linkedin_jobs = fetch_linkedin(queries)
+        linkedin_jobs = fetch_linkedin(queries, title_rules)
         all_raw_jobs.extend(linkedin_jobs)
         logger.info(f"  LinkedIn total: {len(linkedin_jobs)}")
     except Exception as e:
@@ -622,7 +586,7 @@ def fetch_and_store_jobs(keywords: list[dict]) -> dict:
 
     logger.info("--- Fetching from Google Jobs ---")
     try:
-        google_jobs = fetch_google_jobs(queries)
+        google_jobs = fetch_google_jobs(queries, title_rules)
         all_raw_jobs.extend(google_jobs)
         logger.info(f"  Google Jobs total: {len(google_jobs)}")
     except Exception as e:
@@ -638,7 +602,7 @@ def fetch_and_store_jobs(keywords: list[dict]) -> dict:
 
     logger.info("--- Fetching from Jungle ---")
     try:
-        jungle_jobs = fetch_jungle()
+        jungle_jobs = fetch_jungle(title_rules)
         all_raw_jobs.extend(jungle_jobs)
         logger.info(f"  Jungle total: {len(jungle_jobs)}")
     except Exception as e:
@@ -646,145 +610,212 @@ def fetch_and_store_jobs(keywords: list[dict]) -> dict:
 
     logger.info(f"Total fetched from all sources: {len(all_raw_jobs)}")
 
-    # Cross-source deduplication: same title+company OR same description = same job
-    def _dedup_key(title: str, company: str) -> str:
-        t = re.sub(r'[^a-z0-9]', '', title.lower())
-        c = re.sub(r'[^a-z0-9]', '', company.lower())
-        return f"{c}_{t}"
-
-    def _desc_fingerprint(description: str) -> str | None:
-        """First 200 chars of description, normalised. None if description too short."""
-        fp = re.sub(r'\s+', ' ', (description or "").lower().strip())[:200]
-        return fp if len(fp) >= 50 else None  # ignore very short/empty descriptions
-
-    seen_dedup = {}   # title+company key -> job_data
-    seen_desc = {}    # description fingerprint -> job_data
-    dedup_count = 0
-    for job_data in all_raw_jobs:
-        dk = _dedup_key(job_data["title"], job_data["company"])
-        fp = _desc_fingerprint(job_data.get("description", ""))
-
-        # Check duplicate by title+company
-        if dk in seen_dedup:
-            existing = seen_dedup[dk]
-            if (not existing.get("salary") and job_data.get("salary")) or \
-               (not existing.get("description") and job_data.get("description")):
-                seen_dedup[dk] = job_data
-                if fp:
-                    seen_desc[fp] = job_data
-            dedup_count += 1
-            continue
+    # Cross-source deduplication: same title+company OR near-duplicate description = same job
+    refresh_aliases()
+    now = datetime.now(timezone.utc)
+    total_fetched = len(all_raw_jobs)
+    all_raw_jobs = dedup_batch(all_raw_jobs, now)
+    if len(all_raw_jobs) < total_fetched:
+        logger.info(f"  Cross-source dedup merged {total_fetched - len(all_raw_jobs)} duplicates, "
+                    f"{len(all_raw_jobs)} unique jobs remain")
 
-        # Check duplicate by description fingerprint (same job, different title)
-        if fp and fp in seen_desc:
-            dedup_count += 1
-            continue
-
-        seen_dedup[dk] = job_data
-        if fp:
-            seen_desc[fp] = job_data
-
-    all_raw_jobs = list(seen_dedup.values())
-    if dedup_count:
-        logger.info(f"  Cross-source dedup removed {dedup_count} duplicates, {len(all_raw_jobs)} unique jobs remain")
-
-    # Create search session
-    boost_kws = [k["keyword"] for k in keywords if k.get("category") == "boost"]
-    sources_used = ",".join(set(j["source"] for j in all_raw_jobs)) if all_raw_jobs else ""
-    session = SearchSession(
-        query_text=json.dumps(boost_kws),
-        total_results=0,
-        sources=sources_used,
-        created_at=datetime.now(timezone.utc),
-    )
-    db.session.add(session)
-    db.session.flush()
-
-    # Score and store
+    # Score outside any write transaction; the writes go through db_writer below
     boost_keywords = [{"keyword": k["keyword"], "weight": k.get("weight", 1.0)}
                       for k in keywords if k.get("category") == "boost"]
     exclude_keywords = [{"keyword": k["keyword"], "weight": k.get("weight", 2.0)}
                         for k in keywords if k.get("category") == "exclude"]
-
-    # Pre-load existing dedup keys and description fingerprints from DB
-    existing_dedup_keys = set()
-    existing_desc_fps = set()
-    for row in JobRecord.query.with_entities(JobRecord.title, JobRecord.company, JobRecord.description).all():
-        dk = _dedup_key(row.title or "", row.company or "")
-        existing_dedup_keys.add(dk)
-        fp = _desc_fingerprint(row.description or "")
-        if fp:
-            existing_desc_fps.add(fp)
-
-    new_count = 0
+    score_cache = ScoreCache(boost_keywords, exclude_keywords, filters)
+    score_cache.preload(all_raw_jobs)
+    matcher = ResumeMatcher.load()
+
+    # Pre-resolve what is already stored for this batch: recorded sightings,
+    # title+company keys and near-duplicate descriptions
+    stored_sources = find_stored_sources(
+        s["unique_key"] for job_data in all_raw_jobs for s in job_data["_sightings"])
+    existing_dedup_keys = find_stored_keys(
+        dedup_key(job_data["title"], job_data["company"]) for job_data in all_raw_jobs)
+    stored_near_dups = find_stored(
+        (job_data["_simhash"], company_key(job_data["company"]))
+        for job_data in all_raw_jobs if job_data["_simhash"] is not None)
+    earlier_postings = stored_postings(existing_dedup_keys.values())
+
+    rows = []   # (jobs row, term counts, fingerprint, company key, sightings)
+    merges = {}     # stored job id -> [job_data] seen again
+    new_sightings = []  # job_sources rows
+    alias_sightings = []  # (company, title, stored job id) for description duplicates
+    skipped = {"existing": 0, "duplicate": 0, "filtered": 0}
     seen_keys = set()
     for job_data in all_raw_jobs:
         unique_key = job_data["unique_key"]
 
         # Skip duplicates within batch (same source/id)
         if unique_key in seen_keys:
+            skipped["duplicate"] += 1
             continue
         seen_keys.add(unique_key)
 
-        # Skip if already in DB by unique_key (exact match)
-        existing = JobRecord.query.filter_by(unique_key=unique_key).first()
-        if existing:
+        # Already stored: same sighting (exact match), same title+company from
+        # another source, or same description under a different title/wording
+        dk = dedup_key(job_data["title"], job_data["company"])
+        fp = job_data["_simhash"]
+        ck = company_key(job_data["company"])
+        stored_id = stored_sources.get(unique_key)
+        repost_of = None
+        if stored_id is not None:
+            skipped["existing"] += 1
+        else:
+            stored_id = existing_dedup_keys.get(dk)
+            if stored_id is not None and is_repost(earlier_postings.get(stored_id), fp, now):
+                # A new posting of a role stored earlier: store it, linked
+                repost_of, stored_id = stored_id, None
+            elif stored_id is None and fp is not None:
+                stored_id = stored_near_dups.get((fp, ck))
+                if stored_id is not None:
+                    alias_sightings.append((job_data["company"], job_data["title"], stored_id))
+            if stored_id is not None:
+                skipped["duplicate"] += 1
+        if stored_id is not None:
+            merges.setdefault(stored_id, []).append(job_data)
+            new_sightings.extend({**s, "job_record_id": stored_id} for s in job_data["_sightings"]
+                                 if s["unique_key"] not in stored_sources)
             continue
 
-        # Skip cross-source duplicates: same title+company already stored from another source
-        dk = _dedup_key(job_data["title"], job_data["company"])
-        if dk in existing_dedup_keys:
-            continue
-
-        # Skip description duplicates: same job listed twice with different titles
-        fp = _desc_fingerprint(job_data.get("description", ""))
-        if fp and fp in existing_desc_fps:
-            continue
-
-        existing_dedup_keys.add(dk)
-        if fp:
-            existing_desc_fps.add(fp)
-
         # Score (include salary in the text for salary filtering)
-        scored = score_job(
+        counts = term_counts(job_text(job_data))
+        scored = score_cache.score(
             {"title": job_data["title"],
              "description": job_data.get("description", ""),
              "salary": job_data.get("salary", "")},
-            boost_keywords,
-            exclude_keywords,
-        )
+            matcher.similarity(counts))
 
         # Skip jobs that fail hard filters (no AI mention or >5yr experience)
         if scored["match_score"] <= -99:
+            skipped["filtered"] += 1
             continue
 
-        record = JobRecord(
-            job_id=job_data["job_id"],
-            source=job_data["source"],
-            unique_key=unique_key,
-            title=job_data["title"],
-            company=job_data["company"],
-            location=job_data["location"],
-            salary=job_data.get("salary", ""),
-            url=job_data["url"],
-            description=job_data.get("description", ""),
-            posted_date=job_data.get("posted_date", ""),
-            match_score=scored["match_score"],
-            match_tags=scored["match_tags"],
-            experience_ok=scored["experience_ok"],
-            search_session_id=session.id,
-            first_seen_at=datetime.now(timezone.utc),
-        )
-        db.session.add(record)
-        new_count += 1
+        rows.append(({
+            "job_id": job_data["job_id"],
+            "source": job_data["source"],
+            "unique_key": unique_key,
+            "dedup_key": dk,
+            "company_key": ck,
+            "title": job_data["title"],
+            "company": job_data["company"],
+            "location": job_data["location"],
+            "salary": job_data.get("salary", ""),
+            "url": job_data["url"],
+            "description": job_data.get("description", ""),
+            "posted_date": job_data.get("posted_date", ""),
+            "match_score": scored["match_score"],
+            "match_tags": scored["match_tags"],
+            "experience_ok": scored["experience_ok"],
+            "first_seen_at": now,
+            "repost_of_id": repost_of,
+        }, counts, fp, ck, job_data["_sightings"]))
 
-    session.total_results = new_count
-    db.session.commit()
+    boost_kws = [k["keyword"] for k in keywords if k.get("category") == "boost"]
+    sources_used = ",".join(set(j["source"] for j in all_raw_jobs)) if all_raw_jobs else ""
 
-    logger.info(f"Stored {new_count} new jobs (out of {len(all_raw_jobs)} fetched)")
+    def start_session():
+        session = SearchSession(
+            query_text=json.dumps(boost_kws),
+            total_results=0,
+            sources=sources_used,
+            status="storing",
+            created_at=datetime.now(timezone.utc),
+        )
+        db.session.add(session)
+        db.session.flush()
+        return session.id
+
+    def store_chunk(session_id, chunk):
+        """Store one chunk of new jobs with their index entries and sightings,
+        and count them into the session (runs on the writer, own savepoint)."""
+        for row, _, _, _, _ in chunk:
+            row["search_session_id"] = session_id
+        # A row stored meanwhile by a concurrent search is skipped by
+        # ON CONFLICT (unique_key) DO NOTHING
+        ids = {key: job_id for job_id, key in insert_ignore_returning(
+            JobRecord.__table__, [row for row, _, _, _, _ in chunk], "unique_key",
+            JobRecord.__table__.c.id, JobRecord.__table__.c.unique_key)}
+        inserted = []
+        sightings_rows = []
+        for row, counts, fp, ck, sightings in chunk:
+            if row["unique_key"] in ids:
+                row["id"] = ids[row["unique_key"]]
+                inserted.append((row, counts, fp, ck))
+                sightings_rows.extend({**s, "job_record_id": row["id"]} for s in sightings)
+
+        index_jobs([(row["id"], counts) for row, counts, _, _ in inserted])
+        similar_index.add_to_index([(row["id"], counts.keys()) for row, counts, _, _ in inserted])
+        add_fingerprints([(row["id"], fp, ck) for row, _, fp, ck in inserted])
+        top_candidates.add_jobs([row for row, _, _, _ in inserted])
+        reposts = [(row["id"], row["repost_of_id"]) for row, _, _, _ in inserted if row["repost_of_id"]]
+        inherited = inherit_status(reposts, now)
+        record_sightings(sightings_rows)
+        SearchSession.query.filter_by(id=session_id).update(
+            {SearchSession.total_results: SearchSession.total_results + len(inserted)},
+            synchronize_session=False)
+        return len(inserted), len(sightings_rows), len(reposts), inherited
+
+    def set_status(session_id, status):
+        SearchSession.query.filter_by(id=session_id).update(
+            {SearchSession.status: status}, synchronize_session=False)
+
+    def finish(session_id, status):
+        """Update the stored jobs seen again and close the session."""
+        score_cache.flush()
+        record_sightings(new_sightings)
+        merged = merge_into_stored(merges)
+        learned = learn_aliases(alias_sightings)
+        set_status(session_id, status)
+        return merged, learned
+
+    # Each chunk commits on its own: the write lock is held for one chunk at
+    # a time, stored chunks show up (GET /api/jobs?session_id=) while later
+    # ones are written, and a chunk that fails is rolled back alone
+    session_id = db_writer.run(start_session)
+    new_count = sightings_count = reposts = inherited = failed = 0
+    for i in range(0, len(rows), STORE_CHUNK):
+        chunk = rows[i:i + STORE_CHUNK]
+        try:
+            stored = db_writer.run(store_chunk, session_id, chunk)
+        except Exception as e:
+            logger.error(f"Storing jobs {i + 1}-{i + len(chunk)} of session {session_id} failed: {e}")
+            failed += len(chunk)
+            continue
+        new_count += stored[0]
+        sightings_count += stored[1]
+        reposts += stored[2]
+        inherited += stored[3]
+    status = "partial" if failed else "complete"
+    try:
+        merged, learned = db_writer.run(finish, session_id, status)
+        sightings_count += len(new_sightings)
+        if learned:
+            load_aliases()
+    except Exception as e:
+        logger.error(f"Updating stored jobs seen again by session {session_id} failed: {e}")
+        merged = 0
+        status = "partial"
+        db_writer.run(set_status, session_id, status)
+    skipped["existing"] += len(rows) - new_count - failed
+
+    logger.info(f"Stored {new_count} new jobs (out of {len(all_raw_jobs)} fetched), skipped {skipped}, "
+                f"{failed} failed to store, "
+                f"{sightings_count} source sightings recorded, {merged} stored jobs updated, "
+                f"{reposts} reposts ({inherited} inherited a status), "
+                f"score cache {score_cache.hits} hits / {score_cache.misses} misses")
 
     return {
-        "session_id": session.id,
+        "session_id": session_id,
         "new_count": new_count,
         "total_fetched": len(all_raw_jobs),
+        "inserted": new_count,
+        "skipped": skipped,
+        "sightings": sightings_count,
+        "merged": merged,
+        "reposts": reposts,
+        "failed": failed,
+        "status": status,
     }
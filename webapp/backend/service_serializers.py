@@ -0,0 +1,39 @@
+"""Batched serialization for endpoints that return lists of ORM rows.
+
+to_dict() reads relationships lazily. Serializing N rows one at a time
+costs one query per JobRecord.application, one per application's
+feedbacks, and, in list_applications, one per application's job. That is
+1 + 3N statements per page. List queries take the loader options below
+instead. Each relationship level is then loaded for all rows in one
+SELECT ... IN, so a list costs the same number of statements for any N.
+"""
+
+from sqlalchemy.orm import selectinload
+
+from models import JobRecord, JobApplication
+
+
+def job_load_options() -> tuple:
+    """Options for a JobRecord query whose rows are serialized with to_dict()."""
+    return (selectinload(JobRecord.application).selectinload(JobApplication.feedbacks),)
+
+
+def application_load_options() -> tuple:
+    """Options for a JobApplication query serialized by application_dicts()."""
+    return (
+        selectinload(JobApplication.feedbacks),
+        selectinload(JobApplication.job)
+        .selectinload(JobRecord.application)
+        .selectinload(JobApplication.feedbacks),
+    )
+
+
+def application_dicts(apps) -> list[dict]:
+    """Applications with their job, as list_applications returns them."""
+    result = []
+    for app in apps:
+        app_dict = app.to_dict()
+        if app.job is not None:
+            app_dict["job"] = app.job.to_dict()
+        result.append(app_dict)
+    return result
@@ -0,0 +1,157 @@
+""""More like this" lookups via a MinHash LSH index over job titles + descriptions.
+
+Each job's token set (see service_similarity.term_counts) is reduced to a
+NUM_PERM-value MinHash signature, split into BANDS bands of ROWS values
+(21 x 3: a pair at Jaccard 0.5 collides in some band with p ~ 0.94). Jobs
+sharing any band bucket become candidates, up to MAX_CANDIDATES of those
+sharing the most bands; candidates are ranked by the signature-estimated
+Jaccard similarity. Signatures and band buckets are
+stored in SQLite and appended at ingest (POST /api/jobs/rescore backfills
+older jobs), so a query costs BANDS index probes plus one signature fetch
+instead of a pass over every description.
+"""
+
+import random
+import struct
+import hashlib
+import logging
+import zlib
+
+from sqlalchemy import and_, or_, bindparam, func
+
+from models import db, JobRecord, MinHashSignature, LshBucket
+from service_serializers import job_load_options
+
+logger = logging.getLogger(__name__)
+
+NUM_PERM = 64
+ROWS = 3
+BANDS = NUM_PERM // ROWS
+MAX_CANDIDATES = 2000
+MIN_SIMILARITY = 0.3
+LOOKUP_CHUNK = 500
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(1337)
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+_PACK = struct.Struct(f"<{NUM_PERM}Q")
+
+
+def minhash(tokens) -> tuple:
+    """MinHash signature of a token set (all-max signature for an empty set)."""
+    hashes = [zlib.crc32(t.encode("utf-8")) for t in set(tokens)]
+    if not hashes:
+        return (_PRIME,) * NUM_PERM
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMS)
+
+
+def band_buckets(signature: tuple) -> list[int]:
+    """One signed 64-bit bucket id per band."""
+    buckets = []
+    for band in range(BANDS):
+        chunk = signature[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(struct.pack(f"<{ROWS}Q", *chunk), digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, "little", signed=True))
+    return buckets
+
+
+def estimate_jaccard(a: tuple, b: tuple) -> float:
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_PERM
+
+
+def _pack(signature: tuple) -> bytes:
+    return _PACK.pack(*signature)
+
+
+def _unpack(blob: bytes) -> tuple:
+    return _PACK.unpack(blob)
+
+
+def add_to_index(items: list[tuple[int, object]]):
+    """Index newly stored jobs. items: [(job id, token iterable)]. Caller commits."""
+    if not items:
+        return
+    sig_rows, bucket_rows = [], []
+    for job_id, tokens in items:
+        tokens = set(tokens)
+        sig = minhash(tokens)
+        sig_rows.append({"job_id": job_id, "signature": _pack(sig)})
+        if not tokens:
+            continue  # empty texts would all share one bucket
+        bucket_rows.extend({"band": band, "bucket": bucket, "job_id": job_id}
+                           for band, bucket in enumerate(band_buckets(sig)))
+    db.session.execute(MinHashSignature.__table__.insert(), sig_rows)
+    if bucket_rows:
+        db.session.execute(LshBucket.__table__.insert(), bucket_rows)
+
+
+def remove_from_index(job_ids: list[int]):
+    """Drop jobs from the index (archived). Caller commits."""
+    buckets = LshBucket.__table__
+    for i in range(0, len(job_ids), LOOKUP_CHUNK):
+        chunk = job_ids[i:i + LOOKUP_CHUNK]
+        # Bucket rows are keyed (band, bucket, job): recompute them from the signatures
+        keys = [{"_band": band, "_bucket": bucket, "_job": job_id}
+                for job_id, blob in db.session.query(MinHashSignature.job_id, MinHashSignature.signature).filter(
+                    MinHashSignature.job_id.in_(chunk)).all()
+                for band, bucket in enumerate(band_buckets(_unpack(blob)))]
+        if keys:
+            db.session.execute(buckets.delete().where(
+                buckets.c.band == bindparam("_band"), buckets.c.bucket == bindparam("_bucket"),
+                buckets.c.job_id == bindparam("_job")), keys)
+        MinHashSignature.query.filter(MinHashSignature.job_id.in_(chunk)).delete(synchronize_session=False)
+
+
+def indexed_job_ids() -> set:
+    return {row[0] for row in db.session.query(MinHashSignature.job_id).all()}
+
+
+def similar_jobs(job_id: int, tokens=None, limit: int = 10,
+                 visible_only: bool = False) -> list[tuple[int, float]]:
+    """[(job id, estimated Jaccard)] most similar to job_id, best first.
+    visible_only leaves out hard-filtered (-99) and folded jobs.
+
+    `tokens` gives the signature of a job not indexed yet (stored before the
+    index, or imported with defer_index). It is computed in memory only:
+    lookups stay read-only, and rescore adds the job to the index.
+    """
+    row = db.session.get(MinHashSignature, job_id)
+    if row is not None:
+        sig = _unpack(row.signature)
+    elif tokens is not None:
+        sig = minhash(tokens)
+    else:
+        return []
+
+    probes = or_(*[and_(LshBucket.band == band, LshBucket.bucket == bucket)
+                   for band, bucket in enumerate(band_buckets(sig))])
+    # Jobs sharing more bands are likelier to be similar: keep those first
+    candidate_ids = [r[0] for r in db.session.query(LshBucket.job_id).filter(
+        probes, LshBucket.job_id != job_id).group_by(LshBucket.job_id).order_by(
+        func.count().desc(), LshBucket.job_id).limit(MAX_CANDIDATES).all()]
+    if not candidate_ids:
+        return []
+
+    signatures = db.session.query(MinHashSignature.job_id, MinHashSignature.signature).filter(
+        MinHashSignature.job_id.in_(candidate_ids))
+    if visible_only:
+        signatures = signatures.join(JobRecord, JobRecord.id == MinHashSignature.job_id).filter(
+            JobRecord.match_score > -99, JobRecord.merged_into_id.is_(None))
+    scored = []
+    for cid, blob in signatures.all():
+        sim = estimate_jaccard(sig, _unpack(blob))
+        if sim >= MIN_SIMILARITY:
+            scored.append((cid, round(sim, 3)))
+    scored.sort(key=lambda x: (-x[1], x[0]))
+    return scored[:limit]
+
+
+def similar_job_records(job: JobRecord, tokens=None, limit: int = 10) -> list[tuple[JobRecord, float]]:
+    """Like similar_jobs, as stored records, visible jobs only (the list's rule)."""
+    matches = similar_jobs(job.id, tokens, limit, visible_only=True)
+    if not matches:
+        return []
+    by_id = {j.id: j for j in JobRecord.query.options(*job_load_options()).filter(
+        JobRecord.id.in_([m[0] for m in matches]), JobRecord.match_score > -99,
+        JobRecord.merged_into_id.is_(None)).all()}
+    return [(by_id[jid], sim) for jid, sim in matches if jid in by_id]
@@ -0,0 +1,169 @@
+"""Local TF-IDF similarity between the uploaded resume and stored jobs.
+
+Raw term counts are cached per job (and for the resume) in text_vectors;
+document frequencies live in term_stats and are incremented as jobs are
+stored, so IDF tracks the growing corpus without a rebuild. IDF weighting is
+applied at comparison time, which keeps cached vectors valid as it drifts.
+"""
+
+import re
+import json
+import math
+import logging
+from collections import Counter
+
+from sqlalchemy import bindparam
+
+from models import db, TermStat, TextVector
+from db_helpers import dialect_insert
+from service_feedback_learning import STOPWORDS
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"[a-z][a-z0-9+#]+")
+RESUME_REF = 0
+LOOKUP_CHUNK = 500
+
+
+def term_counts(text: str) -> dict:
+    """Tokenize text into {term: count}, dropping stopwords and 1-letter tokens."""
+    tokens = TOKEN_RE.findall((text or "").lower())
+    return dict(Counter(t for t in tokens if t not in STOPWORDS and len(t) <= 100))
+
+
+def job_text(job_dict: dict) -> str:
+    return f"{job_dict.get('title') or ''} {job_dict.get('description') or ''}"
+
+
+class TfidfModel:
+    """Smoothed IDF table over the job corpus."""
+
+    def __init__(self, doc_count: int, doc_freq: dict):
+        self.doc_count = doc_count
+        self.doc_freq = doc_freq
+
+    @classmethod
+    def load(cls) -> "TfidfModel":
+        doc_count = TextVector.query.filter_by(kind="job").count()
+        doc_freq = dict(db.session.query(TermStat.term, TermStat.doc_freq).all())
+        return cls(doc_count, doc_freq)
+
+    def idf(self, term: str) -> float:
+        return math.log((1 + self.doc_count) / (1 + self.doc_freq.get(term, 0))) + 1
+
+    def weigh(self, counts: dict) -> tuple[dict, float]:
+        """Sublinear TF-IDF weights and their L2 norm."""
+        weights = {t: (1 + math.log(c)) * self.idf(t) for t, c in counts.items()}
+        norm = math.sqrt(sum(w * w for w in weights.values()))
+        return weights, norm
+
+    def cosine(self, a: tuple[dict, float], counts: dict) -> float:
+        """Cosine between pre-weighted vector `a` and raw counts."""
+        a_weights, a_norm = a
+        if not a_norm or not counts:
+            return 0.0
+        b_weights, b_norm = self.weigh(counts)
+        if not b_norm:
+            return 0.0
+        if len(b_weights) > len(a_weights):
+            a_weights, b_weights = b_weights, a_weights
+        dot = sum(w * a_weights.get(t, 0.0) for t, w in b_weights.items())
+        return dot / (a_norm * b_norm)
+
+
+class ResumeMatcher:
+    """Scores job texts against the stored resume vector.
+
+    Load once per batch; `similarity` returns None when no resume is stored.
+    """
+
+    def __init__(self, model: TfidfModel, resume_counts: dict | None):
+        self.model = model
+        self._resume = model.weigh(resume_counts) if resume_counts else None
+
+    @classmethod
+    def load(cls) -> "ResumeMatcher":
+        row = TextVector.query.filter_by(kind="resume", ref_id=RESUME_REF).first()
+        resume_counts = json.loads(row.terms) if row else None
+        return cls(TfidfModel.load(), resume_counts)
+
+    def similarity(self, counts: dict) -> float | None:
+        if self._resume is None:
+            return None
+        return round(self.model.cosine(self._resume, counts), 4)
+
+
+def save_resume_vector(text: str):
+    """Replace the cached resume vector (called on upload; caller commits)."""
+    counts = term_counts(text)
+    row = TextVector.query.filter_by(kind="resume", ref_id=RESUME_REF).first()
+    if row:
+        row.terms = json.dumps(counts)
+    else:
+        db.session.add(TextVector(kind="resume", ref_id=RESUME_REF, terms=json.dumps(counts)))
+
+
+def index_jobs(items: list[tuple[int, dict]]):
+    """Cache vectors for newly stored jobs and bump document frequencies.
+
+    items: [(job id, term counts)]. Caller commits.
+    """
+    if not items:
+        return
+    db.session.execute(TextVector.__table__.insert(), [
+        {"kind": "job", "ref_id": job_id, "terms": json.dumps(counts)} for job_id, counts in items
+    ])
+
+    df = Counter()
+    for _, counts in items:
+        df.update(counts.keys())
+    rows = [{"term": t, "doc_freq": n} for t, n in df.items()]
+    stmt = dialect_insert(TermStat.__table__)
+    if stmt is not None:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["term"],
+            set_={"doc_freq": TermStat.__table__.c.doc_freq + stmt.excluded.doc_freq},
+        )
+        db.session.execute(stmt, rows)
+    else:
+        existing = {r.term: r for r in TermStat.query.filter(TermStat.term.in_(list(df))).all()}
+        for t, n in df.items():
+            if t in existing:
+                existing[t].doc_freq += n
+            else:
+                db.session.add(TermStat(term=t, doc_freq=n))
+
+
+def unindex_jobs(job_ids: list[int]):
+    """Drop the cached vectors of jobs leaving the corpus (archived) and their
+    document frequencies. Caller commits."""
+    df = Counter()
+    for i in range(0, len(job_ids), LOOKUP_CHUNK):
+        chunk = job_ids[i:i + LOOKUP_CHUNK]
+        for (terms,) in db.session.query(TextVector.terms).filter(
+                TextVector.kind == "job", TextVector.ref_id.in_(chunk)).all():
+            df.update(json.loads(terms).keys())
+        TextVector.query.filter(TextVector.kind == "job", TextVector.ref_id.in_(chunk)).delete(
+            synchronize_session=False)
+    if not df:
+        return
+    table = TermStat.__table__
+    db.session.execute(table.update().where(table.c.term == bindparam("_term")).values(
+        doc_freq=table.c.doc_freq - bindparam("_n")), [{"_term": t, "_n": n} for t, n in df.items()])
+    TermStat.query.filter(TermStat.doc_freq <= 0).delete(synchronize_session=False)
+
+
+def job_vectors(job_ids: list[int] | None = None) -> dict:
+    """Cached {job id: term counts} for the given jobs (all jobs when None)."""
+    result = {}
+    if job_ids is None:
+        for ref_id, terms in db.session.query(TextVector.ref_id, TextVector.terms).filter(
+                TextVector.kind == "job").all():
+            result[ref_id] = json.loads(terms)
+        return result
+    for i in range(0, len(job_ids), LOOKUP_CHUNK):
+        chunk = job_ids[i:i + LOOKUP_CHUNK]
+        for ref_id, terms in db.session.query(TextVector.ref_id, TextVector.terms).filter(
+                TextVector.kind == "job", TextVector.ref_id.in_(chunk)).all():
+            result[ref_id] = json.loads(terms)
+    return result
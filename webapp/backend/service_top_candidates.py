@@ -0,0 +1,114 @@
+"""Materialized "top candidates" set for the default job list view.
+
+Keeps the top TOP_CANDIDATES_SIZE visible jobs (match_score > -99, not folded
+into another record) ordered by (match_score desc, id) in the top_candidates
+table, so the first page of GET /api/jobs sorted by score reads a small
+pre-ranked set instead of sorting the whole jobs table.
+
+Invariant: the table holds exactly the top-N visible jobs, or all of them
+when there are fewer than N. It is maintained incrementally:
+- ingest      -> add_jobs(new_rows)
+- rescore     -> rebuild()
+- application -> set_application_status(job_id, status)
+Callers commit.
+"""
+
+import logging
+
+from models import db, JobRecord, JobApplication, TopCandidate
+
+logger = logging.getLogger(__name__)
+
+TOP_CANDIDATES_SIZE = 1000
+
+
+def _insert(rows: list[dict]):
+    if rows:
+        db.session.execute(TopCandidate.__table__.insert(), rows)
+
+
+def _trim():
+    """Drop rows ranked below TOP_CANDIDATES_SIZE."""
+    keep = db.session.query(TopCandidate.job_id).order_by(
+        TopCandidate.match_score.desc(), TopCandidate.job_id
+    ).limit(TOP_CANDIDATES_SIZE)
+    TopCandidate.query.filter(~TopCandidate.job_id.in_(keep.scalar_subquery())).delete(
+        synchronize_session=False)
+
+
+def rebuild():
+    """Recompute the whole set from the jobs table (after a rescore)."""
+    TopCandidate.query.delete(synchronize_session=False)
+    rows = db.session.query(
+        JobRecord.id, JobRecord.match_score, JobRecord.source, JobApplication.status,
+    ).outerjoin(JobApplication, JobApplication.job_id == JobRecord.id).filter(
+        JobRecord.match_score > -99, JobRecord.merged_into_id.is_(None)
+    ).order_by(JobRecord.match_score.desc(), JobRecord.id).limit(TOP_CANDIDATES_SIZE).all()
+    _insert([{"job_id": r.id, "match_score": r.match_score, "source": r.source,
+              "application_status": r.status} for r in rows])
+    logger.info(f"Top candidates rebuilt: {len(rows)} jobs")
+
+
+def ensure_built():
+    """Populate the set on first start against a database that predates it."""
+    if TopCandidate.query.first() is None and \
+            JobRecord.query.filter(JobRecord.match_score > -99).first() is not None:
+        rebuild()
+        db.session.commit()
+
+
+def add_jobs(rows: list[dict]):
+    """Merge newly inserted jobs (dicts with id, match_score, source) into the set.
+
+    New jobs have no application yet; anything that attaches one at
+    ingest calls set_application_status afterwards.
+    """
+    candidates = [r for r in rows if r["match_score"] is not None and r["match_score"] > -99]
+    if not candidates:
+        return
+
+    size = TopCandidate.query.count()
+    floor = None
+    if size >= TOP_CANDIDATES_SIZE:
+        floor = TopCandidate.query.order_by(
+            TopCandidate.match_score, TopCandidate.job_id.desc()).first()
+
+    new_rows = []
+    for r in candidates:
+        if floor is not None and (r["match_score"], -r["id"]) <= (floor.match_score, -floor.job_id):
+            continue
+        new_rows.append({"job_id": r["id"], "match_score": r["match_score"], "source": r["source"],
+                         "application_status": None})
+    _insert(new_rows)
+    if size + len(new_rows) > TOP_CANDIDATES_SIZE:
+        _trim()
+
+
+def set_application_status(job_id: int, status: str | None):
+    """Keep the denormalized application status in sync (None when deleted)."""
+    TopCandidate.query.filter_by(job_id=job_id).update(
+        {"application_status": status}, synchronize_session=False)
+
+
+def first_page(per_page: int, min_score: float | None = None, source: str | None = None,
+               hide_dismissed: bool = False, columns=None) -> list | None:
+    """First page of the score-ordered list, or None if the set can't answer it.
+
+    The set can answer when it yields a full page after filtering, or when it
+    holds every visible job. With `columns`, rows of those (labelled) columns
+    are returned instead of JobRecord objects.
+    """
+    query = db.session.query(*columns).select_from(JobRecord) if columns else JobRecord.query
+    query = query.join(TopCandidate, TopCandidate.job_id == JobRecord.id)
+    if min_score is not None:
+        query = query.filter(TopCandidate.match_score >= min_score)
+    if source:
+        query = query.filter(TopCandidate.source == source)
+    if hide_dismissed:
+        query = query.filter(db.or_(TopCandidate.application_status.is_(None),
+                                    TopCandidate.application_status != "not_interested"))
+
+    jobs = query.order_by(TopCandidate.match_score.desc(), TopCandidate.job_id).limit(per_page).all()
+    if len(jobs) == per_page or TopCandidate.query.count() < TOP_CANDIDATES_SIZE:
+        return jobs
+    return None
@@ -24,6 +24,7 @@ export const deleteKeyword = (id) => api.delete(`/keywords/${id}`)
 export const searchJobs = () => api.post('/jobs/search')
 export const getJobs = (params) => api.get('/jobs', { params })
 export const getJob = (id) => api.get(`/jobs/${id}`)
+export const getSimilarJobs = (id, params) => api.get(`/jobs/${id}/similar`, { params })
 export const rescoreJobs = () => api.post('/jobs/rescore')
 
 // Applications
@@ -65,6 +65,10 @@ export default function JobCard({ job, onDismiss }) {
     }
   }
 
+  // List rows carry a snippet; full records (e.g. similar jobs) the description
+  const snippet = job.description_snippet ?? (job.description && (
+    job.description.length > 200 ? job.description.slice(0, 200) + '...' : job.description))
+
   return (
     <div
       style={{
@@ -89,11 +93,7 @@ export default function JobCard({ job, onDismiss }) {
         {job.salary && <> &middot; {job.salary}</>}
         {job.source && <> &middot; <span style={{ textTransform: 'capitalize' }}>{job.source}</span></>}
       </div>
-      {job.description && (
-        <div style={styles.desc}>
-          {job.description.length > 200 ? job.description.slice(0, 200) + '...' : job.description}
-        </div>
-      )}
+      {snippet && <div style={styles.desc}>{snippet}</div>}
       <div style={{ display: 'flex', justifyContent: 'space-between', alignItems: 'center', marginTop: '0.5rem' }}>
         <div style={styles.tags}>
           {job.match_tags && job.match_tags.map((tag, i) => (
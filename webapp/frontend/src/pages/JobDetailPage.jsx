@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react'
 import { useParams, useNavigate } from 'react-router-dom'
-import { getJob, createApplication, updateApplication, saveLearnedKeywords } from '../api'
+import { getJob, getSimilarJobs, createApplication, updateApplication, saveLearnedKeywords } from '../api'
 import StatusBadge from '../components/StatusBadge'
 import FeedbackForm from '../components/FeedbackForm'
 
@@ -71,6 +71,17 @@ const styles = {
   link: { color: '#667eea', textDecoration: 'none', fontWeight: 500 },
   section: { marginTop: '1.5rem' },
   sectionTitle: { fontSize: '1rem', fontWeight: 600, marginBottom: '0.75rem' },
+  similarItem: {
+    display: 'flex',
+    justifyContent: 'space-between',
+    gap: '0.75rem',
+    padding: '0.6rem 0.75rem',
+    background: '#fafafa',
+    borderRadius: '8px',
+    marginBottom: '0.4rem',
+    fontSize: '0.9rem',
+    cursor: 'pointer',
+  },
   feedbackItem: {
     padding: '0.75rem',
     background: '#fafafa',
@@ -230,6 +241,7 @@ export default function JobDetailPage() {
   // Keyword suggestion state
   const [suggestedKeywords, setSuggestedKeywords] = useState([])
   const [keywordCategory, setKeywordCategory] = useState(null)
+  const [similar, setSimilar] = useState([])
 
   const load = async () => {
     try {
@@ -243,6 +255,13 @@ export default function JobDetailPage() {
 
   useEffect(() => { load() }, [id])
 
+  useEffect(() => {
+    setSimilar([])
+    getSimilarJobs(id, { limit: 5 })
+      .then(res => setSimilar(res.data))
+      .catch(err => console.error('Failed to load similar jobs:', err))
+  }, [id])
+
   if (!job) return <div style={{ textAlign: 'center', padding: '3rem', color: '#888' }}>Loading...</div>
 
   const app = job.application
@@ -471,6 +490,18 @@ export default function JobDetailPage() {
             <FeedbackForm applicationId={app.id} onSubmit={load} />
           </div>
         )}
+
+        {similar.length > 0 && (
+          <div style={styles.section}>
+            <div style={styles.sectionTitle}>More like this</div>
+            {similar.map(other => (
+              <div key={other.id} style={styles.similarItem} onClick={() => navigate(`/jobs/${other.id}`)}>
+                <span>{other.title} &middot; <span style={{ color: '#888' }}>{other.company}</span></span>
+                <span style={{ color: '#888', whiteSpace: 'nowrap' }}>{Math.round(other.similarity * 100)}% similar</span>
+              </div>
+            ))}
+          </div>
+        )}
       </div>
     </div>
   )